@@ -0,0 +1,89 @@
+# benchmarks/bench_backup_capture.py
+"""
+So sánh peak RSS khi backup đồng thời nhiều thiết bị có cấu hình lớn:
+- string: get_running_config() trả về cả cấu hình dạng chuỗi rồi mới nén/ghi (cách cũ).
+- stream: stream_running_config() đẩy từng đoạn output qua gzip + SHA-256 thẳng xuống file tạm.
+Mỗi chế độ chạy trong tiến trình riêng để đo peak RSS độc lập, trên mock server trong tools/.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.bench_backup_capture --count 200 --config-lines 100000
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+
+def _capture(mode, device, engine, store, errors):
+    from core.ssh_client import SSHClient
+    from core.vendors.vendor_factory import get_vendor_class
+    ssh = SSHClient(device, "admin", "admin", pooled=False, engine=engine)
+    try:
+        if not ssh.connect():
+            errors.append(device["name"]); return
+        vendor = get_vendor_class(device["device_type"])(ssh)
+        if mode == "string":
+            store.put(device["name"], vendor.get_running_config(), vendor=device["device_type"])
+        else:
+            store.capture(device["name"], vendor.stream_running_config, vendor=device["device_type"])
+    except Exception as e:
+        errors.append(f"{device['name']}: {e}")
+    finally:
+        ssh.disconnect()
+
+def _run_mode(mode, count, port, engine):
+    from core.backup_store import BackupStore
+    warnings.simplefilter("ignore")
+    store = BackupStore(tempfile.mkdtemp(prefix="bench_backup_"))
+    devices = [{"name": f"DEV-{i:04d}", "ip": f"127.0.{(i >> 8) & 255}.{(i & 255) or 1}",
+                "device_type": "fortinet", "port": port} for i in range(count)]
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    errors = []
+    start = time.perf_counter()
+    threads = [threading.Thread(target=_capture, args=(mode, d, engine, store, errors)) for d in devices]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"mode": mode, "devices": count, "ok": count - len(errors), "seconds": round(time.perf_counter() - start, 2),
+            "baseline_rss_mb": round(baseline / 1024, 1), "peak_rss_mb": round(peak / 1024, 1),
+            "errors": errors[:3]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--port", type=int, default=22322)
+    parser.add_argument("--config-lines", type=int, default=100000, help="Số dòng 'show full-configuration' của mock")
+    parser.add_argument("--engine", choices=["netmiko", "asyncssh"], default="netmiko")
+    parser.add_argument("--mode", choices=["both", "string", "stream"], default="both")
+    args = parser.parse_args()
+
+    if args.mode != "both":
+        print(json.dumps(_run_mode(args.mode, args.count, args.port, args.engine)))
+        return
+
+    server = subprocess.Popen([sys.executable, "-m", "tools.mock_ssh_server", "--port", str(args.port - 1),
+                               "--config-lines", str(args.config_lines)], stdout=subprocess.PIPE, text=True)
+    try:
+        server.stdout.readline()  # Chờ mock server sẵn sàng (FortiOS ở port + 1)
+        for mode in ("string", "stream"):
+            cmd = [sys.executable, "-m", "benchmarks.bench_backup_capture", "--mode", mode, "--count", str(args.count),
+                   "--port", str(args.port), "--engine", args.engine]
+            output = subprocess.run(cmd, capture_output=True, text=True)
+            if output.returncode != 0:
+                print(f"[{mode}] lỗi:\n{output.stderr[-2000:]}")
+                continue
+            result = json.loads(output.stdout.strip().splitlines()[-1])
+            print(f"[{mode:6}] {result['ok']}/{result['devices']} bản backup trong {result['seconds']}s, "
+                  f"RSS trước khi chạy={result['baseline_rss_mb']} MB, peak RSS={result['peak_rss_mb']} MB")
+            if result["errors"]:
+                print(f"         lỗi (ví dụ): {result['errors']}")
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_batch_commands.py
+"""
+So sánh thời gian lấy health + interfaces + running-config của một thiết bị:
+gửi từng lệnh một (mỗi lệnh một lượt đi-về) với run_batch (cả nhóm lệnh một lượt),
+trên mock server trong tools/ có độ trễ đường truyền cao.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.bench_batch_commands --latency 0.2 --devices 5
+"""
+import argparse
+import subprocess
+import sys
+import time
+import warnings
+
+from core.ssh_client import SSHClient
+from core.vendors.vendor_factory import get_vendor_class
+
+def _collect_serial(ssh, vendor):
+    commands = list(dict.fromkeys(vendor.HEALTH_COMMANDS + vendor.INTERFACE_COMMANDS + vendor.CONFIG_COMMANDS))
+    return {command: ssh.run(command) for command in commands}, len(commands)
+
+def _collect_batch(ssh, vendor):
+    vendor.collect(health=True, interfaces=True, config=True)
+    return None, 1
+
+def _bench(devices, engine, collect):
+    """Trả về (tổng số lượt đi-về, tổng thời gian) cho danh sách thiết bị, không tính thời gian đăng nhập."""
+    round_trips, elapsed = 0, 0.0
+    for device in devices:
+        ssh = SSHClient(device, "admin", "admin", pooled=False, engine=engine)
+        if not ssh.connect():
+            raise SystemExit(f"Không kết nối được {device['ip']}:{device['port']}")
+        try:
+            vendor = get_vendor_class(device["device_type"])(ssh)
+            start = time.perf_counter()
+            _, trips = collect(ssh, vendor)
+            elapsed += time.perf_counter() - start
+            round_trips += trips
+        finally:
+            ssh.disconnect()
+    return round_trips, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=5, help="Số thiết bị mỗi hãng")
+    parser.add_argument("--port", type=int, default=22222)
+    parser.add_argument("--latency", type=float, default=0.2, help="Độ trễ đường truyền của mock server (giây)")
+    parser.add_argument("--engine", choices=["netmiko", "asyncssh"], default="netmiko")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    server = subprocess.Popen([sys.executable, "-m", "tools.mock_ssh_server", "--port", str(args.port),
+                               "--latency", str(args.latency)], stdout=subprocess.PIPE, text=True)
+    try:
+        server.stdout.readline()  # Chờ mock server sẵn sàng
+        for offset, device_type in enumerate(("cisco_ios", "fortinet")):
+            devices = [{"name": f"DEV-{i}", "ip": f"127.0.1.{i + 1}", "device_type": device_type,
+                        "port": args.port + offset} for i in range(args.devices)]
+            for label, collect in (("từng lệnh", _collect_serial), ("run_batch", _collect_batch)):
+                trips, elapsed = _bench(devices, args.engine, collect)
+                print(f"[{device_type:9}] {label:9}: {trips / len(devices):.0f} lượt/thiết bị, "
+                      f"{elapsed / len(devices) * 1000:.0f} ms/thiết bị")
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
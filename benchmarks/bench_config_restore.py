@@ -0,0 +1,62 @@
+# benchmarks/bench_config_restore.py
+"""
+So sánh thời gian restore toàn bộ cấu hình một thiết bị Cisco: gõ từng dòng qua send_config_set
+(CiscoDevice.restore_config) với chép file lên flash qua SCP rồi 'configure replace'
+(CiscoDevice.replace_config), trên mock server trong tools/ có độ trễ đường truyền.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.bench_config_restore --config-lines 1000 --latency 0.02
+"""
+import argparse
+import subprocess
+import sys
+import time
+import warnings
+
+from core.ssh_client import SSHClient
+from core.vendors.vendor_factory import get_vendor_class
+
+def _restore_lines(vendor, config):
+    vendor.restore_config(config.splitlines())
+
+def _restore_replace(vendor, config):
+    vendor.replace_config(config)
+
+def _bench(device, engine, restore):
+    """Thời gian restore (giây), không tính thời gian đăng nhập và lấy cấu hình mẫu."""
+    ssh = SSHClient(device, "admin", "admin", pooled=False, engine=engine)
+    if not ssh.connect():
+        raise SystemExit(f"Không kết nối được {device['ip']}:{device['port']}")
+    try:
+        vendor = get_vendor_class(device["device_type"])(ssh)
+        config = vendor.get_running_config()
+        start = time.perf_counter()
+        restore(vendor, config)
+        return time.perf_counter() - start
+    finally:
+        ssh.disconnect()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=22422)
+    parser.add_argument("--latency", type=float, default=0.02, help="Độ trễ đường truyền của mock server (giây)")
+    parser.add_argument("--config-lines", type=int, default=1000)
+    parser.add_argument("--engine", choices=["netmiko", "asyncssh"], default="netmiko")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    server = subprocess.Popen([sys.executable, "-m", "tools.mock_ssh_server", "--port", str(args.port),
+                               "--latency", str(args.latency), "--config-lines", str(args.config_lines)],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        server.stdout.readline()  # Chờ mock server sẵn sàng
+        device = {"name": "DEV-1", "ip": "127.0.2.1", "device_type": "cisco_ios", "port": args.port}
+        print(f"Cấu hình {args.config_lines} dòng, độ trễ {args.latency * 1000:.0f} ms, engine {args.engine}")
+        for label, restore in (("send_config_set", _restore_lines), ("configure replace", _restore_replace)):
+            print(f"{label:17}: {_bench(device, args.engine, restore):.2f} s")
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_connection_check.py
+"""
+So sánh bộ quét kết nối asyncio mới với cách cũ (mỗi thiết bị một thread).
+
+Mô phỏng N thiết bị: một phần là listener thật trên loopback (127.x.y.z, cùng một
+socket lắng nghe trên 0.0.0.0), phần còn lại là "blackhole" trong dải TEST-NET-1
+(192.0.2.0/24) - tùy routing của máy mà sẽ bị drop (chờ hết timeout) hoặc báo lỗi ngay.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.bench_connection_check --count 10000 --dead-ratio 0.2
+"""
+import argparse
+import json
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from modules.connection_check import check_device_status, probe_devices
+
+def _start_listener(port):
+    """Mở một listener trên 0.0.0.0 và accept/đóng kết nối liên tục trong thread nền."""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("0.0.0.0", port))
+    server.listen(4096)
+
+    def _accept_loop():
+        while True:
+            conn, _ = server.accept()
+            conn.close()
+
+    threading.Thread(target=_accept_loop, daemon=True).start()
+    return server
+
+def _build_targets(count, dead_ratio):
+    """Sinh danh sách (name, ip): thiết bị sống ở 127.x.y.z, thiết bị chết ở 192.0.2.x."""
+    dead_count = int(count * dead_ratio)
+    targets = []
+    for i in range(count - dead_count):
+        targets.append((f"LIVE-{i:05d}", f"127.{(i >> 16) & 255}.{(i >> 8) & 255}.{(i & 255) or 1}"))
+    for i in range(dead_count):
+        targets.append((f"DEAD-{i:05d}", f"192.0.2.{(i % 254) + 1}"))
+    return targets
+
+def _run_threaded(targets, port):
+    results, threads = [], []
+    for name, ip in targets:
+        thread = threading.Thread(target=check_device_status, args=(name, ip, results, port))
+        threads.append(thread)
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def _run_mode(mode, count, dead_ratio, concurrency, timeout, port):
+    _start_listener(port)
+    targets = _build_targets(count, dead_ratio)
+    start = time.perf_counter()
+    error = None
+    try:
+        if mode == "thread":
+            results = _run_threaded(targets, port)
+        else:
+            results = probe_devices(targets, concurrency=concurrency, timeout=timeout, port=port, force_refresh=True)
+    except RuntimeError as e:
+        # Thường gặp: "can't start new thread" khi vượt giới hạn của hệ điều hành
+        results, error = [], str(e)
+    elapsed = time.perf_counter() - start
+    up = sum(1 for r in results if r[2] == "UP")
+    return {
+        "mode": mode,
+        "devices": count,
+        "up": up,
+        "down": len(results) - up,
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "error": error,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--dead-ratio", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=3)
+    parser.add_argument("--port", type=int, default=22022)
+    parser.add_argument("--mode", choices=["both", "thread", "async"], default="both")
+    args = parser.parse_args()
+
+    if args.mode != "both":
+        print(json.dumps(_run_mode(args.mode, args.count, args.dead_ratio, args.concurrency, args.timeout, args.port)))
+        return
+
+    # Mỗi chế độ chạy trong tiến trình riêng để đo peak RSS độc lập
+    for offset, mode in enumerate(("thread", "async")):
+        cmd = [sys.executable, "-m", "benchmarks.bench_connection_check", "--mode", mode,
+               "--count", str(args.count), "--dead-ratio", str(args.dead_ratio),
+               "--concurrency", str(args.concurrency), "--timeout", str(args.timeout),
+               "--port", str(args.port + offset)]
+        output = subprocess.run(cmd, capture_output=True, text=True)
+        if output.returncode != 0:
+            print(f"[{mode}] lỗi:\n{output.stderr}")
+            continue
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        print(f"[{mode:6}] {result['devices']} thiết bị: {result['seconds']}s, "
+              f"UP={result['up']} DOWN={result['down']}, peak RSS={result['peak_rss_mb']} MB"
+              + (f", lỗi: {result['error']}" if result['error'] else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/bench_render_plan.py
+"""
+Đo thời gian render kế hoạch đẩy cấu hình cho nhiều thiết bị (core/config_push.render_plan):
+biến được gộp từ mặc định của mẫu, data/device_vars.yaml (all / branches / groups / devices) và biến chung.
+  - shared : mẫu chỉ dùng biến theo chi nhánh -> thiết bị cùng chi nhánh dùng chung một lần render.
+  - unique : mẫu dùng cả biến riêng từng thiết bị -> mỗi thiết bị render một lần.
+Mỗi loại đo lần đầu (cache render trống) và lần chạy lại (cache đã có).
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.bench_render_plan --devices 5000 --branches 50
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import yaml
+
+import core.config_push as config_push
+from core.device_vars import DeviceVars
+from core.template_registry import TemplateRegistry
+
+VENDOR = "cisco_ios"
+
+SHARED_TEMPLATE = {
+    "name": "Site VLAN + NTP",
+    "variables": [{"name": "site_vlan"}, {"name": "ntp_server"}, {"name": "domain", "default": "corp.local"}],
+    "commands": {VENDOR: ["vlan {{ site_vlan }}", " name SITE-{{ branch }}", "ntp server {{ ntp_server }}",
+                          "ip domain name {{ branch | lower }}.{{ domain }}"]
+                 + [line for i in range(1, 11)
+                    for line in (f"interface GigabitEthernet1/0/{i}", " switchport access vlan {{ site_vlan }}")]},
+}
+UNIQUE_TEMPLATE = {
+    "name": "Loopback + hostname",
+    "variables": [{"name": "loopback_ip"}, {"name": "ntp_server"}],
+    "commands": {VENDOR: ["hostname {{ device_name }}", "interface Loopback0", " ip address {{ loopback_ip }} 255.255.255.255",
+                          "ntp server {{ ntp_server }} source Loopback0"]
+                 + [f"snmp-server host 10.0.0.{i} version 2c {{{{ device_name | lower }}}}" for i in range(20)]},
+}
+
+def _setup(tmp, device_count, branch_count):
+    templates = os.path.join(tmp, "templates", VENDOR)
+    os.makedirs(templates)
+    for key, data in (("shared", SHARED_TEMPLATE), ("unique", UNIQUE_TEMPLATE)):
+        with open(os.path.join(templates, f"{key}.yaml"), "w", encoding="utf-8") as f:
+            yaml.safe_dump(data, f, allow_unicode=True)
+    devices = [{"name": f"BR{i % branch_count:03d}-SW-{i:05d}", "ip": f"10.{i // 65536}.{i // 256 % 256}.{i % 256}",
+                "device_type": VENDOR, "tags": ["access"]} for i in range(device_count)]
+    data = {"all": {"ntp_server": "10.0.0.1"},
+            "branches": {f"BR{b:03d}": {"site_vlan": 100 + b} for b in range(branch_count)},
+            "groups": {"access": {"domain": "access.corp.local"}},
+            "devices": {d["name"]: {"loopback_ip": f"172.16.{i // 256}.{i % 256}"} for i, d in enumerate(devices)}}
+    path = os.path.join(tmp, "device_vars.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f)
+    return TemplateRegistry(os.path.join(tmp, "templates"), os.path.join(tmp, "cache")), DeviceVars(path), devices
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("--branches", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        registry, variables, devices = _setup(tmp, args.devices, args.branches)
+        config_push.device_vars = variables
+        variables.refresh()  # Đọc file biến một lần trước khi đo
+        print(f"{args.devices} thiết bị, {args.branches} chi nhánh")
+        for key in ("shared", "unique"):
+            template = registry.get(VENDOR, key)
+            for label in ("lần đầu", "chạy lại"):
+                start = time.perf_counter()
+                plan, errors = config_push.render_plan(template, devices, {"domain": "corp.local"})
+                elapsed = time.perf_counter() - start
+                print(f"{key:6} {label:8}: {elapsed * 1000:7.1f} ms ({len(plan)} thiết bị, {len(errors)} lỗi, "
+                      f"{len(template._renders)} bản render khác nhau)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_snmp_table.py
+"""
+So sánh cách lấy ifTable cho chẩn đoán SNMP (core/snmp_client.py) trên agent giả lập tools/mock_snmp_agent.py:
+  - legacy : 4 lần snmp_walk (ifDescr, ifOperStatus, ifInErrors, ifOutErrors), mỗi lần tạo Session mới (cách cũ).
+  - walk   : 4 lần snmp_walk dùng lại session đã cache.
+  - table  : một lần snmp_table, 4 cột cùng trong các gói GETBULK, với vài giá trị max-repetitions.
+Mỗi cách in thời gian, số gói yêu cầu agent nhận được và số interface đọc được.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.bench_snmp_table --interfaces 5000 --latency 0.005
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+from easysnmp import Session
+
+from core import snmp_client
+from core.snmp_client import snmp_table, snmp_walk
+from modules.diagnostics import IF_DIAG_COLUMNS
+from tools.mock_snmp_agent import start_mock_agent
+
+def _start_agent(port, interfaces, latency):
+    """Chạy agent giả lập trong một thread nền với event loop riêng."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    _, agent = asyncio.run_coroutine_threadsafe(
+        start_mock_agent("127.0.0.1", port, interfaces, latency), loop).result()
+    return agent
+
+def _legacy(community, host):
+    columns = {}
+    for name, oid in IF_DIAG_COLUMNS.items():
+        session = Session(hostname=host, community=community, version=2, timeout=10, retries=2)
+        columns[name] = {item.oid_index: item.value for item in session.walk(oid)}
+    return columns["name"]
+
+def _walk(community, host):
+    columns = {name: snmp_walk(community, host, oid) for name, oid in IF_DIAG_COLUMNS.items()}
+    return columns["name"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11161)
+    parser.add_argument("--interfaces", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Độ trễ mỗi gói trả lời của agent (giây)")
+    parser.add_argument("--repetitions", default="10,25,50", help="Các giá trị max-repetitions cần đo")
+    args = parser.parse_args()
+
+    agent = _start_agent(args.port, args.interfaces, args.latency)
+    host = f"127.0.0.1:{args.port}"
+    community = f"bench@{args.interfaces}"
+    print(f"Agent giả lập {host}: {args.interfaces} interface, độ trễ {args.latency * 1000:.0f} ms/gói")
+
+    cases = [("legacy", lambda: _legacy(community, host)), ("walk", lambda: _walk(community, host))]
+    for repetitions in (int(r) for r in args.repetitions.split(",")):
+        cases.append((f"table r={repetitions}", lambda r=repetitions: snmp_table(community, host, IF_DIAG_COLUMNS, max_repetitions=r)))
+
+    snmp_client.close_sessions()
+    for label, func in cases:
+        requests = agent.requests
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if "error" in result:
+            print(f"{label:11}: lỗi {result['error']}")
+            continue
+        print(f"{label:11}: {elapsed * 1000:8.1f} ms, {agent.requests - requests:6} gói, {len(result)} interface")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_ssh_engine.py
+"""
+So sánh thông lượng SSH toàn hệ thống: netmiko (mỗi thiết bị một thread) với
+engine asyncssh (mọi phiên trên một event loop), chạy trên mock server trong tools/.
+
+Mỗi thiết bị giả lập là một địa chỉ 127.x.y.z khác nhau; mỗi chế độ chạy trong
+tiến trình riêng để đo peak RSS độc lập.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.bench_ssh_engine --count 500 --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+import warnings
+
+COMMANDS = ["show version", "show ip interface brief"]
+
+def _build_devices(count, port):
+    return [{"name": f"DEV-{i:05d}", "ip": f"127.0.{(i >> 8) & 255}.{(i & 255) or 1}",
+             "device_type": "cisco_ios", "port": port} for i in range(count)]
+
+def _run_netmiko(devices):
+    from core.ssh_client import SSHClient
+    results = {}
+
+    def _worker(device):
+        ssh = SSHClient(device, "admin", "admin", pooled=False, engine="netmiko")
+        try:
+            if ssh.connect():
+                for command in COMMANDS:
+                    ssh.run(command)
+                results[device["name"]] = True
+        except Exception:
+            pass
+        finally:
+            ssh.disconnect()
+
+    threads = [threading.Thread(target=_worker, args=(d,)) for d in devices]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    return len(results)
+
+def _run_asyncssh(devices, concurrency):
+    from core.async_ssh import run_on_devices
+    results = asyncio.run(run_on_devices(devices, "admin", "admin", COMMANDS, concurrency=concurrency))
+    return sum(1 for _, success, _ in results if success)
+
+def _run_mode(mode, count, port, concurrency):
+    warnings.simplefilter("ignore")
+    devices = _build_devices(count, port)
+    start = time.perf_counter()
+    ok = _run_netmiko(devices) if mode == "netmiko" else _run_asyncssh(devices, concurrency)
+    return {"mode": mode, "devices": count, "ok": ok, "seconds": round(time.perf_counter() - start, 2),
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--port", type=int, default=22122)
+    parser.add_argument("--latency", type=float, default=0.05, help="Độ trễ đường truyền của mock server (giây)")
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--mode", choices=["both", "netmiko", "asyncssh"], default="both")
+    args = parser.parse_args()
+
+    if args.mode != "both":
+        print(json.dumps(_run_mode(args.mode, args.count, args.port, args.concurrency)))
+        return
+
+    server = subprocess.Popen([sys.executable, "-m", "tools.mock_ssh_server", "--port", str(args.port),
+                               "--latency", str(args.latency)], stdout=subprocess.PIPE, text=True)
+    try:
+        server.stdout.readline()  # Chờ mock server sẵn sàng
+        for mode in ("netmiko", "asyncssh"):
+            cmd = [sys.executable, "-m", "benchmarks.bench_ssh_engine", "--mode", mode, "--count", str(args.count),
+                   "--port", str(args.port), "--concurrency", str(args.concurrency)]
+            output = subprocess.run(cmd, capture_output=True, text=True)
+            if output.returncode != 0:
+                print(f"[{mode}] lỗi:\n{output.stderr[-2000:]}")
+                continue
+            result = json.loads(output.stdout.strip().splitlines()[-1])
+            rate = result["ok"] / result["seconds"] if result["seconds"] else 0
+            print(f"[{mode:8}] {result['ok']}/{result['devices']} thiết bị OK trong {result['seconds']}s "
+                  f"({rate:.0f} thiết bị/s), peak RSS={result['peak_rss_mb']} MB")
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_startup.py
+"""
+Đo thời gian từ lúc khởi động đến khung hình dashboard "hữu ích" đầu tiên
+(có trạng thái của toàn bộ thiết bị):
+  - cold: không có snapshot, phải chờ lượt quét đầu tiên hoàn tất.
+  - warm: đọc snapshot đã lưu và vẽ ngay (dữ liệu được đánh dấu là cũ).
+
+Thiết bị "chết" dùng dải TEST-NET-1 (192.0.2.0/24) nên lượt quét cold phải chờ timeout.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.bench_startup --count 5000 --dead-ratio 0.1 --timeout 3
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from rich.console import Console
+
+from core.status_snapshot import load_snapshot, save_snapshot
+from modules.connection_check import probe_devices
+from modules.dashboard import generate_layout
+
+def _build_targets(count, dead_ratio):
+    dead_count = int(count * dead_ratio)
+    targets = [(f"HN-LIVE-{i:05d}", "127.0.0.1") for i in range(count - dead_count)]
+    targets += [(f"HCM-DEAD-{i:05d}", f"192.0.2.{(i % 254) + 1}") for i in range(dead_count)]
+    return targets
+
+def _render(results, stale_since=None):
+    """Vẽ một khung hình dashboard vào bộ nhớ (không cần terminal)."""
+    console = Console(file=io.StringIO(), width=120, height=40)
+    console.print(generate_layout(results, 60, stale_since is not None, stale_since=stale_since))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--dead-ratio", type=float, default=0.1)
+    parser.add_argument("--timeout", type=float, default=3)
+    parser.add_argument("--port", type=int, default=22)
+    args = parser.parse_args()
+
+    targets = _build_targets(args.count, args.dead_ratio)
+
+    start = time.perf_counter()
+    probed = probe_devices(targets, timeout=args.timeout, port=args.port, force_refresh=True)
+    results = [(name, ip, status) for name, ip, status, _ in probed]
+    _render(results)
+    cold = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "status_snapshot.json")
+        save_start = time.perf_counter()
+        save_snapshot(results, path=path)
+        save_time = time.perf_counter() - save_start
+        size_kb = os.path.getsize(path) / 1024
+
+        start = time.perf_counter()
+        snapshot, saved_at = load_snapshot(path=path)
+        _render(snapshot, stale_since=saved_at)
+        warm = time.perf_counter() - start
+
+    print(f"{args.count} thiết bị ({int(args.count * args.dead_ratio)} không phản hồi, timeout {args.timeout}s)")
+    print(f"  cold (chờ lượt quét đầu tiên): {cold * 1000:.1f} ms")
+    print(f"  warm (từ snapshot):            {warm * 1000:.1f} ms")
+    print(f"  ghi snapshot: {save_time * 1000:.1f} ms, kích thước {size_kb:.1f} KB")
+
+if __name__ == "__main__":
+    main()
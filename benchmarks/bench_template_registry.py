@@ -0,0 +1,75 @@
+# benchmarks/bench_template_registry.py
+"""
+Đo thời gian nạp thư viện mẫu cấu hình (core/template_registry.py) với vài trăm mẫu sinh ngẫu nhiên:
+  - legacy : mỗi lượt menu đọc lại mọi file YAML bằng yaml.safe_load (cách cũ của bulk_config).
+  - cold   : kho mới, bytecode cache trống: đọc + kiểm tra + biên dịch mọi mẫu.
+  - restart: kho mới (tiến trình mới), bytecode cache trên đĩa đã có.
+  - warm   : lượt tra cứu tiếp theo trên cùng kho, không file nào đổi (chỉ stat).
+  - touch  : một file bị sửa, chỉ file đó được nạp lại.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.bench_template_registry --templates 500
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import yaml
+
+from core.template_registry import TemplateRegistry
+
+VENDORS = ("cisco_ios", "fortinet")
+
+def _write_templates(base_dir, count, commands):
+    for i in range(count):
+        vendor = VENDORS[i % len(VENDORS)]
+        os.makedirs(os.path.join(base_dir, vendor), exist_ok=True)
+        variables = [{"name": f"var_{j}", "prompt": f"Giá trị {j}", "default": f"value-{j}"} for j in range(5)]
+        lines = [f"set option-{k} {{{{ var_{k % 5} }}}}" + (" {% if var_0 %}enable{% endif %}" if k % 4 == 0 else "")
+                 for k in range(commands)]
+        data = {"name": f"Mẫu {i}", "description": "Sinh tự động cho benchmark", "variables": variables,
+                "commands": {vendor: lines}}
+        with open(os.path.join(base_dir, vendor, f"template_{i:04d}.yaml"), "w", encoding="utf-8") as f:
+            yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+
+def _legacy_pass(base_dir):
+    for vendor in os.listdir(base_dir):
+        path = os.path.join(base_dir, vendor)
+        for filename in sorted(os.listdir(path)):
+            with open(os.path.join(path, filename), "r", encoding="utf-8") as f:
+                yaml.safe_load(f)
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--templates", type=int, default=500)
+    parser.add_argument("--commands", type=int, default=20, help="Số dòng lệnh mỗi mẫu")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir, cache_dir = os.path.join(tmp, "templates"), os.path.join(tmp, "cache")
+        _write_templates(base_dir, args.templates, args.commands)
+        print(f"{args.templates} mẫu, {args.commands} dòng lệnh/mẫu")
+
+        elapsed, _ = _timed(lambda: _legacy_pass(base_dir))
+        print(f"legacy : {elapsed * 1000:8.1f} ms / lượt menu")
+        registry = TemplateRegistry(base_dir, cache_dir)
+        elapsed, loaded = _timed(registry.refresh)
+        print(f"cold   : {elapsed * 1000:8.1f} ms ({loaded} file, {len(registry.errors)} lỗi)")
+        elapsed, loaded = _timed(TemplateRegistry(base_dir, cache_dir).refresh)
+        print(f"restart: {elapsed * 1000:8.1f} ms ({loaded} file, bytecode cache có sẵn)")
+        elapsed, loaded = _timed(registry.refresh)
+        print(f"warm   : {elapsed * 1000:8.1f} ms ({loaded} file nạp lại)")
+        path = os.path.join(base_dir, VENDORS[0], "template_0000.yaml")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("# sửa\n")
+        elapsed, loaded = _timed(registry.refresh)
+        print(f"touch  : {elapsed * 1000:8.1f} ms ({loaded} file nạp lại)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+# core/async_ssh.py
+import os
+import re
+import asyncio
+import tempfile
+import threading
+
+import asyncssh
+
+from core.cli_batch import prompt_pattern, PromptCounter, PromptTerminatedStream, build_batch_input, split_batch_output
+
+ASYNC_CONNECT_TIMEOUT = 20   # Giây
+ASYNC_COMMAND_TIMEOUT = 120  # Giây - lệnh lớn như 'show full-configuration' cần nhiều thời gian
+ASYNC_FLEET_CONCURRENCY = 1000
+
+# Dòng cuối của buffer là prompt nếu kết thúc bằng #, > hoặc $ (vd: 'HN-Router#', 'FGT-HN (interface) # ')
+PROMPT_RE = re.compile(r"^[^\r\n]*[#>$] ?$")
+# FortiOS: VDOM bật thì phải 'config global' mới sửa được system console; chế độ output hiện tại ('more' = phân trang)
+FORTI_VDOM_RE = re.compile(r"Virtual domain configuration: (multiple|enable|split-task)")
+FORTI_OUTPUT_RE = re.compile(r"output\s+:\s+(\S+)")
+
+class AsyncSSHSession:
+    """
+    Một phiên SSH tương tác (shell + pty) chạy trên asyncio, có cùng các thao tác
+    cơ bản như netmiko: send_command, send_config_set, is_alive, disconnect.
+    """
+
+    def __init__(self, device_type, host, username, password, port=22,
+                 connect_timeout=ASYNC_CONNECT_TIMEOUT, command_timeout=ASYNC_COMMAND_TIMEOUT):
+        self.device_type = device_type
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.connect_timeout = connect_timeout
+        self.command_timeout = command_timeout
+        self.base_prompt = None
+        self._conn = None
+        self._proc = None
+        self._lock = None
+        self._vdoms = False
+        self._restore_output = False  # FortiOS: bật lại phân trang ('set output more') khi đóng phiên
+
+    @property
+    def is_cisco(self):
+        return self.device_type.startswith("cisco")
+
+    async def open(self):
+        self._lock = asyncio.Lock()
+        self._conn = await asyncssh.connect(
+            self.host, self.port, username=self.username, password=self.password,
+            known_hosts=None, connect_timeout=self.connect_timeout,
+        )
+        try:
+            self._proc = await self._conn.create_process(term_type="vt100", term_size=(511, 24))
+            prompt_line = await self._read_until_prompt()
+            self.base_prompt = re.split(r"[ (#>$]", prompt_line.splitlines()[-1].strip(), maxsplit=1)[0]
+            if self.is_cisco:
+                await self.send_command("terminal length 0")
+            else:
+                await self._forti_disable_paging()
+        except BaseException:
+            # Đã đăng nhập nhưng chưa dùng được phiên (timeout chờ prompt...): đóng kết nối, không để rò trên loop
+            await self.close()
+            raise
+        return self
+
+    async def _forti_disable_paging(self):
+        """
+        Như netmiko: FortiOS không có 'terminal length 0', output dài dừng ở '--More--' nếu system console
+        đang ở chế độ 'more'. Chuyển sang 'set output standard' và ghi nhớ để trả lại khi đóng phiên.
+        """
+        self._vdoms = bool(FORTI_VDOM_RE.search(await self.send_command("get system status | grep Virtual")))
+        mode = FORTI_OUTPUT_RE.search(await self.send_command("get system console"))
+        if mode and mode.group(1) == "standard":
+            return
+        await self._forti_set_output("standard")
+        self._restore_output = mode is not None and mode.group(1) == "more"
+
+    async def _forti_set_output(self, mode):
+        commands = ["config system console", f"set output {mode}", "end"]
+        if self._vdoms:
+            commands = ["config global"] + commands + ["end"]
+        async with self._lock:
+            for command in commands:
+                self._proc.stdin.write(command + "\n")
+                await self._read_until_prompt()
+
+    def _is_prompt(self, last_line):
+        last_line = last_line.strip("\r")
+        if not PROMPT_RE.match(last_line):
+            return False
+        return self.base_prompt is None or last_line.startswith(self.base_prompt)
+
+    async def _read_until_prompt(self, timeout=None):
+        """Đọc output cho tới khi dòng cuối là prompt. Trả về toàn bộ phần đã đọc."""
+        chunks, tail = [], ""
+
+        async def _read():
+            nonlocal tail
+            while True:
+                data = await self._proc.stdout.read(65536)
+                if not data:
+                    raise ConnectionError(f"Phiên SSH tới {self.host} đã đóng")
+                chunks.append(data)
+                tail = (tail + data)[-512:]
+                if self._is_prompt(tail.rsplit("\n", 1)[-1]):
+                    return
+
+        await asyncio.wait_for(_read(), timeout or self.command_timeout)
+        return "".join(chunks)
+
+    async def _read_until_prompts(self, count, timeout=None):
+        """Đọc cho tới khi thấy đủ `count` prompt (mỗi lệnh trong một batch kết thúc bằng một prompt)."""
+        counter = PromptCounter(prompt_pattern(self.base_prompt))
+        buffer = ""
+
+        async def _read():
+            nonlocal buffer
+            while counter.count(buffer) < count:
+                data = await self._proc.stdout.read(65536)
+                if not data:
+                    raise ConnectionError(f"Phiên SSH tới {self.host} đã đóng")
+                buffer += data
+
+        await asyncio.wait_for(_read(), timeout or self.command_timeout)
+        return buffer
+
+    @staticmethod
+    def _clean_output(raw, command):
+        """Bỏ dòng echo của lệnh và dòng prompt cuối cùng."""
+        lines = raw.replace("\r\n", "\n").replace("\r", "").split("\n")
+        if lines and command and command.strip() in lines[0]:
+            lines = lines[1:]
+        if lines:
+            lines = lines[:-1]
+        return "\n".join(lines)
+
+    async def send_command(self, command, timeout=None):
+        async with self._lock:
+            self._proc.stdin.write(command + "\n")
+            raw = await self._read_until_prompt(timeout)
+        return self._clean_output(raw, command)
+
+    async def send_batch(self, commands):
+        """Gửi nhiều lệnh trong một lần ghi, đọc một lượt tới prompt cuối cùng. Trả về {lệnh: output}."""
+        commands = list(commands)
+        if not commands:
+            return {}
+        async with self._lock:
+            self._proc.stdin.write(build_batch_input(commands))
+            raw = await self._read_until_prompts(len(commands))
+        return split_batch_output(raw, commands, prompt_pattern(self.base_prompt))
+
+    async def stream_command(self, command, sink):
+        """Chạy một lệnh, gọi sink(text) với từng đoạn output ngay khi nhận được. Trả về số ký tự đã chuyển."""
+        stream = PromptTerminatedStream(prompt_pattern(self.base_prompt), command, sink)
+
+        async def _read():
+            while True:
+                data = await self._proc.stdout.read(65536)
+                if not data:
+                    raise ConnectionError(f"Phiên SSH tới {self.host} đã đóng")
+                if stream.feed(data):
+                    return stream.size
+
+        async with self._lock:
+            self._proc.stdin.write(command + "\n")
+            return await asyncio.wait_for(_read(), self.command_timeout)
+
+    async def upload(self, content, remote_path):
+        """Chép nội dung lên thiết bị qua SCP trên cùng kết nối SSH. Trả về số byte."""
+        data = content.encode("utf-8")
+        fd, local_path = tempfile.mkstemp(suffix=".cfg")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            await asyncssh.scp(local_path, (self._conn, remote_path))
+        finally:
+            os.remove(local_path)
+        return len(data)
+
+    async def send_config_set(self, commands):
+        """Gửi một bộ lệnh cấu hình; với Cisco tự vào/thoát configure terminal."""
+        commands = list(commands)
+        if self.is_cisco:
+            commands = ["configure terminal"] + commands + ["end"]
+        outputs = []
+        async with self._lock:
+            for command in commands:
+                self._proc.stdin.write(command + "\n")
+                outputs.append(await self._read_until_prompt())
+        return "".join(outputs).replace("\r\n", "\n")
+
+    def is_alive(self):
+        return self._conn is not None and not self._conn.is_closed()
+
+    async def close(self):
+        if self._restore_output and self.is_alive():
+            self._restore_output = False
+            try:
+                await asyncio.wait_for(self._forti_set_output("more"), self.connect_timeout)
+            except (OSError, asyncssh.Error, asyncio.TimeoutError, ConnectionError):
+                pass  # Không trả lại được chế độ phân trang không được làm hỏng việc đóng phiên
+        if self._conn is not None:
+            self._conn.close()
+            await self._conn.wait_closed()
+            self._conn = None
+
+class AsyncSSHEngine:
+    """Một event loop chạy trong thread nền, dùng chung cho mọi phiên AsyncSSHSession."""
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, daemon=True).start()
+            return self._loop
+
+    def run(self, coro, timeout=None):
+        """Chạy một coroutine trên loop của engine và chờ kết quả (gọi từ code đồng bộ)."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+class SyncConnection:
+    """
+    Bọc AsyncSSHSession bằng API đồng bộ giống đối tượng kết nối của netmiko,
+    để SSHClient và các lớp vendor hoạt động không cần sửa đổi.
+    """
+
+    def __init__(self, session, engine):
+        self.session = session
+        self.engine = engine
+
+    def send_command(self, command, read_timeout=None):
+        return self.engine.run(self.session.send_command(command, read_timeout))
+
+    def upload(self, content, remote_path):
+        return self.engine.run(self.session.upload(content, remote_path))
+
+    def send_batch(self, commands):
+        return self.engine.run(self.session.send_batch(commands))
+
+    def stream_command(self, command, sink):
+        return self.engine.run(self.session.stream_command(command, sink))
+
+    def send_config_set(self, commands):
+        return self.engine.run(self.session.send_config_set(commands))
+
+    def is_alive(self):
+        return self.session.is_alive()
+
+    def disconnect(self):
+        self.engine.run(self.session.close())
+
+def open_connection(params):
+    """Mở một phiên asyncssh với tham số giống ConnectHandler của netmiko. Trả về SyncConnection."""
+    session = AsyncSSHSession(params["device_type"], params["host"], params["username"], params["password"],
+                              port=params.get("port", 22))
+    engine.run(session.open())
+    return SyncConnection(session, engine)
+
+async def _run_on_device(device, username, password, commands, semaphore):
+    async with semaphore:
+        session = AsyncSSHSession(device["device_type"], device["ip"], username, password, port=device.get("port") or 22)
+        try:
+            await session.open()
+            outputs = await session.send_batch(commands)
+            return device["name"], True, outputs
+        except (OSError, asyncssh.Error, asyncio.TimeoutError, ConnectionError) as e:
+            return device["name"], False, str(e) or type(e).__name__
+        finally:
+            await session.close()
+
+async def run_on_devices(devices, username, password, commands, concurrency=ASYNC_FLEET_CONCURRENCY):
+    """
+    Chạy cùng một danh sách lệnh trên nhiều thiết bị từ một event loop duy nhất.
+    Trả về danh sách (name, success, outputs) với outputs là {lệnh: output} hoặc thông báo lỗi.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*[_run_on_device(d, username, password, commands, semaphore) for d in devices])
+
+# Engine dùng chung cho toàn bộ ứng dụng
+engine = AsyncSSHEngine()
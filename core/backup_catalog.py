@@ -0,0 +1,132 @@
+# core/backup_catalog.py
+import os
+import sqlite3
+from contextlib import closing
+
+CATALOG_FILENAME = "catalog.db"
+
+class BackupCatalog:
+    """
+    Chỉ mục SQLite của kho backup (data/backups/catalog.db), cập nhật ngay khi backup.
+    Tra cứu "N bản mới nhất của thiết bị X" và "mọi bản backup trong ngày D" qua chỉ mục B-tree,
+    không phải duyệt cây thư mục.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS backups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            device TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            day TEXT NOT NULL,
+            size INTEGER,
+            hash TEXT,
+            vendor TEXT,
+            path TEXT,
+            marker TEXT,
+            kind TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_backups_device_ts ON backups(device, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_backups_day ON backups(day);
+        CREATE INDEX IF NOT EXISTS idx_backups_hash ON backups(hash);
+    """
+    COLUMNS = "device, timestamp, size, hash, vendor, path, marker, kind"
+    INSERT = ("INSERT INTO backups (device, timestamp, day, size, hash, vendor, path, marker, kind) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+    def __init__(self, path):
+        self.path = path
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        return conn
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def ensure(self):
+        if self._ready:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(self.SCHEMA)
+            # Catalog tạo từ phiên bản trước chưa có cột marker / kind
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(backups)")}
+            for column in ("marker", "kind"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE backups ADD COLUMN {column} TEXT")
+        self._ready = True
+
+    @staticmethod
+    def _to_row(entry):
+        return (entry["device"], entry["timestamp"], entry["timestamp"][:10], entry.get("size"),
+                entry.get("hash"), entry.get("vendor"), entry.get("path"), entry.get("marker"), entry.get("kind"))
+
+    @staticmethod
+    def _from_row(row):
+        device, timestamp, size, digest, vendor, path, marker, kind = row
+        entry = {"device": device, "timestamp": timestamp, "hash": digest, "size": size, "vendor": vendor}
+        if path:
+            entry["path"] = path
+        if marker:
+            entry["marker"] = marker
+        if kind:
+            entry["kind"] = kind
+        return entry
+
+    def _query(self, sql, params=()):
+        self.ensure()
+        with closing(self._connect()) as conn:
+            return [self._from_row(row) for row in conn.execute(sql, params).fetchall()]
+
+    def add(self, entry):
+        """Thêm một bản backup (gọi ngay sau khi ghi manifest)."""
+        self.ensure()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(self.INSERT, self._to_row(entry))
+
+    def latest(self, device, limit=None):
+        """Các bản backup mới nhất của một thiết bị (limit=None: tất cả), mới nhất trước."""
+        return self._query(f"SELECT {self.COLUMNS} FROM backups WHERE device = ? "
+                           "ORDER BY timestamp DESC, id DESC LIMIT ?", (device, -1 if limit is None else limit))
+
+    def latest_of_kind(self, device, kind, limit=None):
+        """Như latest() nhưng chỉ các bản cùng loại `kind` (None: cấu hình đầy đủ hoặc file .cfg kiểu cũ)."""
+        return self._query(f"SELECT {self.COLUMNS} FROM backups WHERE device = ? AND kind IS ? "
+                           "ORDER BY timestamp DESC, id DESC LIMIT ?", (device, kind, -1 if limit is None else limit))
+
+    def on_date(self, day):
+        """Mọi bản backup trong ngày `day` (YYYY-mm-dd), theo thứ tự thời gian."""
+        return self._query(f"SELECT {self.COLUMNS} FROM backups WHERE day = ? ORDER BY timestamp, id", (day,))
+
+    def devices(self):
+        self.ensure()
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT device FROM backups ORDER BY device")]
+
+    def referenced_hashes(self, kind=None):
+        """Các hash được tham chiếu trực tiếp; kind != None: chỉ của các bản backup loại đó."""
+        self.ensure()
+        sql, params = "SELECT DISTINCT hash FROM backups WHERE hash IS NOT NULL", ()
+        if kind:
+            sql, params = sql + " AND kind = ?", (kind,)
+        with closing(self._connect()) as conn:
+            return {row[0] for row in conn.execute(sql, params)}
+
+    def remove_day(self, day, day_dir):
+        """Xóa các bản ghi của một thư mục ngày đã bị retention xóa."""
+        self.ensure()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM backups WHERE day = ? AND (path IS NULL OR path LIKE ?)",
+                         (day, os.path.join(day_dir, "%")))
+
+    def replace_all(self, entries):
+        """Ghi lại toàn bộ chỉ mục trong một transaction (dùng khi rebuild). Trả về số bản ghi."""
+        self.ensure()
+        rows = [self._to_row(e) for e in entries]
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM backups")
+            conn.executemany(self.INSERT, rows)
+        return len(rows)
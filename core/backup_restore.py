@@ -1,90 +1,314 @@
 # core/backup_restore.py
-import os
-import threading
-from datetime import datetime
-from zoneinfo import ZoneInfo
+import argparse
+import yaml
 
 from core.ssh_client import SSHClient
-from core.devices import load_devices
-from core.utils import load_credentials, clear_screen
+from core.devices import load_devices, get_inventory
+from core.utils import load_credentials, load_backup_retention, load_restore_mode, clear_screen
+from core.backup_store import backup_store, BASE_BACKUP_DIR, SECTIONS_KIND
+from core.config_diff import diff_fleet, print_fleet_summary
 from core.ui import console, print_info, print_success, print_error, print_warning
 from core.vendors.vendor_factory import get_vendor_class
+from core.vendors.vendor_base import ConfigTransferError
+from core.job_scheduler import scheduler, as_completed, PRIORITY_BACKGROUND, PRIORITY_NORMAL, PRIORITY_INTERACTIVE, DONE, SKIPPED
 from rich.prompt import Prompt
 
-BASE_BACKUP_DIR = "data/backups"
-
 # --- CHỨC NĂNG BACKUP ---
-def backup_device_config(device, username, password, backup_dir):
+BACKUP_FETCHED = "FETCHED"      # Đã tải cấu hình đầy đủ từ thiết bị
+BACKUP_UNCHANGED = "UNCHANGED"  # Dấu hiệu thay đổi không đổi: chỉ ghi lại bản backup trước vào manifest
+
+def backup_device_config(device, username, password, store=backup_store, force=False, full=False):
+    """
+    Backup một thiết bị vào kho backup. Mặc định hỏi trước dấu hiệu thay đổi cấu hình (rẻ) và chỉ
+    tải toàn bộ cấu hình nếu nó khác lần backup trước; force=True luôn tải lại.
+    Hãng lưu được theo section (FortiGate, FORTI_BACKUP_MODE=sections) được lưu từng section riêng;
+    full=True lấy cấu hình đầy đủ một khối cho lượt lưu trữ (luôn tải lại).
+    Trả về BACKUP_FETCHED / BACKUP_UNCHANGED nếu thành công, False nếu thất bại.
+    """
     print_info(f"🔄 Đang backup thiết bị {device['name']} ({device['ip']})...")
     ssh = SSHClient(device, username, password)
-    if not ssh.connect(): print_error(f"❌ Không thể kết nối đến {device['name']}."); return
+    if not ssh.connect(): print_error(f"❌ Không thể kết nối đến {device['name']}."); return False
     VendorClass = get_vendor_class(device["device_type"])
-    if not VendorClass: print_error(f"❌ Không tìm thấy driver cho {device['device_type']}."); ssh.disconnect(); return
-    vendor = VendorClass(ssh); config = vendor.get_running_config(); ssh.disconnect()
-    if config:
-        hcm_tz = ZoneInfo("Asia/Ho_Chi_Minh"); timestamp = datetime.now(tz=hcm_tz).strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"{device['name']}_{timestamp}.cfg"; filepath = os.path.join(backup_dir, filename)
-        with open(filepath, "w", encoding='utf-8') as f: f.write(config)
-        print_success(f"✅ Backup thành công {device['name']}!")
-    else: print_error(f"❌ Backup thất bại cho {device['name']}.")
-
-def backup_all_devices():
-    print_info("🚀 Bắt đầu backup toàn bộ hệ thống..."); hcm_tz = ZoneInfo("Asia/Ho_Chi_Minh"); today_str = datetime.now(tz=hcm_tz).strftime("%Y-%m-%d"); daily_backup_dir = os.path.join(BASE_BACKUP_DIR, today_str); os.makedirs(daily_backup_dir, exist_ok=True); print_info(f"📁 Lưu tại: {daily_backup_dir}"); devices = load_devices(); username, password = load_credentials()
+    if not VendorClass: print_error(f"❌ Không tìm thấy driver cho {device['device_type']}."); ssh.disconnect(); return False
+    try:
+        vendor = VendorClass(ssh); marker = vendor.get_change_marker()
+        if full: vendor.use_full_config()
+        last = store.latest(device['name']) if marker and not (force or full) else None
+        if last and last.get("hash") and last.get("marker") == marker:
+            store.record(device['name'], last["hash"], last["size"], vendor=device['device_type'], marker=marker, kind=last.get("kind"))
+            print_success(f"✅ {device['name']}: cấu hình không đổi kể từ {last['timestamp']}, bỏ qua tải lại.")
+            return BACKUP_UNCHANGED
+        sections = vendor.get_config_sections()
+        if sections is not None:
+            # Section không đổi trỏ lại object cũ trong kho, chỉ section mới được nén + ghi
+            entry, new_sections = store.put_sections(device['name'], sections, vendor=device['device_type'], marker=marker) if sections else (None, [])
+            is_new = bool(new_sections)
+        else:
+            # Ghi thẳng output vào kho (nén + băm theo từng đoạn), không giữ cả cấu hình trong bộ nhớ
+            entry, is_new = store.capture(device['name'], vendor.stream_running_config, vendor=device['device_type'], marker=marker)
+    except Exception:
+        ssh.disconnect(discard=True)  # Phiên dừng giữa chừng: không trả về pool
+        raise
+    finally:
+        ssh.disconnect()
+    if entry:
+        print_success(f"✅ Backup thành công {device['name']}!" + ("" if is_new else " (cấu hình không đổi, dùng lại bản đã lưu)"))
+        return BACKUP_FETCHED
+    print_error(f"❌ Backup thất bại cho {device['name']}.")
+    return False
+
+def backup_all_devices(force=False, full=False):
+    """
+    Backup toàn bộ thiết bị; force=True tải lại cấu hình của mọi thiết bị kể cả khi không thay đổi,
+    full=True là lượt lưu trữ: tải lại cấu hình đầy đủ (FortiGate: 'show full-configuration').
+    """
+    print_info("🚀 Bắt đầu backup toàn bộ hệ thống..." + (" (lưu trữ cấu hình đầy đủ)" if full else " (bắt buộc tải lại toàn bộ)" if force else "")); print_info(f"📁 Lưu tại: {backup_store.base_dir}"); devices = load_devices(); username, password = load_credentials()
     if not devices: print_error("Không có thiết bị."); return
     if not username or not password: print_error("Không tìm thấy credentials."); return
-    threads = [];
-    for name, info in devices.items(): device_info = {'name': name, **info}; thread = threading.Thread(target=backup_device_config, args=(device_info, username, password, daily_backup_dir)); threads.append(thread); thread.start()
-    for thread in threads: thread.join()
-    print_success("\n🎉 Backup toàn bộ hệ thống đã hoàn tất!")
+    # Chạy qua scheduler dùng chung: giới hạn số phiên đồng thời, ưu tiên thấp hơn thao tác tương tác
+    device_list = [{'name': name, **info} for name, info in devices.items()]
+    jobs = scheduler.map_devices(backup_device_config, device_list, username, password, force=force, full=full, priority=PRIORITY_BACKGROUND)
+    succeeded, unchanged, skipped = [], 0, []
+    for job in as_completed(jobs):
+        if job.state == DONE and job.result:
+            succeeded.append(job.name)
+            if job.result == BACKUP_UNCHANGED: unchanged += 1
+        elif job.state == SKIPPED: skipped.append(job); print_warning(f"⏭️ Bỏ qua {job.name}: {job.error}")
+        elif job.error: print_error(f"❌ Lỗi khi backup {job.name}: {job.error}")
+    print_success(f"\n🎉 Backup toàn bộ hệ thống đã hoàn tất! ({len(succeeded)}/{len(jobs)} thiết bị thành công, "
+                  f"{unchanged} không đổi nên không tải lại, {len(skipped)} bỏ qua)")
+    # So sánh với bản backup trước của từng thiết bị, lưu diff cho các thiết bị thực sự thay đổi
+    if succeeded: print_fleet_summary(diff_fleet(succeeded))
+    # Áp dụng chính sách giữ backup và dọn các bản nén không còn được tham chiếu
+    daily, weekly, monthly = load_backup_retention()
+    removed_days, removed_objects = backup_store.apply_retention(daily, weekly, monthly)
+    if removed_days or removed_objects:
+        print_info(f"🧹 Retention: đã xóa {removed_days} ngày backup cũ và {removed_objects} bản cấu hình không còn dùng.")
+
+def backup_section(device, username, password, section, store=backup_store):
+    """
+    Tải lại riêng một section (vd 'firewall policy') và ghi thành bản backup mới của thiết bị:
+    các section khác lấy từ bản backup theo section mới nhất. Trả về entry, None nếu thất bại.
+    """
+    last = store.latest(device['name'])
+    sections = [(s["name"], s) for s in store.sections_of(last)] if last else []
+    if not any(name == section for name, _ in sections):
+        print_error(f"❌ {device['name']}: bản backup mới nhất không có section '{section}' (cần một lượt backup theo section trước)."); return None
+    ssh = SSHClient(device, username, password)
+    if not ssh.connect(): print_error(f"❌ Không thể kết nối đến {device['name']}."); return None
+    try:
+        vendor = get_vendor_class(device["device_type"])(ssh)
+        text = vendor.get_section(section)
+    finally:
+        ssh.disconnect()
+    if not text.strip(): print_error(f"❌ {device['name']}: thiết bị không trả về section '{section}'."); return None
+    merged = []
+    for name, info in sections:
+        if name == section:
+            old = store.read_object(info["hash"])
+            # Giữ nguyên dòng trống cuối như trong bản gốc để phép nối section vẫn ra cấu hình đầy đủ
+            text = text.rstrip("\n") + old[len(old.rstrip("\n")):]
+            merged.append((name, text))
+        else:
+            merged.append((name, store.read_object(info["hash"])))
+    # Không ghi marker: các section khác không được tải lại nên lượt backup sau phải kiểm tra đầy đủ
+    entry, new_sections = store.put_sections(device['name'], merged, vendor=device['device_type'])
+    print_success(f"✅ {device['name']}: đã tải lại section '{section}'" + ("" if new_sections else " (không đổi)"))
+    return entry
 
 
 # --- CÁC HÀM RESTORE ---
-def _find_backup_files(device_name):
-    backup_files = []
-    for root, _, files in os.walk(BASE_BACKUP_DIR):
-        for file in files:
-            if file.startswith(f"{device_name}_") and file.endswith(".cfg"):
-                backup_files.append(os.path.join(root, file))
-    return sorted(backup_files, reverse=True)
+# Chỉ đẩy phần chênh lệch giữa cấu hình đang chạy và bản backup (core/config_delta.py),
+# không gửi lại toàn bộ file backup. Mỗi lần restore gồm 2 bước chạy qua scheduler:
+# lập kế hoạch (đọc running-config, tính delta) -> xác nhận -> đẩy delta.
+def _find_backups(device_name):
+    """Các phiên bản backup của thiết bị trong kho, mới nhất trước."""
+    return backup_store.versions(device_name)
 
-def _restore_config_to_device(device, username, password):
-    if 'fortinet' in device.get('device_type', '').lower():
-        print_warning(f"Tính năng Restore cho thiết bị Fortinet ({device['name']}) hiện chưa được hỗ trợ.")
-        print_info("Vui lòng thực hiện thao tác này thủ công trên thiết bị.")
+def _resolve_version(device_name, spec=None):
+    """
+    Chọn phiên bản backup theo `spec`: None/'latest' (mới nhất), số thứ tự (1 = mới nhất)
+    hoặc timestamp 'YYYY-mm-dd_HH-MM-SS'. Trả về entry hoặc None.
+    """
+    versions = _find_backups(device_name)
+    if not versions: return None
+    if spec in (None, "", "latest"): return versions[0]
+    if isinstance(spec, int) or str(spec).isdigit():
+        index = int(spec)
+        return versions[index - 1] if 1 <= index <= len(versions) else None
+    return next((entry for entry in versions if entry["timestamp"] == str(spec)), None)
+
+def _plan_restore(device, username, password, entry, section=None):
+    """
+    Chạy trong worker của scheduler: đọc running-config, tính bộ lệnh tối thiểu để về bản backup `entry`
+    (chỉ section `section` nếu có, với bản backup theo section).
+    Trả về plan {device, entry, section, commands, marker}; marker dùng để phát hiện cấu hình bị sửa trước khi đẩy.
+    """
+    ssh = SSHClient(device, username, password)
+    if not ssh.connect(): raise ConnectionError("Không thể kết nối")
+    try:
+        VendorClass = get_vendor_class(device["device_type"])
+        if not VendorClass: raise NotImplementedError(f"Không tìm thấy driver cho {device['device_type']}")
+        vendor = VendorClass(ssh); marker = vendor.get_change_marker()
+        if section:
+            target = backup_store.read_section(entry, section)
+            if target is None: raise ValueError(f"Bản backup không có section '{section}'")
+            commands = vendor.restore_delta(vendor.get_section(section), target)
+        else:
+            # So sánh cùng một dạng cấu hình với bản backup (FortiGate: 'show' hay 'show full-configuration')
+            vendor.use_full_config(entry.get("kind") != SECTIONS_KIND)
+            commands = vendor.restore_delta(vendor.get_running_config(), backup_store.read(entry))
+    finally:
+        ssh.disconnect()
+    return {"device": device, "entry": entry, "section": section, "commands": commands, "marker": marker}
+
+def _push_restore(device, username, password, config_commands, entry=None, marker=None):
+    """
+    Đẩy cấu hình restore lên thiết bị (chạy trong worker của scheduler). Trả về output của thiết bị.
+    Chế độ 'replace' (.env RESTORE_MODE): thay nguyên khối bằng bản backup `entry` nếu hãng hỗ trợ;
+    không hỗ trợ hoặc không chép được file thì đẩy từng lệnh `config_commands` như cũ.
+    """
+    ssh = SSHClient(device, username, password)
+    if not ssh.connect(): raise ConnectionError("Không thể kết nối")
+    try:
+        VendorClass = get_vendor_class(device["device_type"])
+        if not VendorClass: raise NotImplementedError(f"Không tìm thấy driver cho {device['device_type']}")
+        vendor = VendorClass(ssh)
+        if marker and vendor.get_change_marker() != marker:
+            raise RuntimeError("Cấu hình đã thay đổi sau khi lập kế hoạch restore, hãy chạy lại")
+        if entry and load_restore_mode() == "replace":
+            try:
+                return vendor.replace_config(backup_store.read(entry))
+            except NotImplementedError:
+                pass
+            except ConfigTransferError as e:
+                print_warning(f"⚠️ {device['name']}: {e} - chuyển sang đẩy từng lệnh.")
+        return vendor.restore_config(config_commands)
+    except Exception:
+        # Phiên có thể đang kẹt giữa chừng (vd ở chế độ cấu hình): đóng hẳn thay vì trả về pool
+        ssh.disconnect(discard=True)
+        raise
+    finally:
+        ssh.disconnect()
+
+def _print_plan(plan, show_commands=True):
+    label = f"{plan['entry']['device']}_{plan['entry']['timestamp']}" + (f" [{plan['section']}]" if plan.get("section") else "")
+    if not plan["commands"]:
+        print_success(f"✅ {plan['device']['name']}: cấu hình đang chạy đã khớp bản {label}, không cần đẩy lệnh.")
         return
+    print_info(f"📋 {plan['device']['name']} → {label}: {len(plan['commands'])} lệnh")
+    if show_commands:
+        console.print("\n".join(plan["commands"]), markup=False, highlight=False)
+
+def run_restore(targets, username, password, dry_run=False, assume_yes=False, priority=PRIORITY_NORMAL, section=None):
+    """
+    Restore song song nhiều thiết bị: targets là danh sách (device, entry); section: chỉ restore một section.
+    Lập kế hoạch cho mọi thiết bị, in báo cáo delta, hỏi xác nhận một lần (bỏ qua với assume_yes)
+    rồi đẩy delta. dry_run=True chỉ in báo cáo. Trả về số thiết bị restore thành công.
+    """
+    print_info(f"🔍 Đang so sánh cấu hình đang chạy với bản backup của {len(targets)} thiết bị...")
+    jobs = [scheduler.submit(_plan_restore, device, username, password, entry, section=section, device=device, priority=priority)
+            for device, entry in targets]
+    plans = []
+    for job in as_completed(jobs):
+        if job.state == DONE: plans.append(job.result)
+        elif job.state == SKIPPED: print_warning(f"⏭️ Bỏ qua {job.name}: {job.error}")
+        else: print_error(f"❌ {job.name}: không lập được kế hoạch restore - {job.error}")
+    plans.sort(key=lambda plan: plan["device"]["name"])
+    console.rule("[bold yellow]Báo cáo restore" + (" (dry-run)" if dry_run else "") + "[/bold yellow]")
+    for plan in plans: _print_plan(plan, show_commands=dry_run or len(plans) == 1)
+    pending = [plan for plan in plans if plan["commands"]]
+    print_info(f"Tổng: {len(pending)} thiết bị cần đẩy {sum(len(p['commands']) for p in pending)} lệnh, "
+               f"{len(plans) - len(pending)} đã khớp, {len(targets) - len(plans)} lỗi/bỏ qua.")
+    if dry_run or not pending: return 0
+
+    if not assume_yes:
+        print_warning("!!! CẢNH BÁO NGUY HIỂM !!!"); print_warning(f"Bạn sắp thay đổi cấu hình của [bold red]{len(pending)}[/bold red] thiết bị.")
+        if Prompt.ask("Để xác nhận, vui lòng nhập 'YES' (chữ hoa)") != "YES": print_info("Đã hủy restore."); return 0
+
+    print_info(f"🔄 Đang đẩy cấu hình lên {len(pending)} thiết bị...")
+    jobs = [scheduler.submit(_push_restore, plan["device"], username, password, plan["commands"],
+                             entry=None if plan["section"] else plan["entry"],
+                             marker=plan["marker"], device=plan["device"], priority=priority) for plan in pending]
+    succeeded = 0
+    for job in as_completed(jobs):
+        if job.state == DONE: succeeded += 1; print_success(f"✅ {job.name}: restore thành công")
+        elif job.state == SKIPPED: print_warning(f"⏭️ Bỏ qua {job.name}: {job.error}")
+        else: print_error(f"❌ {job.name}: restore thất bại - {job.error}")
+    print_info(f"Hoàn tất: {succeeded}/{len(pending)} thiết bị restore thành công.")
+    return succeeded
+
+def load_restore_job(path):
+    """
+    Đọc file job restore (YAML). Trả về (targets, errors, section) với targets là danh sách (device, entry).
+    Định dạng:
+        version: latest              # phiên bản mặc định: latest | số thứ tự (1 = mới nhất) | timestamp
+        section: firewall policy     # (tùy chọn) chỉ restore một section của bản backup theo section
+        devices:
+          - HN-Router                # tên thiết bị, dùng phiên bản mặc định
+          - name: HN-Firewall
+            version: 2025-10-13_10-15-02
+          - branch: HCM              # mọi thiết bị của chi nhánh
+            version: 2
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        job = yaml.safe_load(f) or {}
+    inventory = get_inventory(); default_version = job.get("version")
+    targets, errors, seen = [], [], set()
+    for item in job.get("devices") or []:
+        if not isinstance(item, dict): item = {"name": item}
+        version = item.get("version", default_version)
+        if item.get("branch"): records = inventory.by_branch(str(item["branch"]).upper())
+        else: records = [inventory.get(str(item.get("name")))]
+        if not records or records[0] is None:
+            errors.append(f"Không tìm thấy thiết bị/chi nhánh: {item.get('name') or item.get('branch')}"); continue
+        for record in records:
+            if record.name in seen: continue
+            seen.add(record.name)
+            entry = _resolve_version(record.name, version)
+            if entry: targets.append(({'name': record.name, **record.info()}, entry))
+            else: errors.append(f"{record.name}: không có phiên bản backup '{version or 'latest'}'")
+    return targets, errors, job.get("section")
+
+def run_restore_job(path, dry_run=False, assume_yes=False):
+    """Restore hàng loạt theo file job (dùng cho menu và dòng lệnh)."""
+    username, password = load_credentials()
+    if not username or not password: print_error("Không tìm thấy credentials."); return
+    try:
+        targets, errors, section = load_restore_job(path)
+    except (OSError, yaml.YAMLError) as e:
+        print_error(f"Không đọc được file job {path}: {e}"); return
+    for error in errors: print_warning(f"⚠️ {error}")
+    if not targets: print_error("Không có thiết bị nào để restore."); return
+    run_restore(targets, username, password, dry_run=dry_run, assume_yes=assume_yes, section=section)
 
+def _restore_config_to_device(device, username, password):
     console.rule(f"[bold yellow]Khôi phục cho: {device['name']}[/bold yellow]")
-    backup_files = _find_backup_files(device['name'])
-    if not backup_files:
-        print_warning(f"Không tìm thấy file backup nào cho {device['name']}."); return
+    backups = _find_backups(device['name'])
+    if not backups:
+        print_warning(f"Không tìm thấy bản backup nào cho {device['name']}."); return
     print_info("Các phiên bản backup có sẵn:")
-    for i, f in enumerate(backup_files, 1): print(f"  [{i}] {os.path.basename(f)}")
+    for i, entry in enumerate(backups, 1): print(f"  [{i}] {entry['device']}_{entry['timestamp']} ({entry['size']} bytes)")
     try:
         choice = int(input("\nChọn phiên bản để restore (nhập 0 để hủy): ").strip())
-        if choice == 0 or choice > len(backup_files): print_info("Đã hủy."); return
-        chosen_file = backup_files[choice - 1]
-        with open(chosen_file, "r", encoding='utf-8') as f: config_commands = f.read().splitlines()
+        if choice == 0 or choice > len(backups): print_info("Đã hủy."); return
+        chosen = backups[choice - 1]
     except (ValueError, IndexError):
         print_error("Lựa chọn không hợp lệ."); return
+    # Người dùng đang chờ: chạy qua scheduler với độ ưu tiên cao nhất, vẫn tôn trọng giới hạn đồng thời
+    run_restore([(device, chosen)], username, password, priority=PRIORITY_INTERACTIVE)
 
-    print("\n"); print_warning("!!! CẢNH BÁO NGUY HIỂM !!!"); print_warning(f"Bạn sắp ghi đè cấu hình của [bold red]{device['name']}[/bold red] bằng file [cyan]{os.path.basename(chosen_file)}[/cyan]."); print_warning("Hành động này không thể hoàn tác.")
-    confirmation = Prompt.ask("Để xác nhận, vui lòng nhập 'YES' (chữ hoa)")
-    if confirmation != "YES": print_info("Đã hủy restore."); return
-
-    print_info(f"🔄 Đang tiến hành restore cho {device['name']}...")
-    ssh = SSHClient(device, username, password)
-    conn = ssh.connect()
-    if not conn: print_error(f"Không thể kết nối đến {device['name']}."); return
-    try:
-        VendorClass = get_vendor_class(device["device_type"])
-        if not VendorClass:
-            print_error(f"Không tìm thấy driver cho {device['device_type']}."); ssh.disconnect(); return
-        vendor = VendorClass(ssh); output = vendor.restore_config(config_commands)
-        print_success("✅ Restore thành công!"); print_info("Output từ thiết bị:"); console.print(output)
-    except Exception as e:
-        print_error(f"❌ Lỗi khi restore: {e}")
-    finally:
-        ssh.disconnect()
+def _restore_devices(device_names):
+    """Restore song song một nhóm thiết bị về cùng một phiên bản (mặc định: bản mới nhất của từng thiết bị)."""
+    devices = load_devices(); username, password = load_credentials()
+    version = input("Phiên bản cần restore (Enter = mới nhất, số thứ tự hoặc timestamp YYYY-mm-dd_HH-MM-SS): ").strip() or None
+    targets = []
+    for name in device_names:
+        entry = _resolve_version(name, version)
+        if entry: targets.append(({'name': name, **devices[name]}, entry))
+        else: print_warning(f"⚠️ {name}: không có phiên bản backup '{version or 'latest'}'")
+    if not targets: print_error("Không có thiết bị nào để restore."); return
+    run_restore(targets, username, password, dry_run=input("Chỉ xem báo cáo (dry-run)? (y/n): ").strip().lower() == 'y')
 
 # --- CÁC HÀM PUBLIC MÀ MENU SẼ GỌI ---
 def restore_single_device():
@@ -107,20 +331,45 @@ def restore_by_branch():
     if not branch_name: return
     devices = load_devices(); username, password = load_credentials()
     if not (devices and username and password): print_error("Thiếu thông tin thiết bị hoặc credentials."); return
-    branch_devices = {name: info for name, info in devices.items() if name.upper().startswith(branch_name)}
+    branch_devices = [record.name for record in get_inventory().by_branch(branch_name)]
     if not branch_devices: print_warning(f"Không tìm thấy thiết bị nào cho chi nhánh {branch_name}."); return
-    print_info(f"Sẽ thực hiện restore cho các thiết bị: {', '.join(branch_devices.keys())}"); input("Nhấn Enter để bắt đầu...")
-    for name, info in branch_devices.items():
-        device_info = {'name': name, **info}
-        _restore_config_to_device(device_info, username, password)
-        input("\nNhấn Enter để tiếp tục với thiết bị tiếp theo...")
+    print_info(f"Sẽ thực hiện restore cho các thiết bị: {', '.join(branch_devices)}")
+    _restore_devices(branch_devices)
 
 def restore_all():
     clear_screen()
     devices = load_devices(); username, password = load_credentials()
     if not (devices and username and password): print_error("Thiếu thông tin thiết bị hoặc credentials."); return
-    print_warning("Bạn sắp thực hiện restore cho TOÀN BỘ hệ thống."); print_info(f"Các thiết bị: {', '.join(devices.keys())}"); input("Nhấn Enter để bắt đầu...")
-    for name, info in devices.items():
-        device_info = {'name': name, **info}
-        _restore_config_to_device(device_info, username, password)
-        input("\nNhấn Enter để tiếp tục với thiết bị tiếp theo...")
+    print_warning("Bạn sắp thực hiện restore cho TOÀN BỘ hệ thống."); print_info(f"Các thiết bị: {', '.join(devices.keys())}")
+    _restore_devices(list(devices))
+
+def restore_from_job_file():
+    clear_screen()
+    path = input("Đường dẫn file job restore (YAML): ").strip()
+    if not path: return
+    run_restore_job(path, dry_run=input("Chỉ xem báo cáo (dry-run)? (y/n): ").strip().lower() == 'y')
+
+def main():
+    parser = argparse.ArgumentParser(description="Backup cấu hình toàn bộ thiết bị (dùng cho cron) hoặc restore hàng loạt theo file job.")
+    parser.add_argument("--force", action="store_true",
+                        help="Tải lại cấu hình của mọi thiết bị, bỏ qua kiểm tra dấu hiệu thay đổi")
+    parser.add_argument("--full", action="store_true",
+                        help="Lượt lưu trữ: tải lại cấu hình đầy đủ của mọi thiết bị (FortiGate: 'show full-configuration')")
+    parser.add_argument("--refresh-section", metavar="SECTION", help="Chỉ tải lại một section của thiết bị --device (vd 'firewall policy')")
+    parser.add_argument("--device", metavar="NAME", help="Thiết bị cho --refresh-section")
+    parser.add_argument("--restore-job", metavar="FILE", help="Restore theo file job YAML thay vì backup")
+    parser.add_argument("--dry-run", action="store_true", help="Chỉ in báo cáo delta, không đẩy cấu hình (với --restore-job)")
+    parser.add_argument("--yes", action="store_true", help="Không hỏi xác nhận trước khi đẩy (với --restore-job)")
+    args = parser.parse_args()
+    if args.restore_job:
+        run_restore_job(args.restore_job, dry_run=args.dry_run, assume_yes=args.yes)
+    elif args.refresh_section:
+        record = get_inventory().get(args.device or "")
+        if record is None: parser.error("--refresh-section cần --device là tên thiết bị có trong danh sách")
+        username, password = load_credentials()
+        backup_section({'name': record.name, **record.info()}, username, password, args.refresh_section)
+    else:
+        backup_all_devices(force=args.force, full=args.full)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+# core/backup_store.py
+import os
+import re
+import gzip
+import json
+import shutil
+import sqlite3
+import hashlib
+import argparse
+import tempfile
+import threading
+from datetime import datetime, date
+from zoneinfo import ZoneInfo
+
+from core.ui import print_info, print_success, print_error
+from core.backup_catalog import BackupCatalog, CATALOG_FILENAME
+
+BASE_BACKUP_DIR = "data/backups"
+OBJECTS_DIRNAME = "objects"
+MANIFEST_FILENAME = "manifest.jsonl"
+TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"
+# Bản backup chia theo section: hash của entry trỏ tới object chỉ mục {"sections": [{name, hash, size}]},
+# mỗi section là một object riêng nên section không đổi được dùng lại giữa các lần backup
+SECTIONS_KIND = "sections"
+BACKUP_TZ = ZoneInfo("Asia/Ho_Chi_Minh")
+
+DATE_DIR_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+# File backup kiểu cũ: <tên thiết bị>_<YYYY-mm-dd_HH-MM-SS>.cfg
+LEGACY_FILE_RE = re.compile(r"^(?P<device>.+)_(?P<timestamp>\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.cfg$")
+
+class ObjectWriter:
+    """
+    Ghi nội dung một bản backup theo từng đoạn: nén gzip vào file tạm và tính SHA-256
+    trên nội dung gốc cùng lúc. commit() đổi tên file tạm thành object (hoặc bỏ đi nếu trùng).
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.size = 0
+        self._hash = hashlib.sha256()
+        os.makedirs(store.objects_dir, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=store.objects_dir, suffix=".tmp")
+        self._raw = os.fdopen(fd, "wb")
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="wb", mtime=0)
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        self._hash.update(data)
+        self._gzip.write(data)
+        self.size += len(data)
+
+    def commit(self):
+        """Kết thúc ghi. Trả về (hash, is_new): is_new=False nếu nội dung đã có trong kho."""
+        self._gzip.close(); self._raw.close()
+        digest = self._hash.hexdigest()
+        path = self.store.object_path(digest)
+        if os.path.exists(path):
+            os.remove(self._tmp_path)
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self._tmp_path, path)
+        return digest, True
+
+    def abort(self):
+        self._gzip.close(); self._raw.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+class BackupStore:
+    """
+    Kho backup theo nội dung (content-addressed):
+    - objects/<2 ký tự đầu>/<sha256>.gz: mỗi nội dung cấu hình chỉ lưu một bản nén.
+    - <YYYY-mm-dd>/manifest.jsonl: mỗi lần backup ghi một dòng {device, timestamp, hash, size, vendor}.
+    - Bản backup kind='sections' (FortiOS): hash là object chỉ mục liệt kê object của từng section.
+    - catalog.db: chỉ mục SQLite của mọi manifest, dùng cho các truy vấn (versions, backups_on, gc).
+    File .cfg kiểu cũ trong các thư mục ngày vẫn được liệt kê và restore được.
+    """
+
+    def __init__(self, base_dir=BASE_BACKUP_DIR):
+        self.base_dir = base_dir
+        self.objects_dir = os.path.join(base_dir, OBJECTS_DIRNAME)
+        self.catalog = BackupCatalog(os.path.join(base_dir, CATALOG_FILENAME))
+        self._catalog_ready = False
+        self._lock = threading.Lock()
+
+    def _catalog(self):
+        """Catalog sẵn sàng để dùng; lần đầu gặp kho cũ chưa có catalog.db sẽ tự rebuild."""
+        if not self._catalog_ready:
+            with self._lock:
+                if not self._catalog_ready:
+                    if not self.catalog.exists() and (self.dates() or self._legacy_entries(self.base_dir)):
+                        self.rebuild_catalog()
+                    self.catalog.ensure()
+                    self._catalog_ready = True
+        return self.catalog
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest + ".gz")
+
+    def manifest_path(self, day):
+        return os.path.join(self.base_dir, day, MANIFEST_FILENAME)
+
+    # --- GHI ---
+    def open_writer(self):
+        return ObjectWriter(self)
+
+    def record(self, device_name, digest, size, vendor=None, timestamp=None, marker=None, kind=None):
+        """
+        Ghi một dòng manifest cho bản backup đã có object. `marker` là dấu hiệu thay đổi cấu hình
+        lấy từ thiết bị (xem VendorBase.get_change_marker). Trả về entry (dict).
+        """
+        timestamp = timestamp or datetime.now(tz=BACKUP_TZ)
+        entry = {"device": device_name, "timestamp": timestamp.strftime(TIMESTAMP_FORMAT),
+                 "hash": digest, "size": size, "vendor": vendor}
+        if marker:
+            entry["marker"] = marker
+        if kind:
+            entry["kind"] = kind
+        path = self.manifest_path(timestamp.strftime("%Y-%m-%d"))
+        catalog = self._catalog()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock, open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        catalog.add(entry)
+        return entry
+
+    def put_object(self, text):
+        """Lưu một nội dung thành object. Trả về (hash, size, is_new)."""
+        writer = self.open_writer()
+        try:
+            writer.write(text)
+        except BaseException:
+            writer.abort()
+            raise
+        digest, is_new = writer.commit()
+        return digest, writer.size, is_new
+
+    def put(self, device_name, config, vendor=None, timestamp=None, marker=None):
+        """Lưu một bản backup. Trả về (entry, is_new) với is_new=False nếu nội dung trùng bản đã có."""
+        digest, size, is_new = self.put_object(config)
+        return self.record(device_name, digest, size, vendor, timestamp, marker), is_new
+
+    def put_sections(self, device_name, sections, vendor=None, timestamp=None, marker=None):
+        """
+        Lưu một bản backup dạng các section [(tên, nội dung)] theo đúng thứ tự; nối lại các nội dung
+        cho ra cấu hình đầy đủ. Trả về (entry, new_sections) với new_sections là tên các section có nội dung mới.
+        """
+        index, new_sections, total = [], [], 0
+        for name, text in sections:
+            digest, size, is_new = self.put_object(text)
+            index.append({"name": name, "hash": digest, "size": size})
+            total += size
+            if is_new:
+                new_sections.append(name)
+        digest, _, _ = self.put_object(json.dumps({"sections": index}, ensure_ascii=False, sort_keys=True))
+        return self.record(device_name, digest, total, vendor, timestamp, marker, kind=SECTIONS_KIND), new_sections
+
+    def capture(self, device_name, produce, vendor=None, timestamp=None, marker=None):
+        """
+        Lưu một bản backup dạng luồng: produce(write) gọi write(text) nhiều lần, mỗi đoạn được nén
+        và băm ngay rồi bỏ khỏi bộ nhớ. Trả về (entry, is_new), hoặc (None, False) nếu không có nội dung.
+        """
+        writer = self.open_writer()
+        try:
+            produce(writer.write)
+        except BaseException:
+            writer.abort()
+            raise
+        if not writer.size:
+            writer.abort()
+            return None, False
+        digest, is_new = writer.commit()
+        return self.record(device_name, digest, writer.size, vendor, timestamp, marker), is_new
+
+    # --- ĐỌC ---
+    def dates(self):
+        """Các ngày có backup (thư mục YYYY-mm-dd), mới nhất trước."""
+        if not os.path.isdir(self.base_dir):
+            return []
+        return sorted((d for d in os.listdir(self.base_dir) if DATE_DIR_RE.match(d)), reverse=True)
+
+    def entries_on(self, day):
+        """Toàn bộ bản backup của một ngày: các dòng manifest và file .cfg kiểu cũ."""
+        entries = []
+        manifest = self.manifest_path(day)
+        if os.path.exists(manifest):
+            with open(manifest, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        try:
+                            entries.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            continue  # Dòng ghi dở (tiến trình bị ngắt)
+        entries.extend(self._legacy_entries(os.path.join(self.base_dir, day)))
+        return entries
+
+    @staticmethod
+    def _legacy_entries(directory):
+        entries = []
+        for filename in os.listdir(directory) if os.path.isdir(directory) else []:
+            match = LEGACY_FILE_RE.match(filename)
+            if match:
+                path = os.path.join(directory, filename)
+                entries.append({"device": match["device"], "timestamp": match["timestamp"], "hash": None,
+                                "size": os.path.getsize(path), "vendor": None, "path": path})
+        return entries
+
+    def versions(self, device_name, limit=None):
+        """Các phiên bản backup của một thiết bị (tối đa `limit`), mới nhất trước. Tra qua catalog."""
+        return self._catalog().latest(device_name, limit)
+
+    def versions_of_kind(self, device_name, kind, limit=None):
+        """Các phiên bản cùng loại `kind` (None: cấu hình đầy đủ, SECTIONS_KIND: theo section), mới nhất trước."""
+        return self._catalog().latest_of_kind(device_name, kind, limit)
+
+    def latest(self, device_name):
+        """Bản backup mới nhất của thiết bị, None nếu chưa có."""
+        entries = self.versions(device_name, limit=1)
+        return entries[0] if entries else None
+
+    def backups_on(self, day):
+        """Mọi bản backup trong ngày `day` (YYYY-mm-dd). Tra qua catalog."""
+        return self._catalog().on_date(day)
+
+    def rebuild_catalog(self):
+        """Đọc lại toàn bộ manifest và file .cfg kiểu cũ (kể cả nằm ngay trong base_dir) để dựng lại catalog."""
+        entries = [e for day in self.dates() for e in self.entries_on(day)]
+        entries += self._legacy_entries(self.base_dir)
+        return self.catalog.replace_all(entries)
+
+    def read_object(self, digest):
+        with gzip.open(self.object_path(digest), "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def read(self, entry):
+        """Trả về nội dung cấu hình của một entry (object nén, các section nối lại, hoặc file .cfg kiểu cũ)."""
+        if entry.get("path"):
+            with open(entry["path"], "r", encoding="utf-8") as f:
+                return f.read()
+        if entry.get("kind") == SECTIONS_KIND:
+            return "".join(self.read_object(section["hash"]) for section in self.sections_of(entry))
+        return self.read_object(entry["hash"])
+
+    def sections_of(self, entry):
+        """Danh sách section [{name, hash, size}] của một bản backup kind='sections' ([] với loại khác)."""
+        if entry.get("kind") != SECTIONS_KIND:
+            return []
+        return json.loads(self.read_object(entry["hash"]))["sections"]
+
+    def read_section(self, entry, name):
+        """Nội dung một section của bản backup, None nếu không có."""
+        section = next((s for s in self.sections_of(entry) if s["name"] == name), None)
+        return self.read_object(section["hash"]) if section else None
+
+    def materialize(self, entry, dest_path):
+        """Ghi nội dung của một entry ra file văn bản thường (vd: để so sánh hoặc restore thủ công)."""
+        os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+        with open(dest_path, "w", encoding="utf-8") as f:
+            f.write(self.read(entry))
+        return dest_path
+
+    # --- RETENTION / GC ---
+    def retained_dates(self, keep_daily, keep_weekly, keep_monthly):
+        """
+        Chọn các ngày được giữ: `keep_daily` ngày gần nhất có backup, cộng ngày mới nhất của
+        `keep_weekly` tuần gần nhất và của `keep_monthly` tháng gần nhất.
+        """
+        days = self.dates()
+        keep = set(days[:keep_daily])
+        for bucket_of, limit in ((lambda d: date.fromisoformat(d).isocalendar()[:2], keep_weekly),
+                                 (lambda d: d[:7], keep_monthly)):
+            seen = []
+            for day in days:  # Mới nhất trước: ngày đầu tiên gặp của mỗi tuần/tháng là ngày mới nhất
+                bucket = bucket_of(day)
+                if bucket not in seen:
+                    if len(seen) >= limit:
+                        break
+                    seen.append(bucket)
+                    keep.add(day)
+        return keep
+
+    def apply_retention(self, keep_daily, keep_weekly, keep_monthly):
+        """Xóa các thư mục ngày không được giữ rồi dọn object không còn được tham chiếu. Trả về (số ngày, số object) đã xóa."""
+        keep = self.retained_dates(keep_daily, keep_weekly, keep_monthly)
+        catalog = self._catalog()
+        removed_days = 0
+        for day in self.dates():
+            if day not in keep:
+                day_dir = os.path.join(self.base_dir, day)
+                shutil.rmtree(day_dir)
+                catalog.remove_day(day, day_dir)
+                removed_days += 1
+        return removed_days, self.gc()
+
+    def gc(self):
+        """Xóa các object không còn dòng manifest nào tham chiếu. Trả về số object đã xóa."""
+        catalog = self._catalog()
+        referenced = catalog.referenced_hashes()
+        # Object của từng section được tham chiếu gián tiếp qua object chỉ mục
+        for digest in catalog.referenced_hashes(kind=SECTIONS_KIND):
+            if os.path.exists(self.object_path(digest)):
+                referenced.update(s["hash"] for s in self.sections_of({"hash": digest, "kind": SECTIONS_KIND}))
+        removed = 0
+        if not os.path.isdir(self.objects_dir):
+            return removed
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for filename in os.listdir(prefix_dir):
+                if filename.endswith(".gz") and filename[:-3] not in referenced:
+                    os.remove(os.path.join(prefix_dir, filename))
+                    removed += 1
+        return removed
+
+# Kho backup dùng chung cho toàn bộ ứng dụng
+backup_store = BackupStore()
+
+def main():
+    from core.utils import load_backup_retention
+    parser = argparse.ArgumentParser(description="Quản lý kho backup cấu hình (data/backups).")
+    sub = parser.add_subparsers(dest="action", required=True)
+    sub.add_parser("retention", help="Áp dụng chính sách giữ backup (.env) và dọn object thừa")
+    versions = sub.add_parser("versions", help="Liệt kê các phiên bản backup của một thiết bị")
+    versions.add_argument("device")
+    versions.add_argument("--limit", type=int, help="Chỉ hiện N bản mới nhất")
+    on_date = sub.add_parser("date", help="Liệt kê mọi bản backup trong một ngày")
+    on_date.add_argument("day", help="YYYY-mm-dd")
+    sub.add_parser("reindex", help="Dựng lại catalog.db từ cây thư mục backup hiện có")
+    sections = sub.add_parser("sections", help="Liệt kê các section của một phiên bản backup (FortiOS)")
+    sections.add_argument("device")
+    sections.add_argument("--index", type=int, default=1, help="Phiên bản thứ mấy tính từ mới nhất (mặc định 1)")
+    export = sub.add_parser("export", help="Xuất một phiên bản backup ra file văn bản")
+    export.add_argument("device")
+    export.add_argument("--index", type=int, default=1, help="Phiên bản thứ mấy tính từ mới nhất (mặc định 1)")
+    export.add_argument("-o", "--output", help="File đích (mặc định <device>_<timestamp>.cfg)")
+    export.add_argument("--section", help="Chỉ xuất một section (bản backup chia theo section)")
+    parser.add_argument("--base", default=BASE_BACKUP_DIR)
+    args = parser.parse_args()
+
+    store = BackupStore(args.base)
+    try:
+        if args.action == "retention":
+            daily, weekly, monthly = load_backup_retention()
+            days, objects = store.apply_retention(daily, weekly, monthly)
+            print_success(f"Đã xóa {days} thư mục ngày và {objects} object không còn dùng.")
+        elif args.action == "versions":
+            for i, entry in enumerate(store.versions(args.device, args.limit), 1):
+                print(f" [{i}] {entry['timestamp']}  {entry['size']:>10} bytes  {(entry['hash'] or 'legacy .cfg')[:12]}")
+        elif args.action == "date":
+            for entry in store.backups_on(args.day):
+                print(f" {entry['timestamp']}  {entry['device']:<30} {entry['size']:>10} bytes  {(entry['hash'] or 'legacy .cfg')[:12]}")
+        elif args.action == "reindex":
+            count = store.rebuild_catalog()
+            print_success(f"Đã dựng lại catalog với {count} bản backup.")
+        else:
+            entries = store.versions(args.device)
+            if not 1 <= args.index <= len(entries):
+                print_error(f"Không có phiên bản thứ {args.index} cho {args.device}."); return
+            entry = entries[args.index - 1]
+            if args.action == "sections":
+                sections = store.sections_of(entry)
+                if not sections:
+                    print_info("Bản backup này không chia theo section."); return
+                for section in sections:
+                    print(f" {section['name']:<40} {section['size']:>10} bytes  {section['hash'][:12]}")
+                return
+            if args.section:
+                text = store.read_section(entry, args.section)
+                if text is None:
+                    print_error(f"Không có section '{args.section}' trong bản backup này."); return
+                path = args.output or f"{args.device}_{entry['timestamp']}_{args.section.replace(' ', '_')}.cfg"
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text)
+            else:
+                path = store.materialize(entry, args.output or f"{args.device}_{entry['timestamp']}.cfg")
+            print_info(f"Đã xuất {args.device} ({entry['timestamp']}) ra {path}.")
+    except (OSError, sqlite3.Error) as e:
+        print_error(f"Lỗi: {e}")
+
+if __name__ == "__main__":
+    main()
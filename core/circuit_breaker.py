@@ -0,0 +1,123 @@
+# core/circuit_breaker.py
+import threading
+import time
+
+from core.utils import is_device_reachable
+
+BREAKER_FAILURE_THRESHOLD = 3   # Số lần lỗi liên tiếp trước khi "ngắt mạch" thiết bị
+BREAKER_BASE_BACKOFF = 30       # Giây - thời gian ngắt mạch lần đầu, nhân đôi sau mỗi lần thử lại thất bại
+BREAKER_MAX_BACKOFF = 1800      # Giây - thời gian ngắt mạch tối đa
+BREAKER_TRIAL_TIMEOUT = 120     # Giây - lượt thử (half-open) không báo kết quả sau thời gian này được cấp lại
+PRECHECK_TIMEOUT = 2            # Giây - timeout của bước kiểm tra TCP trước khi mở phiên SSH
+
+CLOSED, OPEN, HALF_OPEN = "CLOSED", "OPEN", "HALF_OPEN"
+
+class _DeviceState:
+    __slots__ = ("failures", "state", "retry_at", "backoff", "trial_started", "trial_owner")
+
+    def __init__(self):
+        self.failures = 0
+        self.state = CLOSED
+        self.retry_at = 0.0
+        self.backoff = 0.0
+        self.trial_started = None
+        self.trial_owner = None
+
+class CircuitBreaker:
+    """
+    Theo dõi lỗi kết nối của từng thiết bị (khóa là (IP, port)) để không chờ timeout lặp lại với thiết bị đã chết.
+    - CLOSED: hoạt động bình thường, đếm số lần lỗi liên tiếp.
+    - OPEN: lỗi liên tiếp đạt ngưỡng; mọi thao tác bị từ chối ngay cho tới hết thời gian backoff.
+    - HALF_OPEN: hết backoff, cho đúng một lượt thử; thành công -> CLOSED, thất bại -> OPEN với backoff gấp đôi.
+      Lượt thử thuộc về thread được cấp: các lần kiểm tra tiếp theo trong cùng thread (vd gate của scheduler
+      rồi SSHClient.connect trong cùng job) vẫn được phép, thread khác bị từ chối.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, base_backoff=BREAKER_BASE_BACKOFF,
+                 max_backoff=BREAKER_MAX_BACKOFF, trial_timeout=BREAKER_TRIAL_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.trial_timeout = trial_timeout
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """Trả về (True, None) nếu được phép thử kết nối, ngược lại (False, lý do)."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or state.state == CLOSED:
+                return True, None
+            if state.state == OPEN:
+                if now < state.retry_at:
+                    return False, f"ngắt mạch sau {state.failures} lần lỗi, thử lại sau {state.retry_at - now:.0f}s"
+                state.state = HALF_OPEN
+                state.trial_started, state.trial_owner = now, threading.get_ident()
+                return True, None
+            # HALF_OPEN: chỉ một lượt thử tại một thời điểm
+            if state.trial_owner == threading.get_ident():
+                return True, None
+            if now - state.trial_started > self.trial_timeout:
+                state.trial_started, state.trial_owner = now, threading.get_ident()
+                return True, None
+            return False, "đang chờ kết quả lượt thử lại"
+
+    def record_success(self, key):
+        with self._lock:
+            self._states.pop(key, None)
+
+    def record_failure(self, key):
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.setdefault(key, _DeviceState())
+            state.failures += 1
+            if state.state == HALF_OPEN:
+                state.backoff = min(state.backoff * 2, self.max_backoff)
+            elif state.failures >= self.failure_threshold:
+                state.backoff = self.base_backoff
+            else:
+                return
+            state.state = OPEN
+            state.retry_at = now + state.backoff
+            state.trial_started = state.trial_owner = None
+
+    def state(self, key):
+        with self._lock:
+            state = self._states.get(key)
+            return state.state if state else CLOSED
+
+    def open_devices(self):
+        """Danh sách (key, số lần lỗi, số giây còn lại) của các thiết bị đang bị ngắt mạch."""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, s.failures, max(s.retry_at - now, 0)) for key, s in self._states.items() if s.state != CLOSED]
+
+    def reset(self, key=None):
+        """Xóa trạng thái của một thiết bị, hoặc toàn bộ nếu không truyền key."""
+        with self._lock:
+            if key is None:
+                self._states.clear()
+            else:
+                self._states.pop(key, None)
+
+def precheck(host, port=22, timeout=PRECHECK_TIMEOUT):
+    """
+    Kiểm tra nhanh trước khi mở phiên SSH: circuit breaker, rồi kết nối TCP (dùng kết quả
+    gần đây trong status cache nếu còn hạn). Trả về None nếu được phép kết nối, ngược lại là lý do bỏ qua.
+    """
+    port = port or 22
+    allowed, reason = breaker.allow((host, port))
+    if not allowed:
+        return reason
+    if not is_device_reachable(host, port, timeout=timeout):
+        breaker.record_failure((host, port))
+        return f"không kết nối được TCP {host}:{port}"
+    return None
+
+def precheck_device(device):
+    """precheck() cho một dict thiết bị (name, ip, port...) như các job của scheduler nhận vào."""
+    return precheck(device["ip"], device.get("port") or 22)
+
+# Circuit breaker dùng chung cho toàn bộ ứng dụng
+breaker = CircuitBreaker()
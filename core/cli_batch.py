@@ -0,0 +1,84 @@
+# core/cli_batch.py
+import re
+
+def prompt_pattern(base_prompt):
+    """
+    Regex nhận diện prompt của thiết bị ở đầu dòng, kể cả khi đang ở mode cấu hình:
+    'HN-Router#', 'HN-Router(config-if)#', 'HN-FGT # ', 'HN-FGT (interface) # '.
+    """
+    return re.compile(rf"(?m)^{re.escape(base_prompt)}(?: ?\([^()\r\n]*\))? ?[#>$] ?")
+
+class PromptCounter:
+    """Đếm số prompt trong một buffer chỉ lớn dần, không quét lại phần đã đọc (output lớn như running-config)."""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self._scanned = 0    # Vị trí đầu dòng chưa kết thúc
+        self._complete = 0   # Số prompt nằm trong các dòng đã kết thúc
+
+    def count(self, buffer):
+        end = buffer.rfind("\n") + 1
+        if end > self._scanned:
+            self._complete += len(self.pattern.findall(buffer, self._scanned, end))
+            self._scanned = end
+        # Prompt cuối cùng chưa có ký tự xuống dòng
+        return self._complete + (1 if self.pattern.match(buffer, self._scanned) else 0)
+
+def build_batch_input(commands, newline="\n"):
+    """Ghép các lệnh thành một lần ghi duy nhất vào kênh SSH."""
+    return "".join(command.rstrip("\r\n") + newline for command in commands)
+
+def split_batch_output(raw, commands, pattern):
+    """
+    Tách output thô của một loạt lệnh gửi liền nhau thành {lệnh: output}.
+    Output của lệnh thứ i nằm giữa prompt thứ i-1 và prompt thứ i; dòng đầu (echo lệnh) bị bỏ.
+    Lệnh trùng nhau trong danh sách chỉ giữ output của lần chạy cuối.
+    """
+    raw = raw.replace("\r\n", "\n").replace("\r", "")
+    outputs, start = {}, 0
+    for command, match in zip(commands, pattern.finditer(raw)):
+        lines = raw[start:match.start()].split("\n")
+        start = match.end()
+        if lines and command.strip() and command.strip() in lines[0]:
+            lines = lines[1:]
+        if lines and not lines[-1]:
+            lines = lines[:-1]
+        outputs[command] = "\n".join(lines)
+    return outputs
+
+class PromptTerminatedStream:
+    """
+    Nhận output thô của MỘT lệnh theo từng đoạn và chuyển ngay các dòng hoàn chỉnh sang `sink`
+    (bỏ dòng echo lệnh), dừng khi gặp prompt. Chỉ giữ lại dòng chưa kết thúc nên bộ nhớ không phụ
+    thuộc độ lớn output. Nội dung đưa ra giống hệt kết quả của split_batch_output cho cùng lệnh.
+    """
+
+    def __init__(self, pattern, command, sink):
+        self.pattern = pattern
+        self.command = command.strip()
+        self.sink = sink
+        self.size = 0
+        self._partial = ""
+        self._echo_pending = True
+        self._first_line = True
+
+    def _emit(self, lines):
+        if self._echo_pending and lines:
+            self._echo_pending = False
+            if self.command and self.command in lines[0]:
+                lines = lines[1:]
+        if not lines:
+            return
+        # Gộp các dòng của cả đoạn thành một lần gọi sink
+        text = "\n".join(lines) if self._first_line else "\n" + "\n".join(lines)
+        self._first_line = False
+        self.size += len(text)
+        self.sink(text)
+
+    def feed(self, data):
+        """Đưa thêm một đoạn output. Trả về True khi đã gặp prompt (lệnh kết thúc)."""
+        lines = (self._partial + data.replace("\r", "")).split("\n")
+        self._partial = lines.pop()
+        self._emit(lines)
+        match = self.pattern.match(self._partial)
+        return bool(match) and match.end() == len(self._partial)
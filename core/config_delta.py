@@ -0,0 +1,282 @@
+# core/config_delta.py
+"""
+Tính bộ lệnh tối thiểu để đưa cấu hình đang chạy (running) về một bản cấu hình đích (backup).
+
+Cấu hình được dựng thành cây: mỗi nút là {khóa so sánh: [dòng gốc, nút con]}.
+- Cisco IOS: cây theo thụt lề; dòng thừa được phủ định bằng 'no ...', dòng thiếu được thêm
+  kèm dòng cha làm ngữ cảnh.
+- FortiOS: cây theo khối config/edit; 'set' thiếu hoặc khác giá trị được đặt lại, 'set' thừa
+  thành 'unset', mục 'edit' thừa thành 'delete'.
+cisco_missing / fortinet_missing chỉ tính chiều thêm: các dòng của một đoạn cấu hình (vd mẫu đẩy hàng loạt)
+chưa có trong cấu hình đang chạy. Khối 'edit 0' (FortiOS tự cấp ID) được so với mục có cùng 'set name'.
+Khóa so sánh đã che bí mật mã hóa (salt sinh lại mỗi lần xuất) nên chúng không bị đẩy lại vô ích.
+Thứ tự dòng chỉ được xét ở các nhóm lệnh được đánh giá theo thứ tự (ACL, prefix-list, route-map): nếu thứ tự
+khác mà không thể chỉ xóa / nối thêm ở cuối, cả nhóm bị xóa rồi ghi lại theo bản đích.
+"""
+import re
+
+from core.config_diff import VOLATILE_LINE_RE, ENCRYPTED_SECRET_RE, SECRET_MASK
+
+# Dòng Cisco không phải lệnh cấu hình / không thể áp lại
+CISCO_IGNORED_PREFIXES = ("Building configuration", "Current configuration", "version ")
+# Lệnh chỉ có một giá trị: đặt giá trị mới là đủ, không cần 'no' giá trị cũ trước
+CISCO_SINGLE_VALUE_COMMANDS = ("hostname ", "description ", "ip address ", "ip domain name ", "ip domain-name ",
+                               "enable secret ", "ip default-gateway ", "clock timezone ",
+                               "snmp-server location ", "snmp-server contact ")
+CISCO_SECONDARY_SUFFIX = " secondary"
+# Nhóm dòng cùng cấp được đánh giá theo thứ tự; group(1) là tên nhóm, 'no <tên nhóm>' xóa cả nhóm
+CISCO_ORDERED_LINE_RE = re.compile(r"^((?:ipv6 )?access-list \S+|ip(?:v6)? prefix-list \S+|route-map \S+) ")
+# Khối có các dòng con được đánh giá theo thứ tự (ACL có tên)
+CISCO_ORDERED_BLOCKS = ("ip access-list ", "ipv6 access-list ", "mac access-list ")
+CISCO_BANNER_DELIMITER = "^C"
+CISCO_DELTA_INDENT = " "
+# 'edit 0' trong mẫu FortiOS: thiết bị tự cấp ID mới, mục được nhận diện qua 'set name'
+FORTI_AUTO_ID_EDIT = "edit 0"
+FORTI_NAME_KEY = "set name"
+
+def _mask(line):
+    return ENCRYPTED_SECRET_RE.sub(lambda m: m.group(1) + SECRET_MASK, line)
+
+# --- CISCO IOS ---
+def parse_cisco_config(text):
+    """Dựng cây cấu hình Cisco IOS theo thụt lề. Banner nhiều dòng được giữ thành một dòng (có xuống dòng)."""
+    root = {}
+    stack = [(-1, root)]  # (độ thụt lề, nút)
+    lines = iter(text.replace("\r\n", "\n").split("\n"))
+    for line in lines:
+        stripped = line.strip()
+        if (not stripped or stripped.startswith("!") or stripped == "end"
+                or stripped.startswith(CISCO_IGNORED_PREFIXES) or VOLATILE_LINE_RE.match(stripped)):
+            continue
+        if stripped.startswith("banner ") and stripped.count(CISCO_BANNER_DELIMITER) == 1:
+            # running-config in banner dạng 'banner motd ^C' ... '^C'
+            block = [stripped]
+            for inner in lines:
+                block.append(inner.rstrip())
+                if CISCO_BANNER_DELIMITER in inner:
+                    break
+            stripped = "\n".join(block)
+        indent = len(line) - len(line.lstrip(" "))
+        while stack[-1][0] >= indent:
+            stack.pop()
+        children = {}
+        stack[-1][1][_mask(stripped)] = [stripped, children]
+        stack.append((indent, children))
+    return root
+
+def _cisco_lines(node, depth):
+    out = []
+    for line, children in node.values():
+        out.extend((CISCO_DELTA_INDENT * depth + part) for part in line.split("\n"))
+        if children:
+            out.extend(_cisco_lines(children, depth + 1))
+    return out
+
+def _command(key):
+    """Lệnh bỏ tiền tố 'no ', kèm dấu cách cuối để so với CISCO_SINGLE_VALUE_COMMANDS (vd 'no ip address')."""
+    return (key[3:] if key.startswith("no ") else key) + " "
+
+def _overridden(key, target):
+    """
+    Lệnh một giá trị đổi giá trị (vd 'hostname A' -> 'hostname B', 'no ip address' -> 'ip address ...'):
+    lệnh mới tự ghi đè, không cần phủ định dòng cũ.
+    'ip address ... secondary' là lệnh riêng cho từng địa chỉ: không ghi đè và không bị địa chỉ chính ghi đè.
+    """
+    if key.endswith(CISCO_SECONDARY_SUFFIX):
+        return False
+    command = _command(key)
+    return any(command.startswith(cmd) and any(_command(other).startswith(cmd) and not other.endswith(CISCO_SECONDARY_SUFFIX)
+                                               for other in target)
+               for cmd in CISCO_SINGLE_VALUE_COMMANDS)
+
+def _cisco_negate(line):
+    if line.startswith("banner "):
+        return "no " + " ".join(line.split()[:2])
+    return line[3:] if line.startswith("no ") else "no " + line
+
+def _reordered(current_keys, target_keys):
+    """True nếu chỉ xóa dòng thừa và nối dòng thiếu vào cuối không cho ra đúng thứ tự của bản đích."""
+    target_set, current_set = set(target_keys), set(current_keys)
+    kept = [key for key in current_keys if key in target_set]
+    return kept + [key for key in target_keys if key not in current_set] != list(target_keys)
+
+def _ordered_groups(node):
+    """{tên nhóm: [khóa theo thứ tự]} của các dòng thuộc nhóm đánh giá theo thứ tự (CISCO_ORDERED_LINE_RE)."""
+    groups = {}
+    for key in node:
+        match = CISCO_ORDERED_LINE_RE.match(key)
+        if match:
+            groups.setdefault(match.group(1), []).append(key)
+    return groups
+
+def _cisco_delta(current, target, depth):
+    out, rewrites = [], []
+    indent = CISCO_DELTA_INDENT * depth
+    # Nhóm có thứ tự bị đảo: xóa cả nhóm rồi ghi lại theo bản đích, bỏ qua so sánh từng dòng
+    current_groups, target_groups = _ordered_groups(current), _ordered_groups(target)
+    rewritten = set()
+    for group, keys in target_groups.items():
+        if group in current_groups and _reordered(current_groups[group], keys):
+            rewritten.update(current_groups[group], keys)
+            rewrites.append(indent + "no " + group)
+            rewrites.extend(_cisco_lines({key: target[key] for key in keys}, depth))
+    # Xóa trước rồi mới thêm: tránh xung đột (vd đổi địa chỉ IP trên cùng interface)
+    for key, (line, _) in current.items():
+        if key not in target and key not in rewritten and not _overridden(key, target):
+            out.append(indent + _cisco_negate(line))
+    out.extend(rewrites)
+    for key, (line, children) in target.items():
+        if key in rewritten:
+            continue
+        if key not in current:
+            out.extend(_cisco_lines({key: [line, children]}, depth))
+            continue
+        if line.startswith(CISCO_ORDERED_BLOCKS) and _reordered(list(current[key][1] or {}), list(children or {})):
+            out.append(indent + "no " + line)
+            out.extend(_cisco_lines({key: [line, children]}, depth))
+            continue
+        sub = _cisco_delta(current[key][1] or {}, children or {}, depth + 1)
+        if sub:
+            out.append(CISCO_DELTA_INDENT * depth + line)
+            out.extend(sub)
+    return out
+
+def cisco_delta(running_config, target_config):
+    """Danh sách lệnh cấu hình (cho send_config_set) đưa running-config Cisco về target_config."""
+    return _cisco_delta(parse_cisco_config(running_config), parse_cisco_config(target_config), 0)
+
+def _cisco_missing(current, wanted, depth):
+    out = []
+    for key, (line, children) in wanted.items():
+        if key.startswith("no ") and key not in current:
+            # 'no X' đã thỏa nếu running-config không có X
+            if key[3:] in current:
+                out.append(CISCO_DELTA_INDENT * depth + line)
+            continue
+        if key not in current:
+            out.extend(_cisco_lines({key: [line, children]}, depth))
+            continue
+        sub = _cisco_missing(current[key][1] or {}, children or {}, depth + 1)
+        if sub:
+            out.append(CISCO_DELTA_INDENT * depth + line)
+            out.extend(sub)
+    return out
+
+def cisco_missing(running_config, commands):
+    """
+    Các dòng của `commands` (đoạn cấu hình Cisco, lệnh con thụt lề như running-config) chưa có trong
+    running_config, kèm dòng cha làm ngữ cảnh. [] nghĩa là thiết bị đã có đủ.
+    """
+    return _cisco_missing(parse_cisco_config(running_config), parse_cisco_config("\n".join(commands)), 0)
+
+# --- FORTIOS ---
+def parse_fortinet_config(text):
+    """Dựng cây cấu hình FortiOS từ các khối config/edit/set/next/end."""
+    root = {}
+    stack = [root]
+    for raw in text.replace("\r\n", "\n").split("\n"):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        word = line.split(None, 1)[0]
+        if word in ("next", "end"):
+            if len(stack) > 1:
+                stack.pop()
+            continue
+        node = stack[-1]
+        if word in ("config", "edit"):
+            children = {}
+            node[line] = [line, children]
+            stack.append(children)
+        elif word in ("set", "unset", "append", "select"):
+            # Khóa là tên thuộc tính, giá trị so sánh là dòng đã che bí mật: cùng thuộc tính khác giá trị -> đặt lại
+            tokens = line.split(None, 2)
+            node["set " + (tokens[1] if len(tokens) > 1 else "")] = [line, _mask(line)]
+    return root
+
+def _fortinet_closing(line):
+    return "next" if line.startswith("edit") else "end"
+
+def _fortinet_block(line, children):
+    return [line] + _fortinet_lines(children) + [_fortinet_closing(line)]
+
+def _fortinet_lines(node):
+    out = []
+    for line, children in node.values():
+        out.extend(_fortinet_block(line, children) if isinstance(children, dict) else [line])
+    return out
+
+def _fortinet_delta(current, target):
+    """
+    Trả về (sets, deletes): các lệnh set/unset/thêm mục và các lệnh 'delete', mỗi phần đã kèm khối
+    config/edit bao quanh. 'delete' được đẩy sau cùng vì FortiOS từ chối xóa đối tượng còn được tham chiếu
+    (vd address còn nằm trong member của addrgrp) cho tới khi các lệnh set bỏ tham chiếu đã chạy.
+    """
+    sets, deletes = [], []
+    # Xóa theo thứ tự ngược: cấu hình in đối tượng được tham chiếu trước đối tượng tham chiếu tới nó
+    for key, (line, value) in reversed(current.items()):
+        if key in target:
+            continue
+        if key.startswith("set "):
+            sets.append("unset " + key[4:])
+        elif key.startswith("edit "):
+            deletes.append("delete " + key[5:])
+        # Khối 'config' không xóa được; nội dung của nó vẫn được so sánh nếu có trong bản đích
+    sets.reverse()
+    nested_deletes = []
+    for key, (line, value) in target.items():
+        if key not in current:
+            sets.extend(_fortinet_block(line, value) if isinstance(value, dict) else [line])
+        elif isinstance(value, dict):
+            sub_sets, sub_deletes = _fortinet_delta(current[key][1], value)
+            if sub_sets:
+                sets.extend([line] + sub_sets + [_fortinet_closing(line)])
+            if sub_deletes:
+                nested_deletes.append([line] + sub_deletes + [_fortinet_closing(line)])
+        elif current[key][1] != value:
+            sets.append(line)
+    for block in reversed(nested_deletes):
+        deletes.extend(block)
+    return sets, deletes
+
+def fortinet_delta(running_config, target_config):
+    """
+    Danh sách lệnh CLI đưa cấu hình FortiOS đang chạy về target_config: mọi lệnh set / thêm mục trước,
+    sau đó mới tới các lệnh 'delete'.
+    """
+    sets, deletes = _fortinet_delta(parse_fortinet_config(running_config), parse_fortinet_config(target_config))
+    return sets + deletes
+
+def _fortinet_auto_id_entry(current, wanted):
+    """(khóa, dòng 'edit N') của mục trong `current` có cùng 'set name' với khối 'edit 0' `wanted`; None nếu chưa có."""
+    name = wanted.get(FORTI_NAME_KEY)
+    if name is None:
+        return None
+    for key, (line, value) in current.items():
+        if key.startswith("edit ") and isinstance(value, dict) and value.get(FORTI_NAME_KEY, [None, None])[1] == name[1]:
+            return key, line
+    return None
+
+def _fortinet_missing(current, wanted):
+    out = []
+    for key, (line, value) in wanted.items():
+        if key == FORTI_AUTO_ID_EDIT and isinstance(value, dict):
+            # Khóa 'edit 0' không bao giờ có trong running-config: so với mục cùng tên, lệnh thiếu áp vào 'edit N' của mục đó
+            key, line = _fortinet_auto_id_entry(current, value) or (key, line)
+        if key not in current:
+            if not (isinstance(value, str) and line.startswith("unset ")):  # 'unset' thuộc tính không có: đã thỏa
+                out.extend(_fortinet_block(line, value) if isinstance(value, dict) else [line])
+        elif isinstance(value, dict):
+            sub = _fortinet_missing(current[key][1], value)
+            if sub:
+                out.extend([line] + sub + [_fortinet_closing(line)])
+        elif current[key][1] != value:
+            out.append(line)
+    return out
+
+def fortinet_missing(running_config, commands):
+    """
+    Các lệnh của `commands` (khối config/edit/set FortiOS) chưa khớp cấu hình đang chạy, kèm các khối
+    config/edit bao quanh. [] nghĩa là thiết bị đã có đủ.
+    """
+    return _fortinet_missing(parse_fortinet_config(running_config), parse_fortinet_config("\n".join(commands)))
@@ -0,0 +1,250 @@
+# core/config_diff.py
+import os
+import re
+import json
+import argparse
+import sqlite3
+from difflib import SequenceMatcher
+from datetime import datetime
+
+from core.ui import print_info, print_success, print_error, print_warning
+from core.backup_store import backup_store, BackupStore, BASE_BACKUP_DIR, BACKUP_TZ, TIMESTAMP_FORMAT
+
+DIFFS_DIRNAME = "diffs"
+CHANGES_FILENAME = "changes.jsonl"
+DIFF_CONTEXT = 3  # Số dòng ngữ cảnh quanh mỗi thay đổi, như `diff -u`
+
+# Dòng thay đổi mỗi lần xuất cấu hình dù cấu hình không đổi: bỏ hẳn trước khi so sánh
+VOLATILE_LINE_RE = re.compile(
+    r"^(?:"
+    r"Building configuration\.\.\.|"
+    r"Current configuration : \d+ bytes|"
+    r"! Last configuration change at .*|"
+    r"! NVRAM config last updated at .*|"
+    r"! No configuration change since last restart|"
+    r"! Time: .*|"
+    r"ntp clock-period \d+|"
+    r"#config-version=.*|"
+    r"#conf_file_ver=.*|"
+    r"#buildno=.*"
+    r")\s*$"
+)
+# Bí mật đã mã hóa được sinh lại (salt ngẫu nhiên) mỗi lần thiết bị xuất cấu hình: che giá trị, giữ phần còn lại
+ENCRYPTED_SECRET_RE = re.compile(r"(\b(?:secret|password|key-string|key|md5|authentication-key)\s+[5789]\s+|\bENC\s+)\S+")
+SECRET_MASK = "<encrypted>"
+
+def normalize_lines(lines):
+    """Chuẩn hóa các dòng cấu hình để so sánh: bỏ dòng biến động, che bí mật mã hóa."""
+    return [ENCRYPTED_SECRET_RE.sub(lambda m: m.group(1) + SECRET_MASK, line)
+            for line in lines if not VOLATILE_LINE_RE.match(line)]
+
+def normalize_config(text):
+    """normalize_lines() cho cả một cấu hình dạng chuỗi. Trả về danh sách dòng."""
+    return normalize_lines(text.replace("\r\n", "\n").splitlines())
+
+def _hunk_range(start, length):
+    # Cùng quy ước với difflib.unified_diff: dòng bắt đầu tính từ 1, khối rỗng trỏ vào dòng trước nó
+    if length == 1:
+        return str(start + 1)
+    if not length:
+        start -= 1
+    return f"{start + 1},{length}"
+
+def _group_opcodes(opcodes, context):
+    """Chia opcodes thành các hunk, mỗi hunk có tối đa `context` dòng giống nhau ở hai đầu (như difflib)."""
+    if opcodes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = opcodes[0]
+        opcodes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if opcodes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = opcodes[-1]
+        opcodes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+    group = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        # Khối giống nhau dài hơn 2*context dòng thì tách hunk
+        if tag == "equal" and i2 - i1 > context * 2:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+def _common_prefix(a, b):
+    """Độ dài phần đầu chung của hai list, tìm nhị phân bằng phép so sánh slice (chạy trong C)."""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+def _line_opcodes(old_lines, new_lines):
+    """
+    Opcodes (như SequenceMatcher.get_opcodes) giữa hai danh sách dòng, so khớp trên hash của dòng
+    thay vì chuỗi. Phần đầu và cuối giống nhau được cắt trước khi chạy SequenceMatcher nên cấu hình
+    lớn chỉ đổi vài dòng vẫn xử lý gần như tuyến tính.
+    """
+    a, b = list(map(hash, old_lines)), list(map(hash, new_lines))
+    if a == b:
+        return [("equal", 0, len(a), 0, len(b))] if a else []
+    prefix = _common_prefix(a, b)
+    suffix = _common_prefix(a[:prefix - 1:-1], b[:prefix - 1:-1]) if prefix else _common_prefix(a[::-1], b[::-1])
+    middle = SequenceMatcher(None, a[prefix:len(a) - suffix], b[prefix:len(b) - suffix], autojunk=False)
+    opcodes = [("equal", 0, prefix, 0, prefix)] if prefix else []
+    opcodes += [(tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix) for tag, i1, i2, j1, j2 in middle.get_opcodes()]
+    if suffix:
+        opcodes.append(("equal", len(a) - suffix, len(a), len(b) - suffix, len(b)))
+    return opcodes
+
+def line_diff(old_lines, new_lines, from_label="old", to_label="new", context=DIFF_CONTEXT):
+    """Unified diff giữa hai danh sách dòng. Trả về chuỗi diff, rỗng nếu hai bên giống nhau."""
+    opcodes = _line_opcodes(old_lines, new_lines)
+    if all(tag == "equal" for tag, *_ in opcodes):
+        return ""
+    out = [f"--- {from_label}", f"+++ {to_label}"]
+    for group in _group_opcodes(opcodes, context):
+        i1, i2, j1, j2 = group[0][1], group[-1][2], group[0][3], group[-1][4]
+        out.append(f"@@ -{_hunk_range(i1, i2 - i1)} +{_hunk_range(j1, j2 - j1)} @@")
+        for tag, ai1, ai2, bj1, bj2 in group:
+            if tag == "equal":
+                out.extend(" " + line for line in old_lines[ai1:ai2])
+                continue
+            if tag in ("replace", "delete"):
+                out.extend("-" + line for line in old_lines[ai1:ai2])
+            if tag in ("replace", "insert"):
+                out.extend("+" + line for line in new_lines[bj1:bj2])
+    return "\n".join(out) + "\n"
+
+def config_diff(old_text, new_text, from_label="old", to_label="new"):
+    """
+    Unified diff giữa hai bản cấu hình, bỏ qua các khác biệt chỉ nằm ở dòng biến động / bí mật mã hóa.
+    So khớp thô trước, rồi chỉ chuẩn hóa các đoạn khác nhau (phần giống nhau không cần xử lý regex).
+    Trả về chuỗi rỗng nếu không có thay đổi thực sự.
+    """
+    old_lines, new_lines = old_text.splitlines(), new_text.splitlines()
+    old_norm, new_norm = [], []
+    for tag, i1, i2, j1, j2 in _line_opcodes(old_lines, new_lines):
+        if tag == "equal":
+            old_norm += old_lines[i1:i2]; new_norm += new_lines[j1:j2]
+        else:
+            old_norm += normalize_lines(old_lines[i1:i2]); new_norm += normalize_lines(new_lines[j1:j2])
+    if old_norm == new_norm:
+        return ""
+    return line_diff(old_norm, new_norm, from_label, to_label)
+
+def _label(entry):
+    return f"{entry['device']}_{entry['timestamp']}"
+
+def diff_entries(store, old, new):
+    """
+    So sánh hai bản backup trong kho. Cùng hash thì không cần đọc nội dung.
+    Trả về (diff, added, removed): diff rỗng nếu chỉ khác ở các dòng biến động.
+    """
+    if old.get("hash") and old.get("hash") == new.get("hash"):
+        return "", 0, 0
+    diff = config_diff(store.read(old), store.read(new), _label(old), _label(new))
+    added = removed = 0
+    for line in diff.splitlines()[2:]:
+        if line.startswith("+"):
+            added += 1
+        elif line.startswith("-"):
+            removed += 1
+    return diff, added, removed
+
+def diff_path(store, entry):
+    """File diff của một bản backup: <ngày của bản mới>/diffs/<thiết bị>_<timestamp>.diff"""
+    return os.path.join(store.base_dir, entry["timestamp"][:10], DIFFS_DIRNAME, _label(entry) + ".diff")
+
+def diff_device(device_name, store=backup_store):
+    """
+    So sánh bản backup mới nhất của thiết bị với bản cùng loại (kind) ngay trước đó; nếu cấu hình thực sự
+    thay đổi thì ghi unified diff vào thư mục ngày của bản mới. Bản theo section của FortiOS ('show', không in
+    giá trị mặc định) không được so với bản full-configuration: hai loại luôn khác nhau dù cấu hình không đổi.
+    Trả về dict {device, status, added, removed, path} với status: 'changed', 'unchanged' hoặc 'new'
+    ('new': chưa có bản cùng loại nào trước đó).
+    """
+    result = {"device": device_name, "status": "new", "added": 0, "removed": 0, "path": None}
+    new = store.latest(device_name)
+    if new is None:
+        return result
+    versions = store.versions_of_kind(device_name, new.get("kind"), limit=2)
+    if len(versions) < 2:
+        return result
+    new, old = versions
+    diff, result["added"], result["removed"] = diff_entries(store, old, new)
+    if not diff:
+        result["status"] = "unchanged"
+        return result
+    path = diff_path(store, new)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(diff)
+    result.update(status="changed", path=path)
+    return result
+
+def diff_fleet(device_names, store=backup_store):
+    """
+    Chạy bước so sánh cho các thiết bị vừa backup và ghi tổng kết của lượt chạy vào
+    <ngày>/changes.jsonl. Trả về danh sách kết quả của diff_device (thiết bị lỗi có status 'error').
+    """
+    results = []
+    for name in device_names:
+        try:
+            results.append(diff_device(name, store))
+        except (OSError, EOFError, UnicodeDecodeError) as e:
+            results.append({"device": name, "status": "error", "added": 0, "removed": 0, "path": None, "error": str(e)})
+    now = datetime.now(tz=BACKUP_TZ)
+    summary = {"timestamp": now.strftime(TIMESTAMP_FORMAT), "total": len(results),
+               "changed": sorted(r["device"] for r in results if r["status"] == "changed"),
+               "new": sorted(r["device"] for r in results if r["status"] == "new")}
+    path = os.path.join(store.base_dir, now.strftime("%Y-%m-%d"), CHANGES_FILENAME)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    return results
+
+def print_fleet_summary(results):
+    """In tổng kết kiểu '7 of 412 devices changed' kèm danh sách thiết bị thay đổi."""
+    changed = [r for r in results if r["status"] == "changed"]
+    new = [r for r in results if r["status"] == "new"]
+    errors = [r for r in results if r["status"] == "error"]
+    print_info(f"📝 {len(changed)} of {len(results)} devices changed"
+               + (f", {len(new)} thiết bị backup lần đầu" if new else ""))
+    for r in sorted(changed, key=lambda r: r["device"]):
+        print_info(f"   • {r['device']}: +{r['added']} / -{r['removed']} dòng → {r['path']}")
+    for r in errors:
+        print_warning(f"   ⚠️ Không so sánh được {r['device']}: {r['error']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="So sánh cấu hình giữa hai lần backup gần nhất.")
+    parser.add_argument("devices", nargs="*", help="Tên thiết bị (mặc định: mọi thiết bị có backup trong --day)")
+    parser.add_argument("--day", help="YYYY-mm-dd (mặc định: hôm nay)")
+    parser.add_argument("--show", action="store_true", help="In nội dung diff ra màn hình")
+    parser.add_argument("--base", default=BASE_BACKUP_DIR)
+    args = parser.parse_args()
+
+    store = BackupStore(args.base)
+    try:
+        names = args.devices
+        if not names:
+            day = args.day or datetime.now(tz=BACKUP_TZ).strftime("%Y-%m-%d")
+            names = sorted({entry["device"] for entry in store.backups_on(day)})
+            if not names:
+                print_warning(f"Không có bản backup nào trong ngày {day}."); return
+        results = diff_fleet(names, store)
+    except (OSError, sqlite3.Error) as e:
+        print_error(f"Lỗi: {e}"); return
+    print_fleet_summary(results)
+    if args.show:
+        for r in results:
+            if r["path"]:
+                with open(r["path"], "r", encoding="utf-8") as f:
+                    print(f.read())
+    if not any(r["status"] == "changed" for r in results):
+        print_success("Không có thiết bị nào thay đổi cấu hình.")
+
+if __name__ == "__main__":
+    main()
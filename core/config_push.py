@@ -0,0 +1,358 @@
+# core/config_push.py
+"""
+Đẩy một mẫu cấu hình (core/template_registry.py) lên nhiều thiết bị theo từng đợt (rolling wave).
+
+- Đợt đầu là các thiết bị canary: chỉ cần một thiết bị lỗi là dừng toàn bộ. Phải có ít nhất một canary
+  đẩy thành công; nếu mọi canary đều bị bỏ qua, các thiết bị kế tiếp được chọn làm canary.
+- Các đợt sau gồm tối đa `wave_size` thiết bị, chạy song song qua scheduler dùng chung
+  (vẫn chịu giới hạn đồng thời theo chi nhánh / loại thiết bị).
+- Dừng khi tổng số thiết bị lỗi vượt `max_failures` hoặc tỉ lệ lỗi của một đợt vượt `max_failure_rate`;
+  các thiết bị chưa chạy trong đợt đang dở bị hủy, các đợt sau không được chạy.
+- Kết quả từng thiết bị được in ngay khi thiết bị đó xong.
+- Trước khi đẩy, kiểm tra tuân thủ (check_compliance): so lệnh của từng thiết bị với backup đầy đủ mới nhất;
+  thiết bị đã có đủ được bỏ qua, thiết bị thiếu một phần chỉ nhận các dòng còn thiếu.
+
+Chạy theo file job (dùng cho cron), từ thư mục gốc dự án:
+    python -m core.config_push push.yaml --dry-run
+    python -m core.config_push push.yaml --yes
+"""
+import os
+import sys
+import fnmatch
+import argparse
+from datetime import datetime
+
+import yaml
+from jinja2 import TemplateError
+from rich.prompt import Prompt
+
+from core.ssh_client import SSHClient
+from core.devices import get_inventory
+from core.utils import load_credentials, load_push_policy
+from core.template_registry import template_registry
+from core.device_vars import device_vars
+from core.backup_store import backup_store, BACKUP_TZ, TIMESTAMP_FORMAT
+from core.backup_restore import backup_device_config
+from core.vendors.vendor_factory import get_vendor_class
+from core.ui import console, print_info, print_success, print_error, print_warning
+from core.job_scheduler import scheduler, as_completed, PRIORITY_NORMAL, PRIORITY_BACKGROUND, DONE, SKIPPED
+
+# Chuỗi trong output cho biết thiết bị đã từ chối một lệnh (send_config_set không báo lỗi)
+PUSH_ERROR_MARKERS = ("% Invalid input", "% Incomplete command", "% Ambiguous command", "Command fail.")
+
+PUSH_OK = "OK"
+PUSH_FAILED = "FAILED"
+PUSH_SKIPPED = "SKIPPED"      # Circuit breaker / kiểm tra TCP chặn, không tính là lỗi
+PUSH_CANCELLED = "CANCELLED"  # Chưa chạy khi engine dừng
+PUSH_COMPLIANT = "COMPLIANT"  # Đã có đủ cấu hình, không cần đẩy
+
+# run_push_job không chạy được job (file job lỗi, thiếu credentials, không có thiết bị nào để đẩy)
+JOB_ERROR = "ERROR"
+
+# Kết quả kiểm tra tuân thủ của từng thiết bị
+PLAN_SKIP = "SKIP"        # Đã có đủ các dòng
+PLAN_PARTIAL = "PARTIAL"  # Chỉ đẩy các dòng còn thiếu
+PLAN_FULL = "FULL"        # Thiếu toàn bộ, hoặc không có cấu hình để so sánh
+
+def push_commands(device, username, password, commands):
+    """Chạy trong worker của scheduler, đẩy bộ lệnh tới 1 thiết bị. Trả về (success, output)."""
+    ssh = SSHClient(device, username, password)
+    try:
+        if not ssh.connect():
+            return (False, "Không thể kết nối")
+        output = ssh.conn.send_config_set(commands)
+    except Exception as e:
+        ssh.disconnect(discard=True)  # Phiên có thể kẹt ở chế độ cấu hình: không trả về pool
+        return (False, str(e))
+    finally:
+        ssh.disconnect()
+    error = next((line.strip() for line in output.splitlines() if line.strip().startswith(PUSH_ERROR_MARKERS)), None)
+    return (False, f"Thiết bị từ chối lệnh: {error}") if error else (True, output)
+
+def plan_waves(devices, wave_size, canaries=0):
+    """Chia danh sách thiết bị thành các đợt: [canary] + các đợt tối đa wave_size thiết bị."""
+    wave_size = max(int(wave_size), 1)
+    canaries = max(min(int(canaries), len(devices)), 0)
+    waves = [devices[:canaries]] if canaries else []
+    rest = devices[canaries:]
+    waves += [rest[i:i + wave_size] for i in range(0, len(rest), wave_size)]
+    return waves
+
+def _stop_reason(failures, wave_failures, canary, policy, wave_total=None):
+    """Lý do dừng engine, None nếu được chạy tiếp. Tỉ lệ lỗi của đợt chỉ xét khi đợt đã xong (có wave_total)."""
+    if canary and wave_failures:
+        return f"{wave_failures} thiết bị canary lỗi"
+    if failures > policy["max_failures"]:
+        return f"{failures} thiết bị lỗi, vượt ngưỡng {policy['max_failures']}"
+    if wave_total and wave_failures / wave_total > policy["max_failure_rate"]:
+        return f"tỉ lệ lỗi của đợt {wave_failures}/{wave_total} vượt {policy['max_failure_rate']:.0%}"
+    return None
+
+def _report(name, state, detail):
+    if state == PUSH_OK: print_success(f"✅ {name}: Thành công")
+    elif state == PUSH_SKIPPED: print_warning(f"⏭️ {name}: Bỏ qua - {detail}")
+    elif state == PUSH_FAILED: print_error(f"❌ {name}: Thất bại - {detail}")
+
+def run_push(plan, username, password, policy=None, priority=PRIORITY_NORMAL, on_result=None):
+    """
+    Đẩy cấu hình theo đợt. plan là danh sách (device, commands); policy ghi đè load_push_policy().
+    on_result(name, state, detail) được gọi ngay khi từng thiết bị xong (mặc định: in ra màn hình).
+    Trả về {'results': {tên: trạng thái}, 'stopped': lý do dừng hoặc None}.
+    """
+    policy = {**load_push_policy(), **(policy or {})}
+    on_result = on_result or _report
+    wave_size = max(int(policy["wave_size"]), 1)
+    canary_pending = policy["canaries"] > 0  # Chưa có thiết bị canary nào đẩy thành công
+    remaining, results, failures, stopped, index = list(plan), {}, 0, None, 0
+    while remaining and not stopped:
+        canary = canary_pending
+        size = int(policy["canaries"]) if canary else wave_size
+        wave, remaining = remaining[:size], remaining[size:]
+        index += 1
+        total = index + len(plan_waves(remaining, wave_size))
+        console.rule(f"[bold]Đợt {index}/{total}" + (" (canary)" if canary else "") + f": {len(wave)} thiết bị[/bold]")
+        jobs = [scheduler.submit(push_commands, device, username, password, commands, device=device, priority=priority)
+                for device, commands in wave]
+        wave_failures = wave_ok = 0
+        for job in as_completed(jobs):
+            if job.state == SKIPPED: state, detail = PUSH_SKIPPED, job.error
+            elif job.state == DONE: state, detail = (PUSH_OK, None) if job.result[0] else (PUSH_FAILED, job.result[1])
+            elif job.error: state, detail = PUSH_FAILED, job.error
+            else: continue  # Bị hủy: ghi nhận bên dưới
+            results[job.name] = state
+            on_result(job.name, state, detail)
+            if state == PUSH_OK:
+                wave_ok += 1
+            elif state == PUSH_FAILED:
+                failures += 1; wave_failures += 1
+                # Dừng ngay trong đợt: không gửi thêm thiết bị nào khi đã vượt ngưỡng
+                stopped = stopped or _stop_reason(failures, wave_failures, canary, policy)
+                if stopped: scheduler.cancel_all(jobs)
+        stopped = stopped or _stop_reason(failures, wave_failures, canary, policy, wave_total=len(wave))
+        if canary and not stopped:
+            # Canary bị bỏ qua (breaker mở, không kết nối được) chưa chứng minh gì về bộ lệnh:
+            # chỉ qua giai đoạn canary khi có ít nhất một canary đẩy thành công
+            canary_pending = not wave_ok
+            if canary_pending and remaining:
+                print_warning("⚠️ Không có thiết bị canary nào đẩy thành công, chọn các thiết bị kế tiếp làm canary.")
+    for device, _ in plan:
+        results.setdefault(device["name"], PUSH_CANCELLED)
+    return {"results": results, "stopped": stopped}
+
+# --- KIỂM TRA TUÂN THỦ ---
+def _backup_age_hours(entry):
+    taken = datetime.strptime(entry["timestamp"], TIMESTAMP_FORMAT).replace(tzinfo=BACKUP_TZ)
+    return (datetime.now(tz=BACKUP_TZ) - taken).total_seconds() / 3600
+
+def _compare(device, commands, entry):
+    """(trạng thái, lệnh cần đẩy) của một thiết bị so với bản backup `entry` (None: không có cấu hình để so)."""
+    vendor_class = get_vendor_class(device["device_type"])
+    if entry is None or vendor_class is None:
+        return PLAN_FULL, commands
+    try:
+        missing = vendor_class.missing_lines(backup_store.read(entry), commands)
+    except NotImplementedError:
+        return PLAN_FULL, commands
+    if not missing:
+        return PLAN_SKIP, []
+    wanted = {line.strip() for line in commands if line.strip()}
+    if wanted <= {line.strip() for line in missing}:
+        return PLAN_FULL, commands  # Thiếu toàn bộ: đẩy nguyên bộ lệnh đã render
+    return PLAN_PARTIAL, missing
+
+def _baseline(device_name):
+    """
+    Bản backup mới nhất dùng để so lệnh: bỏ qua bản theo section của FortiOS ('show' không in giá trị mặc định,
+    nên dòng mẫu đặt giá trị mặc định như 'set status enable' luôn bị coi là thiếu).
+    """
+    entries = backup_store.versions_of_kind(device_name, None, limit=1)
+    return entries[0] if entries else None
+
+def check_compliance(plan, username, password, max_age=24, priority=PRIORITY_NORMAL):
+    """
+    So lệnh của từng thiết bị với cấu hình đầy đủ trong backup mới nhất. Thiết bị chưa có backup đầy đủ hoặc
+    backup cũ hơn `max_age` giờ được lấy lại cấu hình đầy đủ trước (FortiGate: 'show full-configuration').
+    Trả về danh sách {device, status, commands} theo thứ tự của plan, commands là các lệnh cần đẩy.
+    """
+    baselines, stale = {}, []
+    for device, _ in plan:
+        entry = _baseline(device["name"])
+        if entry and _backup_age_hours(entry) <= max_age: baselines[device["name"]] = entry
+        else: stale.append(device)
+    if stale:
+        print_info(f"🔄 Lấy lại cấu hình của {len(stale)} thiết bị chưa có backup hoặc backup cũ hơn {max_age:g} giờ...")
+        jobs = scheduler.map_devices(backup_device_config, stale, username, password, full=True, priority=priority)
+        for job in as_completed(jobs):
+            if job.state == DONE and job.result: baselines[job.name] = _baseline(job.name)
+            else: print_warning(f"⚠️ {job.name}: không lấy được cấu hình, sẽ đẩy toàn bộ lệnh")
+    report = []
+    for device, commands in plan:
+        status, to_push = _compare(device, commands, baselines.get(device["name"]))
+        report.append({"device": device, "status": status, "commands": to_push})
+    return report
+
+def print_compliance_report(report, show_commands=False):
+    """In kế hoạch sau kiểm tra tuân thủ: số thiết bị bỏ qua / đẩy một phần / đẩy toàn bộ."""
+    counts = {status: 0 for status in (PLAN_SKIP, PLAN_PARTIAL, PLAN_FULL)}
+    for item in report:
+        counts[item["status"]] += 1
+    console.rule("[bold yellow]Kiểm tra tuân thủ[/bold yellow]")
+    for item in report:
+        if item["status"] == PLAN_SKIP:
+            continue
+        label = "một phần" if item["status"] == PLAN_PARTIAL else "toàn bộ"
+        print_info(f"📋 {item['device']['name']}: đẩy {label} ({len(item['commands'])} lệnh)")
+        if show_commands and item["status"] == PLAN_PARTIAL:
+            console.print("\n".join(item["commands"]), markup=False, highlight=False)
+    print_info(f"Tổng: {counts[PLAN_SKIP]} thiết bị đã tuân thủ (bỏ qua), {counts[PLAN_PARTIAL]} đẩy một phần, "
+               f"{counts[PLAN_FULL]} đẩy toàn bộ.")
+
+def apply_compliance(plan, username, password, policy=None, priority=PRIORITY_NORMAL, show_commands=False):
+    """
+    Kiểm tra tuân thủ và in kế hoạch nếu policy bật check_compliance. Trả về (plan cần đẩy, tên thiết bị bỏ qua).
+    """
+    policy = {**load_push_policy(), **(policy or {})}
+    if not policy["check_compliance"]:
+        return plan, []
+    report = check_compliance(plan, username, password, policy["backup_max_age"], priority=priority)
+    print_compliance_report(report, show_commands=show_commands)
+    return ([(item["device"], item["commands"]) for item in report if item["status"] != PLAN_SKIP],
+            [item["device"]["name"] for item in report if item["status"] == PLAN_SKIP])
+
+def print_push_summary(outcome):
+    counts = {}
+    for state in outcome["results"].values():
+        counts[state] = counts.get(state, 0) + 1
+    console.rule("[bold green]Tổng kết[/bold green]")
+    print_info(f"{counts.get(PUSH_OK, 0)} thành công, {counts.get(PUSH_COMPLIANT, 0)} đã tuân thủ, {counts.get(PUSH_FAILED, 0)} lỗi, "
+               f"{counts.get(PUSH_SKIPPED, 0)} bỏ qua, {counts.get(PUSH_CANCELLED, 0)} chưa chạy "
+               f"/ {len(outcome['results'])} thiết bị.")
+    if outcome["stopped"]:
+        print_error(f"⛔ Đã dừng: {outcome['stopped']}")
+
+def render_plan(template, devices, variables=None, device_variables=None):
+    """
+    Render lệnh riêng cho từng thiết bị. Biến được gộp theo thứ tự (sau ghi đè trước): mặc định của mẫu
+    < biến inventory (core/device_vars.py) < `variables` chung < `device_variables[tên thiết bị]`.
+    Trả về (plan, errors): plan là danh sách (device, commands), errors là {tên: lỗi} của thiết bị không render được.
+    """
+    variables, device_variables = variables or {}, device_variables or {}
+    plan, errors = [], {}
+    for device in devices:
+        context = device_vars.for_device(device)
+        context.update(variables)
+        context.update(device_variables.get(device["name"]) or {})
+        try:
+            plan.append((device, template.render(context)))
+        except TemplateError as e:
+            errors[device["name"]] = str(e)
+    return plan, errors
+
+# --- FILE JOB ---
+def select_targets(vendor, targets=None):
+    """
+    Chọn thiết bị có device_type `vendor` theo bộ lọc của file job:
+    branch (mã chi nhánh), name (mẫu tên kiểu 'HN-SW-*'), exclude (mẫu tên bỏ qua); mỗi khóa nhận chuỗi hoặc danh sách.
+    """
+    def _list(value):
+        return [str(v) for v in ([] if value is None else value if isinstance(value, list) else [value])]
+    targets = targets or {}
+    branches = [b.upper() for b in _list(targets.get("branch"))]
+    patterns, excludes = _list(targets.get("name")), _list(targets.get("exclude"))
+    records = get_inventory().by_device_type(vendor)
+    if branches: records = [r for r in records if any(r.name.upper().startswith(b) for b in branches)]
+    if patterns: records = [r for r in records if any(fnmatch.fnmatchcase(r.name, p) for p in patterns)]
+    if excludes: records = [r for r in records if not any(fnmatch.fnmatchcase(r.name, p) for p in excludes)]
+    return [r.as_dict() for r in records]
+
+def load_push_job(path):
+    """
+    Đọc file job đẩy cấu hình (YAML). Trả về (template, plan, policy, errors) với plan là danh sách
+    (device, commands) và errors là {tên thiết bị: lỗi render} (xem render_plan).
+    Định dạng:
+        vendor: cisco_ios                 # thư mục hãng trong core/templates, cũng là device_type của thiết bị
+        template: snmp_readonly           # id (tên file không đuôi) hoặc tên hiển thị của mẫu
+        variables:                        # biến chung, ghi đè mặc định của mẫu và biến inventory
+          community_string: noc-ro
+        device_variables:                 # biến riêng từng thiết bị
+          HN-SW-01: {community_string: hn-ro}
+        targets:
+          branch: [HN, HCM]
+          name: "*-SW-*"
+          exclude: "*-LAB-*"
+        wave_size: 50                     # các khóa chính sách, mặc định lấy từ .env (PUSH_*)
+        canaries: 2
+        max_failures: 0
+        max_failure_rate: 0.1
+        check_compliance: true            # bỏ qua thiết bị đã có đủ, chỉ đẩy dòng còn thiếu
+        backup_max_age: 24                # giờ
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        job = yaml.safe_load(f) or {}
+    vendor, key = job.get("vendor"), job.get("template")
+    template = template_registry.get(vendor, key) if vendor and key else None
+    if template is None:
+        error = next((e for p, e in template_registry.errors.items()
+                      if os.path.splitext(os.path.basename(p))[0] == str(key)), None)
+        raise ValueError(f"Không tìm thấy mẫu '{key}' của hãng '{vendor}'" + (f": {error}" if error else ""))
+    plan, errors = render_plan(template, select_targets(vendor, job.get("targets")),
+                               job.get("variables"), job.get("device_variables"))
+    policy = {k: job[k] for k in load_push_policy() if k in job}
+    return template, plan, policy, errors
+
+def _print_job_plan(template, plan, policy):
+    policy = {**load_push_policy(), **policy}
+    waves = plan_waves(plan, policy["wave_size"], policy["canaries"])
+    print_info(f"📋 Mẫu '{template.name}' ({template.vendor}) → {len(plan)} thiết bị, {len(waves)} đợt "
+               f"(canary {min(policy['canaries'], len(plan))}, tối đa {policy['wave_size']}/đợt, "
+               f"dừng khi > {policy['max_failures']} lỗi hoặc > {policy['max_failure_rate']:.0%} lỗi trong một đợt)")
+    for index, wave in enumerate(waves, 1):
+        print(f"  Đợt {index}: " + ", ".join(device["name"] for device, _ in wave))
+    if plan:
+        device, commands = plan[0]
+        print_info(f"Lệnh cho {device['name']}:")
+        console.print("\n".join(commands), markup=False, highlight=False)
+
+def run_push_job(path, dry_run=False, assume_yes=False, priority=PRIORITY_BACKGROUND, check=None):
+    """
+    Đẩy cấu hình theo file job (dùng cho menu và cron). check=False bỏ qua kiểm tra tuân thủ (đẩy toàn bộ).
+    Trả về kết quả run_push; None nếu chỉ dry-run hoặc người dùng hủy; JOB_ERROR nếu không chạy được job.
+    """
+    username, password = load_credentials()
+    if not username or not password: print_error("Không tìm thấy credentials."); return JOB_ERROR
+    try:
+        template, plan, policy, errors = load_push_job(path)
+    except (OSError, yaml.YAMLError, ValueError) as e:
+        print_error(f"Không đọc được file job {path}: {e}"); return JOB_ERROR
+    for name, error in sorted(errors.items()): print_warning(f"⚠️ {name}: không render được mẫu - {error}")
+    if not plan: print_error("Không có thiết bị nào khớp bộ lọc targets."); return JOB_ERROR
+    if check is not None: policy["check_compliance"] = check
+    plan, compliant = apply_compliance(plan, username, password, policy, priority=priority, show_commands=dry_run)
+    if not plan:
+        print_success("✅ Mọi thiết bị đã có đủ cấu hình, không cần đẩy.")
+        return {"results": dict.fromkeys(compliant, PUSH_COMPLIANT), "stopped": None}
+    _print_job_plan(template, plan, policy)
+    if dry_run: return None
+    if not assume_yes and Prompt.ask(f"Nhập 'YES' để đẩy lên {len(plan)} thiết bị") != "YES":
+        print_info("Đã hủy."); return None
+    outcome = run_push(plan, username, password, policy, priority=priority)
+    outcome["results"].update(dict.fromkeys(compliant, PUSH_COMPLIANT))
+    print_push_summary(outcome)
+    return outcome
+
+def main():
+    parser = argparse.ArgumentParser(description="Đẩy một mẫu cấu hình lên nhiều thiết bị theo đợt, theo file job YAML.")
+    parser.add_argument("job", help="File job YAML")
+    parser.add_argument("--dry-run", action="store_true", help="Chỉ in kế hoạch các đợt và lệnh, không đẩy")
+    parser.add_argument("--yes", action="store_true", help="Không hỏi xác nhận (dùng cho cron)")
+    parser.add_argument("--no-check", action="store_true", help="Không kiểm tra tuân thủ, đẩy toàn bộ lệnh lên mọi thiết bị")
+    args = parser.parse_args()
+    outcome = run_push_job(args.job, dry_run=args.dry_run, assume_yes=args.yes, check=False if args.no_check else None)
+    # Mã thoát khác 0 khi không chạy được job, engine dừng vì lỗi hoặc có thiết bị lỗi, để cron / giám sát phát hiện
+    if outcome == JOB_ERROR:
+        sys.exit(1)
+    if outcome and (outcome["stopped"] or any(state == PUSH_FAILED for state in outcome["results"].values())):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
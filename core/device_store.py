@@ -0,0 +1,325 @@
+# core/device_store.py
+import os
+import sys
+import sqlite3
+import argparse
+from contextlib import closing
+
+from core.ui import print_warning, print_info, print_success, print_error
+
+DATA_FILE = "data/devices.txt"
+DB_FILE = "data/devices.db"
+
+# Các cột tùy chọn sau 3 cột bắt buộc name,ip,device_type (theo đúng thứ tự này trong file CSV)
+EXTRA_FIELDS = ("site", "tags", "snmp_community", "port")
+
+class DuplicateDeviceError(Exception):
+    """Thêm thiết bị có tên đã tồn tại trong danh sách."""
+
+class DeviceRecord:
+    """Một thiết bị trong danh sách. Dùng __slots__ để danh sách lớn vẫn tốn ít bộ nhớ."""
+    __slots__ = ("name", "ip", "device_type", "site", "tags", "snmp_community", "port")
+
+    def __init__(self, name, ip, device_type, site=None, tags=None, snmp_community=None, port=None):
+        self.name = name
+        self.ip = ip
+        self.device_type = device_type
+        self.site = site or None
+        self.tags = tuple(tags) if tags else ()
+        self.snmp_community = snmp_community or None
+        self.port = int(port) if port else None
+
+    @property
+    def branch(self):
+        """Mã chi nhánh là phần đứng trước dấu '-' đầu tiên của tên (vd: 'HN-Router' -> 'HN')."""
+        return self.name.split("-", 1)[0].upper()
+
+    def extras(self):
+        """Các cột tùy chọn đã được đặt giá trị, dạng dict."""
+        extras = {}
+        if self.site: extras["site"] = self.site
+        if self.tags: extras["tags"] = list(self.tags)
+        if self.snmp_community: extras["snmp_community"] = self.snmp_community
+        if self.port: extras["port"] = self.port
+        return extras
+
+    def info(self):
+        """Dạng dict {ip, device_type, ...} giống giá trị trả về của load_devices()."""
+        return {"ip": self.ip, "device_type": self.device_type, **self.extras()}
+
+    def as_dict(self):
+        """Dạng dict {name, ip, device_type, ...} mà các chức năng SSH/backup sử dụng."""
+        return {"name": self.name, **self.info()}
+
+    @classmethod
+    def from_info(cls, name, info):
+        """Tạo record từ một cặp (name, info) theo định dạng của load_devices()."""
+        return cls(name, info["ip"], info["device_type"], info.get("site"), info.get("tags"),
+                   info.get("snmp_community"), info.get("port"))
+
+# --- ĐỊNH DẠNG CSV (data/devices.txt) ---
+def parse_csv_line(line):
+    """
+    Phân tích một dòng `name,ip,device_type[,site[,tags[,snmp_community[,port]]]]`.
+    Tags cách nhau bởi dấu ';'. Trả về DeviceRecord, hoặc ném ValueError nếu dòng sai định dạng.
+    """
+    fields = [f.strip() for f in line.strip().split(",")]
+    if not 3 <= len(fields) <= 3 + len(EXTRA_FIELDS):
+        raise ValueError(line)
+    name, ip, dtype = fields[:3]
+    extras = dict(zip(EXTRA_FIELDS, fields[3:]))
+    if extras.get("port") and not extras["port"].isdigit():
+        raise ValueError(line)
+    tags = [t for t in extras.get("tags", "").split(";") if t]
+    # device_type lặp lại rất nhiều lần: intern để các record dùng chung một chuỗi
+    return DeviceRecord(name, ip, sys.intern(dtype), extras.get("site"), tags,
+                        extras.get("snmp_community"), extras.get("port"))
+
+def format_csv_line(record):
+    """Ngược lại với parse_csv_line; bỏ các cột tùy chọn rỗng ở cuối để giữ định dạng 3 cột cũ."""
+    fields = [record.name, record.ip, record.device_type,
+              record.site or "", ";".join(record.tags), record.snmp_community or "",
+              str(record.port) if record.port else ""]
+    while len(fields) > 3 and not fields[-1]:
+        fields.pop()
+    return ",".join(fields)
+
+def read_csv_records(path):
+    """Đọc toàn bộ file CSV. Tên trùng: dòng sau ghi đè dòng trước nhưng giữ vị trí cũ."""
+    records = {}
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                try:
+                    record = parse_csv_line(line)
+                except ValueError:
+                    print_warning(f"⚠️ Bỏ qua dòng lỗi: {line.strip()}")
+                    continue
+                records[record.name] = record
+    return list(records.values())
+
+class CsvDeviceStore:
+    """Lưu trữ mặc định: file văn bản data/devices.txt, mỗi thiết bị một dòng."""
+
+    def __init__(self, path=DATA_FILE):
+        self.path = path
+
+    def ensure(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if not os.path.exists(self.path):
+            open(self.path, "w").close()
+
+    def signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def read_records(self):
+        return read_csv_records(self.path)
+
+    def write_records(self, records):
+        self.ensure()
+        with open(self.path, "w") as f:
+            for record in records:
+                f.write(format_csv_line(record) + "\n")
+
+    def insert(self, record):
+        """Thêm một thiết bị mới; ném DuplicateDeviceError nếu tên đã có trong file."""
+        self.ensure()
+        if any(r.name == record.name for r in self.read_records()):
+            raise DuplicateDeviceError(record.name)
+        with open(self.path, "a+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(f.tell() - 1)
+                if f.read(1) != "\n":
+                    f.write("\n")
+            f.write(format_csv_line(record) + "\n")
+
+    def upsert(self, record):
+        records = {r.name: r for r in self.read_records()}
+        records[record.name] = record
+        self.write_records(records.values())
+
+    def delete(self, name):
+        records = [r for r in self.read_records() if r.name != name]
+        self.write_records(records)
+
+class SqliteDeviceStore:
+    """
+    Lưu trữ tùy chọn bằng SQLite: thêm/xóa từng dòng trong transaction, an toàn khi
+    nhiều tiến trình (TUI, monitor service) cùng ghi. Có chỉ mục theo tên, IP, chi nhánh, loại thiết bị.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS devices (
+            name TEXT PRIMARY KEY,
+            ip TEXT NOT NULL,
+            device_type TEXT NOT NULL,
+            branch TEXT NOT NULL,
+            site TEXT,
+            tags TEXT,
+            snmp_community TEXT,
+            port INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_devices_ip ON devices(ip);
+        CREATE INDEX IF NOT EXISTS idx_devices_branch ON devices(branch);
+        CREATE INDEX IF NOT EXISTS idx_devices_type ON devices(device_type);
+    """
+    COLUMNS = "name, ip, device_type, site, tags, snmp_community, port"
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        return conn
+
+    def ensure(self, import_from=DATA_FILE):
+        """Tạo schema; lần đầu tạo DB sẽ tự nhập dữ liệu từ file CSV hiện có (nếu có)."""
+        if self._ready:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        is_new = not os.path.exists(self.path)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(self.SCHEMA)
+        self._ready = True
+        if is_new and import_from and os.path.exists(import_from):
+            count = self.import_csv(import_from)
+            if count:
+                print_info(f"Đã nhập {count} thiết bị từ {import_from} vào {self.path}.")
+
+    def signature(self):
+        """mtime/kích thước của file DB và file WAL: đổi khi có tiến trình khác ghi."""
+        signature = []
+        for path in (self.path, self.path + "-wal"):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    @staticmethod
+    def _to_row(record):
+        return (record.name, record.ip, record.device_type, record.branch, record.site,
+                ";".join(record.tags) or None, record.snmp_community, record.port)
+
+    @staticmethod
+    def _from_row(row):
+        name, ip, dtype, site, tags, community, port = row
+        return DeviceRecord(name, ip, sys.intern(dtype), site, (tags or "").split(";") if tags else None,
+                            community, port)
+
+    def _query(self, where="", params=()):
+        self.ensure()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT {self.COLUMNS} FROM devices {where} ORDER BY rowid", params).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def read_records(self):
+        return self._query()
+
+    def get(self, name):
+        records = self._query("WHERE name = ?", (name,))
+        return records[0] if records else None
+
+    def find_by_ip(self, ip):
+        return self._query("WHERE ip = ?", (ip,))
+
+    def find_by_branch(self, branch):
+        return self._query("WHERE branch = ?", (branch.upper(),))
+
+    def find_by_device_type(self, device_type):
+        return self._query("WHERE device_type = ?", (device_type,))
+
+    def insert(self, record):
+        """Thêm đúng một thiết bị mới; ném DuplicateDeviceError nếu tên đã tồn tại (ràng buộc khóa chính)."""
+        self.ensure()
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT INTO devices (name, ip, device_type, branch, site, tags, snmp_community, port) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._to_row(record))
+        except sqlite3.IntegrityError:
+            raise DuplicateDeviceError(record.name) from None
+
+    def upsert(self, record):
+        """Thêm hoặc cập nhật đúng một thiết bị trong một transaction."""
+        self.ensure()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO devices (name, ip, device_type, branch, site, tags, snmp_community, port) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET ip=excluded.ip, device_type=excluded.device_type, "
+                "branch=excluded.branch, site=excluded.site, tags=excluded.tags, "
+                "snmp_community=excluded.snmp_community, port=excluded.port",
+                self._to_row(record))
+
+    def delete(self, name):
+        """Xóa đúng một thiết bị trong một transaction."""
+        self.ensure()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM devices WHERE name = ?", (name,))
+
+    def write_records(self, records):
+        """Đồng bộ toàn bộ danh sách trong một transaction, chỉ ghi các dòng thay đổi."""
+        self.ensure()
+        records = list(records)
+        current = {r.name: self._to_row(r) for r in self.read_records()}
+        wanted = {r.name: self._to_row(r) for r in records}
+        with closing(self._connect()) as conn, conn:
+            removed = [(name,) for name in current if name not in wanted]
+            conn.executemany("DELETE FROM devices WHERE name = ?", removed)
+            changed = [row for name, row in wanted.items() if current.get(name) != row]
+            conn.executemany(
+                "INSERT OR REPLACE INTO devices (name, ip, device_type, branch, site, tags, snmp_community, port) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", changed)
+
+    def import_csv(self, path=DATA_FILE):
+        """Nhập (ghi đè theo tên) toàn bộ thiết bị từ file CSV. Trả về số thiết bị đã nhập."""
+        records = read_csv_records(path)
+        self.ensure(import_from=None)
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO devices (name, ip, device_type, branch, site, tags, snmp_community, port) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [self._to_row(r) for r in records])
+        return len(records)
+
+    def export_csv(self, path=DATA_FILE):
+        """Xuất toàn bộ thiết bị ra file CSV theo định dạng của data/devices.txt."""
+        CsvDeviceStore(path).write_records(self.read_records())
+
+def create_store(backend="csv", db_path=DB_FILE):
+    """Tạo đối tượng lưu trữ theo cấu hình INVENTORY_BACKEND ('csv' hoặc 'sqlite')."""
+    if backend == "sqlite":
+        return SqliteDeviceStore(db_path)
+    return CsvDeviceStore(DATA_FILE)
+
+def main():
+    parser = argparse.ArgumentParser(description="Nhập/xuất danh sách thiết bị giữa CSV và SQLite.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("--csv", default=DATA_FILE, help="Đường dẫn file CSV")
+    parser.add_argument("--db", default=DB_FILE, help="Đường dẫn file SQLite")
+    args = parser.parse_args()
+
+    store = SqliteDeviceStore(args.db)
+    try:
+        if args.action == "import":
+            count = store.import_csv(args.csv)
+            print_success(f"Đã nhập {count} thiết bị từ {args.csv} vào {args.db}.")
+        else:
+            store.export_csv(args.csv)
+            print_success(f"Đã xuất danh sách thiết bị từ {args.db} ra {args.csv}.")
+    except (OSError, sqlite3.Error) as e:
+        print_error(f"Lỗi: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# core/device_vars.py
+"""
+Biến riêng của thiết bị dùng khi điền mẫu cấu hình (core/template_registry.py), khai báo trong
+data/device_vars.yaml:
+
+    all:                       # mọi thiết bị
+      ntp_server: 10.0.0.1
+    branches:                  # theo mã chi nhánh (phần trước dấu '-' của tên thiết bị)
+      HN: {site_vlan: 10}
+    groups:                    # theo tag của thiết bị (cột tags trong danh sách thiết bị)
+      core: {stp_priority: 4096}
+    devices:                   # theo tên thiết bị
+      HN-SW-01: {loopback_ip: 10.255.0.1}
+
+Thứ tự ưu tiên (sau ghi đè trước): all < branches < groups < devices. Ngoài ra mỗi thiết bị luôn có
+các biến DEVICE_FACTS lấy từ danh sách thiết bị.
+"""
+import os
+import threading
+
+import yaml
+
+from core.ui import print_warning
+
+DEVICE_VARS_FILE = "data/device_vars.yaml"
+# Biến có sẵn cho mọi thiết bị, mẫu được dùng mà không cần khai báo trong 'variables'
+DEVICE_FACTS = ("device_name", "device_ip", "device_type", "branch", "site")
+
+def device_facts(device):
+    """Các biến DEVICE_FACTS của một thiết bị (dict có name/ip/device_type như load_devices())."""
+    return {"device_name": device["name"], "device_ip": device.get("ip"), "device_type": device.get("device_type"),
+            "branch": device["name"].split("-", 1)[0].upper(), "site": device.get("site")}
+
+class DeviceVars:
+    """Nội dung data/device_vars.yaml, chỉ đọc lại khi file thay đổi mtime/kích thước."""
+
+    def __init__(self, path=DEVICE_VARS_FILE):
+        self.path = path
+        self._signature = None
+        self._lock = threading.Lock()
+        self._data = {}
+        self._scoped = {}  # (chi nhánh, tags) -> biến đã gộp all/branches/groups, dùng chung cho nhiều thiết bị
+
+    def refresh(self):
+        """Đọc lại file nếu đã thay đổi kể từ lần đọc trước (file không tồn tại = không có biến)."""
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        if signature == self._signature:
+            return
+        with self._lock:
+            data = {}
+            if signature:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        data = yaml.safe_load(f) or {}
+                    if not isinstance(data, dict):
+                        raise ValueError("nội dung phải là một mapping (all / branches / groups / devices)")
+                except (OSError, yaml.YAMLError, ValueError) as e:
+                    # File lỗi bị bỏ qua (cảnh báo một lần cho mỗi phiên bản file): mẫu cần biến từ file này
+                    # sẽ báo lỗi render riêng cho từng thiết bị thay vì làm hỏng cả lượt đẩy
+                    print_warning(f"⚠️ Bỏ qua {self.path}: {e}")
+                    data = {}
+            self._data, self._scoped, self._signature = data, {}, signature
+
+    def _scope(self, branch, tags):
+        key = (branch, tags)
+        merged = self._scoped.get(key)
+        if merged is None:
+            merged = dict(self._data.get("all") or {})
+            merged.update((self._data.get("branches") or {}).get(branch) or {})
+            groups = self._data.get("groups") or {}
+            for tag in tags:
+                merged.update(groups.get(tag) or {})
+            self._scoped[key] = merged
+        return merged
+
+    def for_device(self, device):
+        """Biến đã gộp của một thiết bị: DEVICE_FACTS < all < branches < groups < devices."""
+        self.refresh()
+        facts = device_facts(device)
+        variables = {**facts, **self._scope(facts["branch"], tuple(device.get("tags") or ()))}
+        variables.update((self._data.get("devices") or {}).get(device["name"]) or {})
+        return variables
+
+# Biến thiết bị dùng chung cho toàn bộ ứng dụng
+device_vars = DeviceVars()
@@ -1,35 +1,152 @@
 # core/devices.py
 import os
-from core.ui import console, create_table, print_success, print_warning, print_error
-
-DATA_FILE = "data/devices.txt"
+import threading
+import ipaddress
+from core.ui import console, create_table, print_success, print_warning, print_error, print_info
+from core.utils import load_inventory_config
+from core.device_store import DATA_FILE, DeviceRecord, DuplicateDeviceError, create_store
 
 def ensure_data_file():
-    """Tạo thư mục và file nếu chưa có"""
+    """Tạo thư mục và file (hoặc schema SQLite) nếu chưa có"""
     os.makedirs("data", exist_ok=True)
-    if not os.path.exists(DATA_FILE):
-        open(DATA_FILE, "w").close()
+    _store.ensure()
+
+def _subnet_key(ip):
+    """Khóa chỉ mục subnet /24 của một địa chỉ IPv4 (vd: '10.10.0.0/24'), None nếu IP không hợp lệ."""
+    parts = ip.split(".")
+    if len(parts) != 4 or not all(p.isdigit() and int(p) <= 255 for p in parts):
+        return None
+    return f"{int(parts[0])}.{int(parts[1])}.{int(parts[2])}.0/24"
+
+class DeviceInventory:
+    """
+    Danh sách thiết bị được đọc một lần và giữ trong bộ nhớ.
+    Chỉ đọc lại khi nơi lưu trữ (file CSV hoặc SQLite) thay đổi mtime/kích thước,
+    kèm các chỉ mục dựng sẵn theo chi nhánh, loại thiết bị và subnet /24.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._signature = None
+        self._lock = threading.Lock()
+        self._records = []
+        self._by_name = {}
+        self._by_branch = {}
+        self._by_type = {}
+        self._by_subnet = {}
+        self._branch_names = {}
+
+    def refresh(self):
+        """Đọc lại danh sách nếu nơi lưu trữ đã thay đổi kể từ lần đọc trước."""
+        signature = self.store.signature()
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature != self._signature:
+                self._load()
+                self._signature = signature
+
+    def invalidate(self):
+        """Buộc lần refresh() tiếp theo phải đọc lại file."""
+        self._signature = None
+
+    def _load(self):
+        records = self.store.read_records()
+        by_name = {record.name: record for record in records}
+
+        by_branch, by_type, by_subnet = {}, {}, {}
+        for record in records:
+            by_branch.setdefault(record.branch, []).append(record)
+            by_type.setdefault(record.device_type, []).append(record)
+            subnet = _subnet_key(record.ip)
+            if subnet:
+                by_subnet.setdefault(subnet, []).append(record)
+
+        # Gán một lượt để các thread đang đọc luôn thấy bộ chỉ mục nhất quán
+        self._records, self._by_name = records, by_name
+        self._by_branch, self._by_type, self._by_subnet = by_branch, by_type, by_subnet
+        self._branch_names = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    def all(self):
+        """Toàn bộ DeviceRecord theo thứ tự trong file."""
+        return list(self._records)
+
+    def get(self, name):
+        """Tìm thiết bị theo tên, None nếu không có."""
+        return self._by_name.get(name)
+
+    def as_dict(self):
+        """Dạng {name: {ip, device_type, ...}} tương thích với load_devices()."""
+        return {record.name: record.info() for record in self._records}
+
+    def by_branch(self, prefix):
+        """Các thiết bị có tên bắt đầu bằng `prefix` (không phân biệt hoa thường)."""
+        prefix = prefix.upper()
+        if "-" in prefix:
+            return [r for r in self._records if r.name.upper().startswith(prefix)]
+        # Tên bắt đầu bằng prefix <=> mã chi nhánh bắt đầu bằng prefix (prefix không chứa '-')
+        matches = []
+        for branch, records in self._by_branch.items():
+            if branch.startswith(prefix):
+                matches.extend(records)
+        return matches
+
+    def names_in_branch(self, prefix):
+        """Tập tên thiết bị thuộc một chi nhánh, được ghi nhớ cho tới lần đọc lại file."""
+        prefix = prefix.upper()
+        names = self._branch_names.get(prefix)
+        if names is None:
+            names = frozenset(r.name for r in self.by_branch(prefix))
+            self._branch_names[prefix] = names
+        return names
+
+    def by_device_type(self, device_type):
+        """Các thiết bị có device_type đúng bằng giá trị cho trước."""
+        return list(self._by_type.get(device_type, []))
+
+    def by_vendor(self, keyword):
+        """Các thiết bị có device_type chứa `keyword` (vd: 'fortinet', 'cisco')."""
+        matches = []
+        for device_type, records in self._by_type.items():
+            if keyword in device_type:
+                matches.extend(records)
+        return matches
+
+    def in_subnet(self, cidr):
+        """Các thiết bị có IP nằm trong subnet cho trước (vd: '10.10.0.0/16')."""
+        network = ipaddress.ip_network(cidr, strict=False)
+        if network.prefixlen >= 24:
+            candidates = self._by_subnet.get(str(network.supernet(new_prefix=24)), [])
+        else:
+            candidates = []
+            for subnet, records in self._by_subnet.items():
+                if ipaddress.ip_network(subnet).subnet_of(network):
+                    candidates.extend(records)
+        return [r for r in candidates if ipaddress.ip_address(r.ip) in network]
+
+# Nơi lưu trữ và danh sách thiết bị dùng chung cho toàn bộ ứng dụng
+_store = create_store(*load_inventory_config())
+inventory = DeviceInventory(_store)
+
+def get_inventory():
+    """Trả về inventory dùng chung, đã được đọc lại nếu file thay đổi."""
+    ensure_data_file()
+    inventory.refresh()
+    return inventory
 
 def load_devices():
     """Đọc danh sách thiết bị"""
-    ensure_data_file()
-    devices = {}
-    with open(DATA_FILE, "r") as f:
-        for line in f:
-            if line.strip():
-                try:
-                    name, ip, dtype = line.strip().split(",")
-                    devices[name] = {"ip": ip, "device_type": dtype}
-                except ValueError:
-                    print_warning(f"⚠️ Bỏ qua dòng lỗi: {line.strip()}")
-    return devices
+    return get_inventory().as_dict()
 
 def save_devices(devices):
     """Ghi lại danh sách thiết bị"""
     ensure_data_file()
-    with open(DATA_FILE, "w") as f:
-        for name, info in devices.items():
-            f.write(f"{name},{info['ip']},{info['device_type']}\n")
+    _store.write_records(DeviceRecord.from_info(name, info) for name, info in devices.items())
+    # mtime có thể không đổi nếu ghi hai lần trong cùng một tick đồng hồ
+    inventory.invalidate()
 
 def add_device():
     """Thêm thiết bị mới"""
@@ -39,13 +156,18 @@ def add_device():
     ip = input("Địa chỉ IP: ").strip()
     dtype = input("Loại thiết bị (vd: cisco_ios, fortinet, mikrotik): ").strip()
 
-    devices = load_devices()
-    if name in devices:
+    if get_inventory().get(name) is not None:
         print_warning("⚠️ Thiết bị này đã tồn tại!")
         return
 
-    devices[name] = {"ip": ip, "device_type": dtype}
-    save_devices(devices)
+    # Không ghi đè: chỉ mục trong bộ nhớ có thể đã cũ, hoặc tiến trình khác vừa thêm cùng tên
+    try:
+        _store.insert(DeviceRecord(name, ip, dtype))
+    except DuplicateDeviceError:
+        inventory.invalidate()
+        print_warning("⚠️ Thiết bị này đã tồn tại!")
+        return
+    inventory.invalidate()
     print_success(f"✅ Đã thêm thiết bị {name} ({ip})")
 
 def list_devices():
@@ -92,10 +214,9 @@ def delete_device():
             confirm = input(f"⚠️ Bạn có chắc chắn muốn xóa '{device_to_delete}' không? (y/n): ").strip().lower()
 
             if confirm == 'y':
-                # Xóa thiết bị khỏi dictionary
-                del devices[device_to_delete]
-                # Lưu lại danh sách mới vào file
-                save_devices(devices)
+                # Chỉ xóa đúng dòng của thiết bị này trong nơi lưu trữ
+                _store.delete(device_to_delete)
+                inventory.invalidate()
                 print_success(f"Đã xóa thành công thiết bị '{device_to_delete}'.")
             else:
                 print_info("Hủy bỏ thao tác xóa.")
@@ -0,0 +1,199 @@
+# core/job_scheduler.py
+import heapq
+import itertools
+import queue
+import threading
+
+from core.circuit_breaker import precheck_device
+
+# Độ ưu tiên: số nhỏ hơn chạy trước
+PRIORITY_INTERACTIVE = 0   # Thao tác người dùng đang chờ trên màn hình
+PRIORITY_NORMAL = 5        # Thao tác hàng loạt do người dùng khởi động (bulk push, health)
+PRIORITY_BACKGROUND = 10   # Tác vụ nền / định kỳ (backup hằng đêm)
+
+SCHEDULER_MAX_WORKERS = 32     # Số thao tác SSH đồng thời tối đa trên toàn hệ thống
+SCHEDULER_MAX_PER_BRANCH = 8   # Số thao tác đồng thời tối đa trong một chi nhánh
+SCHEDULER_MAX_PER_VENDOR = 16  # Số thao tác đồng thời tối đa trên một loại thiết bị (giảm tải AAA/TACACS)
+
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "PENDING", "RUNNING", "DONE", "FAILED", "CANCELLED"
+SKIPPED = "SKIPPED"  # Thiết bị bị circuit breaker / kiểm tra TCP chặn, job không được chạy
+
+class Job:
+    """Một thao tác trên một thiết bị, được chạy bởi JobScheduler."""
+
+    def __init__(self, func, args, kwargs, priority, name, branch, vendor, device=None):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.name = name
+        self.branch = branch
+        self.vendor = vendor
+        self.device = device
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def done(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """Chờ job kết thúc và trả về kết quả (None nếu bị hủy hoặc lỗi)."""
+        self._event.wait(timeout)
+        return self.result
+
+    def cancel(self):
+        """Hủy job nếu chưa chạy. Trả về False nếu job đã chạy hoặc đã xong."""
+        with self._lock:
+            if self.state != PENDING:
+                return False
+            self.state = CANCELLED
+        self._finish()
+        return True
+
+    def _start(self):
+        with self._lock:
+            if self.state != PENDING:
+                return False
+            self.state = RUNNING
+            return True
+
+    def _finish(self):
+        self._event.set()
+        for callback in list(self._callbacks):
+            callback(self)
+
+    def _add_done_callback(self, callback):
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+class JobScheduler:
+    """
+    Hàng đợi dùng chung cho các thao tác SSH trên toàn bộ thiết bị.
+    - Giới hạn số worker toàn cục, và số job đồng thời theo chi nhánh / loại thiết bị.
+    - Job có độ ưu tiên cao (số nhỏ) được chạy trước; job chưa chạy có thể hủy.
+    - as_completed() trả kết quả về ngay khi từng job xong.
+    - gate(device) chạy trước mỗi job có thiết bị: trả về lý do (chuỗi) thì job kết thúc ngay với trạng thái SKIPPED.
+    """
+
+    def __init__(self, max_workers=SCHEDULER_MAX_WORKERS, max_per_branch=SCHEDULER_MAX_PER_BRANCH,
+                 max_per_vendor=SCHEDULER_MAX_PER_VENDOR, gate=None):
+        self.gate = gate
+        self.max_workers = max_workers
+        self.max_per_branch = max_per_branch
+        self.max_per_vendor = max_per_vendor
+        self._heap = []
+        self._seq = itertools.count()
+        self._running_branch = {}
+        self._running_vendor = {}
+        self._workers = 0
+        self._idle_workers = 0
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def _device_keys(device):
+        if not device:
+            return None, None
+        branch = device.get("name", "").split("-", 1)[0].upper() or None
+        return branch, device.get("device_type")
+
+    def submit(self, func, *args, device=None, priority=PRIORITY_NORMAL, name=None, **kwargs):
+        """
+        Đưa một thao tác vào hàng đợi. `device` (dict có name/device_type) dùng để
+        áp giới hạn theo chi nhánh và loại thiết bị.
+        """
+        branch, vendor = self._device_keys(device)
+        job = Job(func, args, kwargs, priority, name or (device or {}).get("name"), branch, vendor, device)
+        with self._cond:
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            # Thêm worker khi số job đang chờ vượt số worker rảnh (không chỉ khi không còn worker rảnh nào)
+            if len(self._heap) > self._idle_workers and self._workers < self.max_workers:
+                self._workers += 1
+                threading.Thread(target=self._worker_loop, daemon=True).start()
+            self._cond.notify_all()
+        return job
+
+    def map_devices(self, func, devices, *args, priority=PRIORITY_NORMAL, **kwargs):
+        """Tạo một job func(device, *args, **kwargs) cho mỗi thiết bị. Trả về danh sách Job."""
+        return [self.submit(func, device, *args, device=device, priority=priority, **kwargs) for device in devices]
+
+    def _can_run(self, job):
+        if job.branch and self._running_branch.get(job.branch, 0) >= self.max_per_branch:
+            return False
+        if job.vendor and self._running_vendor.get(job.vendor, 0) >= self.max_per_vendor:
+            return False
+        return True
+
+    def _next_job(self):
+        """Phải giữ lock. Lấy job ưu tiên cao nhất chưa bị giới hạn chặn, None nếu không có."""
+        skipped, chosen = [], None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            job = entry[2]
+            if job.state != PENDING:
+                continue  # Đã bị hủy
+            if self._can_run(job):
+                chosen = job
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        return chosen
+
+    def _adjust(self, job, delta):
+        if job.branch:
+            self._running_branch[job.branch] = self._running_branch.get(job.branch, 0) + delta
+        if job.vendor:
+            self._running_vendor[job.vendor] = self._running_vendor.get(job.vendor, 0) + delta
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._idle_workers += 1
+                    self._cond.wait()
+                    self._idle_workers -= 1
+                    job = self._next_job()
+                if not job._start():
+                    continue
+                self._adjust(job, +1)
+            try:
+                # Thiết bị đã biết là chết: kết thúc ngay thay vì chờ hết timeout SSH
+                reason = self.gate(job.device) if self.gate and job.device else None
+                if reason:
+                    job.error = reason
+                    job.state = SKIPPED
+                else:
+                    job.result = job.func(*job.args, **job.kwargs)
+                    job.state = DONE
+            except Exception as e:
+                job.error = e
+                job.state = FAILED
+            finally:
+                with self._cond:
+                    self._adjust(job, -1)
+                    self._cond.notify_all()
+            job._finish()
+
+    def cancel_all(self, jobs):
+        """Hủy tất cả job chưa chạy trong danh sách. Trả về số job đã hủy."""
+        return sum(1 for job in jobs if job.cancel())
+
+def as_completed(jobs):
+    """Generator: trả về từng Job ngay khi nó kết thúc (xong, lỗi hoặc bị hủy)."""
+    finished = queue.Queue()
+    jobs = list(jobs)
+    for job in jobs:
+        job._add_done_callback(finished.put)
+    for _ in range(len(jobs)):
+        yield finished.get()
+
+# Scheduler dùng chung cho toàn bộ ứng dụng
+scheduler = JobScheduler(gate=precheck_device)
@@ -0,0 +1,67 @@
+# core/poll_scheduler.py
+import time
+
+POLL_MIN_INTERVAL = 15   # Giây - thiết bị vừa flap được kiểm tra dày hơn
+POLL_BASE_INTERVAL = 60  # Giây - chu kỳ mặc định (như REFRESH_INTERVAL cũ)
+POLL_MAX_INTERVAL = 300  # Giây - thiết bị ổn định lâu được kiểm tra thưa dần
+FLAP_WINDOW = 600        # Giây - thiết bị đổi trạng thái trong khoảng này được coi là "vừa flap"
+
+class AdaptivePollScheduler:
+    """
+    Lập lịch kiểm tra riêng cho từng thiết bị:
+    - Thiết bị vừa đổi trạng thái (UP <-> DOWN) được kiểm tra lại sau POLL_MIN_INTERVAL.
+    - Thiết bị giữ nguyên trạng thái thì chu kỳ tăng gấp đôi, tối đa POLL_MAX_INTERVAL.
+    """
+
+    def __init__(self, min_interval=POLL_MIN_INTERVAL, base_interval=POLL_BASE_INTERVAL,
+                 max_interval=POLL_MAX_INTERVAL, flap_window=FLAP_WINDOW):
+        self.min_interval = min_interval
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.flap_window = flap_window
+        # name -> {"ip", "status", "interval", "next_due", "last_change"}
+        self._state = {}
+
+    def sync(self, targets):
+        """Đồng bộ với danh sách thiết bị hiện tại (các cặp (name, ip)). Thiết bị mới đến hạn ngay."""
+        targets = dict(targets)
+        for name in list(self._state):
+            if name not in targets:
+                del self._state[name]
+        for name, ip in targets.items():
+            entry = self._state.get(name)
+            if entry is None:
+                self._state[name] = {"ip": ip, "status": None, "interval": self.base_interval,
+                                     "next_due": 0, "last_change": None}
+            elif entry["ip"] != ip:
+                entry["ip"] = ip; entry["next_due"] = 0
+
+    def due(self, now=None):
+        """Trả về danh sách (name, ip) đã đến hạn kiểm tra."""
+        now = time.time() if now is None else now
+        return [(name, entry["ip"]) for name, entry in self._state.items() if entry["next_due"] <= now]
+
+    def record(self, name, status, now=None):
+        """Ghi nhận kết quả kiểm tra và tính lại chu kỳ. Trả về True nếu trạng thái thay đổi."""
+        entry = self._state.get(name)
+        if entry is None:
+            return False
+        now = time.time() if now is None else now
+        changed = entry["status"] is not None and entry["status"] != status
+        if changed:
+            entry["last_change"] = now
+            entry["interval"] = self.min_interval
+        elif entry["last_change"] is not None and now - entry["last_change"] < self.flap_window:
+            entry["interval"] = self.min_interval
+        elif entry["status"] is not None:
+            entry["interval"] = min(max(entry["interval"], self.base_interval) * 2, self.max_interval)
+        entry["status"] = status
+        entry["next_due"] = now + entry["interval"]
+        return changed
+
+    def seconds_until_next(self, now=None):
+        """Số giây đến lần kiểm tra gần nhất (0 nếu đã có thiết bị đến hạn)."""
+        if not self._state:
+            return self.base_interval
+        now = time.time() if now is None else now
+        return max(0, min(entry["next_due"] for entry in self._state.values()) - now)
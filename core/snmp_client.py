@@ -1,6 +1,66 @@
 # core/snmp_client.py
+"""
+SNMP qua easysnmp. Session được tái sử dụng theo (host, community, version) thay vì tạo mới mỗi lần gọi;
+mỗi session có khóa riêng vì session easysnmp không dùng chung được giữa các thread.
+"""
+import threading
+from collections import OrderedDict
+
 from easysnmp import Session
 
+from core.utils import load_snmp_config
+
+# Các cột IF-MIB ifTable
+IF_DESCR_OID = '1.3.6.1.2.1.2.2.1.2'
+IF_OPER_STATUS_OID = '1.3.6.1.2.1.2.2.1.8'
+IF_IN_ERRORS_OID = '1.3.6.1.2.1.2.2.1.14'
+IF_OUT_ERRORS_OID = '1.3.6.1.2.1.2.2.1.20'
+
+SNMP_SESSION_CACHE_SIZE = 256
+_END_TYPES = ('ENDOFMIBVIEW', 'NOSUCHOBJECT', 'NOSUCHINSTANCE')
+
+_sessions = OrderedDict()  # (host, community, version) -> (Session, Lock), cũ nhất ở đầu
+_sessions_lock = threading.Lock()
+
+def _get_session(ip, community, version):
+    """Session easysnmp đã cache cho (host, community, version) kèm khóa của nó; tạo mới nếu chưa có."""
+    key = (ip, community, version)
+    with _sessions_lock:
+        entry = _sessions.get(key)
+        if entry is not None:
+            _sessions.move_to_end(key)
+            return entry
+    config = load_snmp_config()
+    session = Session(hostname=ip, community=community, version=version,
+                      timeout=config["timeout"], retries=config["retries"], use_numeric=True)
+    with _sessions_lock:
+        entry = _sessions.setdefault(key, (session, threading.Lock()))
+        _sessions.move_to_end(key)
+        while len(_sessions) > SNMP_SESSION_CACHE_SIZE:
+            _sessions.popitem(last=False)
+    return entry
+
+def _drop_session(ip, community, version):
+    """Bỏ session khỏi cache sau lỗi để lần gọi sau mở session mới."""
+    with _sessions_lock:
+        _sessions.pop((ip, community, version), None)
+
+def close_sessions():
+    """Xóa toàn bộ session đã cache."""
+    with _sessions_lock:
+        _sessions.clear()
+
+def _column_index(item, base):
+    """Phần index của một biến trong cột `base` (vd '12' của ifDescr.12); None nếu đã ra khỏi cột."""
+    if item.snmp_type in _END_TYPES:
+        return None
+    full = item.oid.strip('.')
+    if item.oid_index:
+        full = f"{full}.{item.oid_index}"
+    if not full.startswith(base + '.'):
+        return None
+    return full[len(base) + 1:]
+
 def snmp_walk(community, ip, oid, version=2):
     """
     Thực hiện SNMP walk sử dụng thư viện easysnmp.
@@ -8,18 +68,69 @@ def snmp_walk(community, ip, oid, version=2):
     """
     results = {}
     try:
-        session = Session(hostname=ip, community=community, version=version, timeout=10, retries=2)
-        
-        # Thực hiện walk
-        walk_results = session.walk(oid)
-        
+        session, lock = _get_session(ip, community, version)
+        with lock:
+            walk_results = session.walk(oid)
+
         for item in walk_results:
-            # item.oid sẽ có dạng 'ifName', item.oid_index là '1', item.value là 'FastEthernet0/0'
-            index = item.oid_index
-            value = item.value
-            results[index] = value
+            # item.oid là OID của cột, vd '.1.3.6.1.2.1.2.2.1.2', item.oid_index là '1', item.value là 'FastEthernet0/0'
+            results[item.oid_index] = item.value
 
     except Exception as e:
+        _drop_session(ip, community, version)
         return {'error': str(e)}
-            
+
     return results
+
+def snmp_table(community, ip, columns, version=2, max_repetitions=None):
+    """
+    Lấy nhiều cột của một bảng SNMP cùng lúc bằng GETBULK: mỗi gói hỏi tiếp tất cả các cột chưa hết,
+    mỗi cột trả về tối đa `max_repetitions` hàng (mặc định SNMP_MAX_REPETITIONS trong .env).
+    `columns` là {tên: OID cột}, vd {'name': IF_DESCR_OID, 'status': IF_OPER_STATUS_OID}.
+    Trả về {index: {tên: value}} gióng hàng theo index (ifIndex với ifTable), hoặc {'error': str}.
+    SNMPv1 không có GETBULK nên lấy từng cột bằng walk trên cùng session.
+    """
+    if max_repetitions is None:
+        max_repetitions = load_snmp_config()["max_repetitions"]
+    bases = {name: oid.strip('.') for name, oid in columns.items()}
+    rows = {}
+    try:
+        session, lock = _get_session(ip, community, version)
+        with lock:
+            if version == 1:
+                for name, base in bases.items():
+                    for item in session.walk(base):
+                        index = _column_index(item, base)
+                        if index is not None:
+                            rows.setdefault(index, {})[name] = item.value
+                return rows
+
+            cursors = dict(bases)  # cột còn đang lấy -> OID cuối cùng đã nhận
+            while cursors:
+                active = list(cursors)
+                reply = session.get_bulk([cursors[name] for name in active],
+                                         non_repeaters=0, max_repetitions=max_repetitions)
+                if not reply:
+                    break
+                finished = set()
+                previous = dict(cursors)
+                # Kết quả xếp theo hàng: lần lặp r, cột c nằm ở vị trí r * len(active) + c
+                for position, item in enumerate(reply):
+                    name = active[position % len(active)]
+                    if name in finished:
+                        continue
+                    index = _column_index(item, bases[name])
+                    if index is None:
+                        finished.add(name)
+                        continue
+                    rows.setdefault(index, {})[name] = item.value
+                    cursors[name] = f"{bases[name]}.{index}"
+                for name in active:
+                    # Cột đã ra khỏi bảng, hoặc agent không trả về hàng mới (tránh lặp vô hạn)
+                    if name in finished or cursors[name] == previous[name]:
+                        cursors.pop(name)
+    except Exception as e:
+        _drop_session(ip, community, version)
+        return {'error': str(e)}
+
+    return rows
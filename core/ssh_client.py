@@ -1,41 +1,177 @@
 # core/ssh_client.py
-from netmiko import ConnectHandler, NetmikoTimeoutException, NetmikoAuthenticationException
+import io
+import sys
+import time
+
+import scp
+import paramiko
+from netmiko import ConnectHandler, NetmikoTimeoutException, NetmikoAuthenticationException, ReadTimeout
+from core.ssh_pool import ssh_pool, PoolWaitTimeout
+from core.utils import load_ssh_engine
+from core.circuit_breaker import breaker, precheck
+from core.cli_batch import prompt_pattern, PromptCounter, PromptTerminatedStream, build_batch_input, split_batch_output
+
+BATCH_READ_TIMEOUT = 120  # Giây - tổng thời gian chờ output của cả một batch lệnh
+SCP_TIMEOUT = 60          # Giây - timeout socket khi chép file lên thiết bị
+
+def _netmiko_send_batch(conn, commands, timeout=BATCH_READ_TIMEOUT):
+    """
+    Gửi nhiều lệnh qua một phiên netmiko trong một lần ghi, rồi đọc liên tục tới khi
+    đủ số prompt: cả batch chỉ chờ một lượt đi-về thay vì một lượt cho mỗi lệnh.
+    """
+    pattern = prompt_pattern(conn.base_prompt)
+    counter = PromptCounter(pattern)
+    conn.read_channel()  # Bỏ dữ liệu còn sót trong kênh (phiên lấy lại từ pool)
+    conn.write_channel(build_batch_input(commands, conn.RETURN))
+    buffer, deadline = "", time.monotonic() + timeout
+    while counter.count(buffer) < len(commands):
+        data = conn.read_channel()
+        if data:
+            buffer += data
+            continue
+        if time.monotonic() > deadline:
+            raise ReadTimeout(f"Hết thời gian chờ output của {len(commands)} lệnh từ {conn.host}")
+        time.sleep(0.01)
+    return split_batch_output(buffer, commands, pattern)
+
+def _netmiko_stream_command(conn, command, sink, idle_timeout=BATCH_READ_TIMEOUT):
+    """Chạy một lệnh và chuyển output sang sink theo từng đoạn ngay khi đọc được từ kênh."""
+    stream = PromptTerminatedStream(prompt_pattern(conn.base_prompt), command, sink)
+    conn.read_channel()  # Bỏ dữ liệu còn sót trong kênh (phiên lấy lại từ pool)
+    conn.write_channel(conn.normalize_cmd(command))
+    deadline = time.monotonic() + idle_timeout
+    while True:
+        data = conn.read_channel()
+        if data:
+            if stream.feed(data):
+                return stream.size
+            deadline = time.monotonic() + idle_timeout
+            continue
+        if time.monotonic() > deadline:
+            raise ReadTimeout(f"Hết thời gian chờ output của '{command}' từ {conn.host}")
+        time.sleep(0.01)
+
+def _netmiko_upload(conn, content, remote_path, timeout=SCP_TIMEOUT):
+    """Chép nội dung lên thiết bị qua SCP, mở kênh mới trên cùng transport của phiên netmiko."""
+    data = content.encode("utf-8")
+    client = scp.SCPClient(conn.remote_conn.get_transport(), socket_timeout=timeout)
+    try:
+        client.putfo(io.BytesIO(data), remote_path)
+    finally:
+        client.close()
+    return len(data)
+
+def _connect_error(host, e):
+    """
+    (thông báo, có tính vào circuit breaker không) cho lỗi khi mở phiên SSH. Chỉ lỗi kết nối / transport
+    được tính: sai username/password (thiết bị vẫn phản hồi) hay hết thời gian chờ phiên rảnh trong pool
+    (tranh chấp cục bộ) không được làm mở breaker của một thiết bị đang hoạt động bình thường.
+    """
+    # asyncssh chỉ được import khi dùng engine 'asyncssh': chưa import thì lỗi không thể đến từ nó
+    asyncssh = sys.modules.get("asyncssh")
+    if isinstance(e, PoolWaitTimeout):
+        return f"❌ {e}", False
+    if isinstance(e, (NetmikoAuthenticationException, paramiko.AuthenticationException)) or (
+            asyncssh is not None and isinstance(e, asyncssh.PermissionDenied)):
+        return f"❌ Sai username/password: {host}", False
+    if isinstance(e, NetmikoTimeoutException):
+        return f"❌ Timeout: {host}", True
+    if isinstance(e, (paramiko.SSHException, OSError, EOFError)) or (asyncssh is not None and isinstance(e, asyncssh.Error)):
+        return f"❌ Lỗi SSH: {e}", True
+    return f"❌ Lỗi SSH: {e}", False
 
 class SSHClient:
-    def __init__(self, device, username, password):
+    def __init__(self, device, username, password, pooled=True, engine=None):
         self.device = {
             "device_type": device["device_type"],
             "host": device["ip"],
             "username": username,
             "password": password,
         }
+        if device.get("port"):
+            self.device["port"] = device["port"]
+        # engine 'asyncssh': phiên chạy trên event loop chung (core/async_ssh.py), không qua pool
+        self.engine = engine or load_ssh_engine()
+        # pooled=True: dùng lại phiên đã đăng nhập từ ssh_pool, disconnect() trả phiên về pool
+        self.pooled = pooled and self.engine != "asyncssh"
         self.conn = None
+        self.skipped = None  # Lý do bỏ qua nếu thiết bị bị circuit breaker / kiểm tra TCP chặn
 
     def connect(self):
+        host = self.device["host"]
+        key = (host, self.device.get("port", 22))
+        self.skipped = precheck(*key)
+        if self.skipped:
+            print(f"⏭️ Bỏ qua {host}: {self.skipped}")
+            return None
         try:
-            self.conn = ConnectHandler(**self.device)
-            self.conn.send_command("terminal length 0")
+            if self.engine == "asyncssh":
+                from core.async_ssh import open_connection # Chỉ cần asyncssh khi dùng engine này
+                self.conn = open_connection(self.device)
+            elif self.pooled:
+                self.conn = ssh_pool.acquire(self.device)
+            else:
+                self.conn = ConnectHandler(**self.device)
+                self.conn.send_command("terminal length 0")
+            breaker.record_success(key)
             return self.conn
-        except NetmikoTimeoutException:
-            print(f"❌ Timeout: {self.device['host']}")
-        except NetmikoAuthenticationException:
-            print(f"❌ Sai username/password: {self.device['host']}")
         except Exception as e:
-            print(f"❌ Lỗi SSH: {e}")
+            message, counts = _connect_error(host, e)
+            if counts:
+                breaker.record_failure(key)
+            print(message)
 
-    def run(self, cmd):
+    def run(self, cmd, read_timeout=None):
         if not self.conn:
             self.connect()
+        if read_timeout:
+            return self.conn.send_command(cmd, read_timeout=read_timeout)
         return self.conn.send_command(cmd)
 
-    def disconnect(self):
+    def upload(self, content, remote_path):
+        """Chép nội dung (chuỗi) thành file trên thiết bị qua SCP, vd: 'flash:restore.cfg'. Trả về số byte."""
+        if not self.conn:
+            self.connect()
+        if self.engine == "asyncssh":
+            return self.conn.upload(content, remote_path)
+        return _netmiko_upload(self.conn, content, remote_path)
+
+    def run_batch(self, commands):
+        """Chạy nhiều lệnh show trong một lượt trên cùng phiên. Trả về {lệnh: output}."""
+        commands = list(commands)
+        if not self.conn:
+            self.connect()
+        if not commands:
+            return {}
+        if self.engine == "asyncssh":
+            return self.conn.send_batch(commands)
+        return _netmiko_send_batch(self.conn, commands)
+
+    def stream_command(self, command, sink):
+        """
+        Chạy một lệnh có output lớn (vd: running-config) và gọi sink(text) với từng đoạn output,
+        không giữ toàn bộ output trong bộ nhớ. Trả về số ký tự đã chuyển.
+        """
+        if not self.conn:
+            self.connect()
+        if self.engine == "asyncssh":
+            return self.conn.stream_command(command, sink)
+        return _netmiko_stream_command(self.conn, command, sink)
+
+    def disconnect(self, discard=False):
+        """Kết thúc phiên. Với phiên từ pool, discard=True đóng hẳn thay vì trả về pool."""
         if self.conn:
-            self.conn.disconnect()
+            if self.pooled:
+                ssh_pool.release(self.conn, discard=discard)
+            else:
+                self.conn.disconnect()
             self.conn = None
 
     def run_config_set(self, commands):
         """Hàm an toàn để gửi một bộ lệnh cấu hình."""
-        if not self.conn or not self.conn.is_alive():
+        if self.conn and not self.conn.is_alive():
+            self.disconnect(discard=True)
+        if not self.conn:
             self.connect()
         if self.conn:
             return self.conn.send_config_set(commands)
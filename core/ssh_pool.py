@@ -0,0 +1,178 @@
+# core/ssh_pool.py
+import atexit
+import threading
+import time
+
+from netmiko import ConnectHandler
+
+POOL_IDLE_TTL = 300       # Giây - phiên rảnh lâu hơn sẽ bị đóng
+POOL_KEEPALIVE = 30       # Giây - chu kỳ gửi keepalive ở tầng SSH transport
+POOL_MAX_PER_HOST = 2     # Số phiên tối đa tới cùng một thiết bị
+POOL_MAX_SESSIONS = 64    # Tổng số phiên tối đa; vượt quá sẽ đóng phiên rảnh ít dùng nhất (LRU)
+POOL_ACQUIRE_TIMEOUT = 60 # Giây - thời gian chờ tối đa khi thiết bị đã đủ số phiên
+
+class PoolWaitTimeout(TimeoutError):
+    """Hết thời gian chờ phiên rảnh trong pool: tranh chấp cục bộ, không phải lỗi của thiết bị."""
+
+class _PooledSession:
+    __slots__ = ("key", "host", "conn", "in_use", "last_used")
+
+    def __init__(self, key, host):
+        self.key = key
+        self.host = host
+        self.conn = None       # None trong lúc đang mở kết nối
+        self.in_use = True
+        self.last_used = time.monotonic()
+
+class SSHSessionPool:
+    """
+    Giữ lại các phiên netmiko đã đăng nhập để dùng lại giữa các thao tác liên tiếp
+    trên cùng một thiết bị (health -> interfaces -> backup chỉ tốn một lần handshake).
+    Khóa phiên là (host, device_type, username).
+    """
+
+    def __init__(self, idle_ttl=POOL_IDLE_TTL, keepalive=POOL_KEEPALIVE, max_per_host=POOL_MAX_PER_HOST,
+                 max_sessions=POOL_MAX_SESSIONS, acquire_timeout=POOL_ACQUIRE_TIMEOUT):
+        self.idle_ttl = idle_ttl
+        self.keepalive = keepalive
+        self.max_per_host = max_per_host
+        self.max_sessions = max_sessions
+        self.acquire_timeout = acquire_timeout
+        self._sessions = []
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def _key(params):
+        return (params["host"], params["device_type"], params["username"])
+
+    def _close(self, session):
+        """Đóng kết nối thật, bỏ qua lỗi (phiên có thể đã chết)."""
+        if session.conn is not None:
+            try:
+                session.conn.disconnect()
+            except Exception:
+                pass
+
+    def _pop_expired(self):
+        """Phải giữ lock. Lấy ra các phiên rảnh đã quá idle_ttl."""
+        now = time.monotonic()
+        expired = [s for s in self._sessions if not s.in_use and now - s.last_used > self.idle_ttl]
+        for session in expired:
+            self._sessions.remove(session)
+        return expired
+
+    def _pop_lru_idle(self):
+        """Phải giữ lock. Lấy ra phiên rảnh ít được dùng nhất, None nếu không có."""
+        idle = [s for s in self._sessions if not s.in_use]
+        if not idle:
+            return None
+        session = min(idle, key=lambda s: s.last_used)
+        self._sessions.remove(session)
+        return session
+
+    def _reserve(self, key, host):
+        """
+        Phải giữ lock. Trả về (session, is_new): một phiên rảnh cùng khóa (dùng phiên
+        mới dùng gần nhất), hoặc một chỗ trống để mở phiên mới; (None, False) nếu phải chờ.
+        """
+        idle = [s for s in self._sessions if s.key == key and not s.in_use and s.conn is not None]
+        if idle:
+            session = max(idle, key=lambda s: s.last_used)
+            session.in_use = True
+            return session, False
+        if sum(1 for s in self._sessions if s.host == host) >= self.max_per_host:
+            return None, False
+        session = _PooledSession(key, host)
+        self._sessions.append(session)
+        return session, True
+
+    def acquire(self, params):
+        """
+        Lấy một kết nối netmiko tới thiết bị (params giống tham số của ConnectHandler).
+        Ném lại các exception của netmiko nếu không mở được kết nối mới.
+        """
+        key = self._key(params)
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            to_close = []
+            with self._cond:
+                to_close.extend(self._pop_expired())
+                session, is_new = self._reserve(key, params["host"])
+                while session is None:
+                    # Nhường chỗ: đóng một phiên rảnh của khóa khác trên cùng host nếu có
+                    other = [s for s in self._sessions
+                             if s.host == params["host"] and s.key != key and not s.in_use and s.conn is not None]
+                    if other:
+                        victim = min(other, key=lambda s: s.last_used)
+                        self._sessions.remove(victim)
+                        to_close.append(victim)
+                        session, is_new = self._reserve(key, params["host"])
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolWaitTimeout(f"Hết thời gian chờ phiên SSH rảnh tới {params['host']}")
+                    self._cond.wait(remaining)
+                    to_close.extend(self._pop_expired())
+                    session, is_new = self._reserve(key, params["host"])
+                if is_new and len(self._sessions) > self.max_sessions:
+                    victim = self._pop_lru_idle()
+                    if victim is not None:
+                        to_close.append(victim)
+            for victim in to_close:
+                self._close(victim)
+
+            if not is_new:
+                # Kiểm tra phiên cũ còn sống trước khi dùng lại
+                try:
+                    alive = session.conn.is_alive()
+                except Exception:
+                    alive = False
+                if alive:
+                    return session.conn
+                self._discard(session)
+                continue
+
+            try:
+                conn = ConnectHandler(**params, keepalive=self.keepalive)
+                conn.send_command("terminal length 0")
+            except BaseException:
+                self._discard(session)
+                raise
+            session.conn = conn
+            return conn
+
+    def _discard(self, session):
+        with self._cond:
+            if session in self._sessions:
+                self._sessions.remove(session)
+            self._cond.notify_all()
+        self._close(session)
+
+    def release(self, conn, discard=False):
+        """Trả kết nối về pool. discard=True đóng hẳn kết nối (vd: phiên bị lỗi giữa chừng)."""
+        with self._cond:
+            session = next((s for s in self._sessions if s.conn is conn), None)
+            if session is not None and not discard:
+                session.in_use = False
+                session.last_used = time.monotonic()
+                self._cond.notify_all()
+                return
+        if session is not None:
+            self._discard(session)
+        else:
+            try:
+                conn.disconnect()
+            except Exception:
+                pass
+
+    def close_all(self):
+        """Đóng toàn bộ phiên (gọi khi thoát chương trình)."""
+        with self._cond:
+            sessions, self._sessions = self._sessions, []
+            self._cond.notify_all()
+        for session in sessions:
+            self._close(session)
+
+# Pool dùng chung cho toàn bộ ứng dụng
+ssh_pool = SSHSessionPool()
+atexit.register(ssh_pool.close_all)
@@ -0,0 +1,174 @@
+# core/status_cache.py
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+STATUS_TTL_UP = 30           # Giây - kết quả UP được dùng lại trong khoảng này
+STATUS_TTL_DOWN = 10         # Giây - kết quả DOWN/INVALID_IP hết hạn sớm hơn để phát hiện phục hồi nhanh
+STATUS_CACHE_MAX_ENTRIES = 20000
+
+class _Flight:
+    """Một lần probe đang chạy; các caller khác cùng key chờ kết quả của nó."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+        self.loop = None
+        self.future = None
+
+def _interrupted(flight):
+    """
+    Probe dẫn đầu kết thúc vì bị hủy / ngắt (CancelledError, KeyboardInterrupt...) chứ không phải lỗi probe:
+    đó là chuyện của caller sở hữu probe, các caller đang chờ phải probe lại thay vì nhận lại lỗi đó.
+    """
+    return flight.error is not None and not isinstance(flight.error, Exception)
+
+class StatusCache:
+    """
+    Cache trạng thái kết nối dùng chung giữa dashboard, bảng trạng thái và chẩn đoán.
+    - Mỗi entry có TTL riêng (mặc định phụ thuộc vào trạng thái UP/DOWN).
+    - Giới hạn số entry, loại bỏ entry ít được dùng nhất (LRU) khi đầy.
+    - Single-flight: nhiều caller hỏi cùng một key cùng lúc chỉ tạo ra một lần probe.
+    Giá trị lưu trữ là tuple (status, rtt_ms).
+    """
+
+    def __init__(self, max_entries=STATUS_CACHE_MAX_ENTRIES, ttl_up=STATUS_TTL_UP, ttl_down=STATUS_TTL_DOWN):
+        self.max_entries = max_entries
+        self.ttl_up = ttl_up
+        self.ttl_down = ttl_down
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _ttl_for(self, value):
+        return self.ttl_up if value and value[0] == "UP" else self.ttl_down
+
+    def _lookup(self, key, now):
+        """Phải được gọi khi đang giữ lock. Trả về giá trị còn hạn hoặc None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key):
+        """Trả về giá trị còn hạn của key, hoặc None."""
+        with self._lock:
+            return self._lookup(key, time.monotonic())
+
+    def set(self, key, value, ttl=None):
+        """Ghi một giá trị với TTL riêng (mặc định theo trạng thái)."""
+        ttl = self._ttl_for(value) if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Xóa một key, hoặc toàn bộ cache nếu không truyền key."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _claim(self, key, force):
+        """
+        Trả về (cached_value, flight, is_owner).
+        Nếu đã có probe đang chạy cho key này, caller sẽ chờ nó kể cả khi force=True
+        (kết quả của probe đang chạy vốn đã là dữ liệu mới).
+        """
+        with self._lock:
+            if not force:
+                cached = self._lookup(key, time.monotonic())
+                if cached is not None:
+                    return cached, None, False
+            flight = self._inflight.get(key)
+            if flight is not None:
+                return None, flight, False
+            flight = _Flight()
+            self._inflight[key] = flight
+            return None, flight, True
+
+    def _finish(self, key, flight, value=None, error=None):
+        if error is None:
+            self.set(key, value)
+        with self._lock:
+            self._inflight.pop(key, None)
+        flight.value, flight.error = value, error
+        flight.event.set()
+        if flight.future is not None and not flight.future.done():
+            if error is None:
+                flight.future.set_result(value)
+            elif _interrupted(flight):
+                flight.future.cancel()
+            else:
+                flight.future.set_exception(error)
+
+    def get_or_probe(self, key, probe, force=False):
+        """
+        Trả về giá trị của key, gọi probe() (hàm đồng bộ) nếu chưa có hoặc đã hết hạn.
+        force=True bỏ qua giá trị trong cache và probe lại.
+        """
+        while True:
+            cached, flight, is_owner = self._claim(key, force)
+            if cached is not None:
+                return cached
+            if is_owner:
+                break
+            flight.event.wait()
+            if _interrupted(flight):
+                continue  # Probe dẫn đầu bị hủy (task của caller khác): tự probe lại
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            value = probe()
+        except BaseException as e:
+            self._finish(key, flight, error=e)
+            raise
+        self._finish(key, flight, value)
+        return value
+
+    async def get_or_probe_async(self, key, probe, force=False):
+        """Phiên bản asyncio của get_or_probe; probe là hàm trả về coroutine."""
+        loop = asyncio.get_running_loop()
+        while True:
+            cached, flight, is_owner = self._claim(key, force)
+            if cached is not None:
+                return cached
+            if is_owner:
+                break
+            if flight.loop is loop and flight.future is not None:
+                try:
+                    return await asyncio.shield(flight.future)
+                except asyncio.CancelledError:
+                    if not flight.future.cancelled():
+                        raise  # Chính caller này bị hủy
+                    continue
+            # Probe thuộc về thread/loop khác: chờ trong executor để không chặn event loop
+            await loop.run_in_executor(None, flight.event.wait)
+            if _interrupted(flight):
+                continue
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        flight.loop = loop
+        flight.future = loop.create_future()
+        try:
+            value = await probe()
+        except BaseException as e:
+            self._finish(key, flight, error=e)
+            raise
+        self._finish(key, flight, value)
+        return value
+
+# Cache dùng chung cho toàn bộ ứng dụng
+status_cache = StatusCache()
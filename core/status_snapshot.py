@@ -0,0 +1,41 @@
+# core/status_snapshot.py
+import json
+import os
+import tempfile
+import time
+
+SNAPSHOT_FILE = "data/status_snapshot.json"
+
+def save_snapshot(results, path=SNAPSHOT_FILE):
+    """
+    Ghi trạng thái mới nhất của toàn bộ thiết bị ra đĩa.
+    `results` là danh sách (name, ip, status). File được ghi vào file tạm rồi
+    os.replace() để không bao giờ để lại snapshot dở dang khi bị ngắt giữa chừng.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    payload = {"saved_at": time.time(), "devices": [list(r) for r in results]}
+    fd, tmp_path = tempfile.mkstemp(prefix=".status_snapshot.", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"), ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    """
+    Đọc snapshot đã lưu. Trả về (results, saved_at) với results là danh sách
+    (name, ip, status) và saved_at là epoch; ([], None) nếu chưa có hoặc file lỗi.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        results = [tuple(item[:3]) for item in payload.get("devices", [])]
+        return results, payload.get("saved_at")
+    except (OSError, ValueError, TypeError):
+        return [], None
@@ -0,0 +1,207 @@
+# core/template_registry.py
+"""
+Kho mẫu cấu hình (core/templates/<hãng>/*.yaml) được đọc và biên dịch một lần, giữ trong bộ nhớ.
+
+- Mỗi file YAML chỉ được đọc lại khi mtime/kích thước của nó thay đổi; file mới được thêm, file bị xóa được bỏ.
+- Lệnh của mẫu được biên dịch bằng một jinja2.Environment dùng chung, có bytecode cache trên đĩa
+  (TEMPLATE_CACHE_DIR) để lần chạy sau không phải biên dịch lại.
+- Biến dùng trong lệnh phải được khai báo trong 'variables' của mẫu (trừ DEVICE_FACTS của core/device_vars.py): mẫu lỗi bị loại ngay khi nạp
+  (xem TemplateRegistry.errors) thay vì hỏng giữa lúc đẩy cấu hình. Kết quả phân tích biến (tốn bằng
+  cả lần biên dịch) cũng được lưu trong cache theo checksum mã nguồn.
+"""
+import os
+import json
+import hashlib
+import threading
+
+import yaml
+from jinja2 import Environment, FunctionLoader, FileSystemBytecodeCache, StrictUndefined, TemplateError, meta
+
+from core.device_vars import DEVICE_FACTS
+
+TEMPLATE_DIR = "core/templates"
+TEMPLATE_CACHE_DIR = "data/template_cache"
+TEMPLATE_VARIABLES_FILE = "variables.json"  # {sha1 mã nguồn: [biến dùng trong mẫu]} trong TEMPLATE_CACHE_DIR
+TEMPLATE_EXTENSIONS = (".yaml", ".yml")
+RENDER_CACHE_SIZE = 16384  # Số kết quả render giữ lại cho mỗi mẫu
+
+# Bộ đọc YAML viết bằng C (nếu PyYAML được build kèm libyaml) nhanh hơn nhiều lần bộ đọc thuần Python
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+class ConfigTemplate:
+    """
+    Một mẫu cấu hình đã biên dịch cho một hãng. Kết quả render được cache theo giá trị của đúng các biến
+    mẫu dùng, nên nhiều thiết bị có cùng giá trị chỉ render một lần.
+    """
+
+    def __init__(self, vendor, template_id, data, compiled, path, used=()):
+        self.vendor = vendor
+        self.id = template_id  # Tên file không có đuôi, vd 'snmp_readonly'
+        self.name = data.get("name") or template_id
+        self.description = data.get("description", "")
+        self.variables = data.get("variables") or []
+        self.path = path
+        self.used = tuple(sorted(used))  # Các biến lệnh của mẫu thực sự dùng
+        self._compiled = compiled
+        self._renders = {}
+
+    def defaults(self):
+        """Giá trị mặc định {tên: giá trị}; biến khai báo không có 'default' là bắt buộc (vd lấy từ device_vars)."""
+        return {var["name"]: var["default"] for var in self.variables if "default" in var}
+
+    def render(self, variables=None):
+        """
+        Danh sách lệnh cấu hình sau khi điền biến (biến thiếu lấy giá trị mặc định).
+        Thiếu biến bắt buộc: jinja2.UndefinedError.
+        """
+        context = {**self.defaults(), **(variables or {})}
+        key = json.dumps([[name, context[name]] for name in self.used if name in context], default=str)
+        lines = self._renders.get(key)
+        if lines is None:
+            lines = tuple(self._compiled.render(context).splitlines())
+            if len(self._renders) >= RENDER_CACHE_SIZE:
+                self._renders.clear()
+            self._renders[key] = lines
+        return list(lines)
+
+class TemplateRegistry:
+    """
+    Danh mục mẫu theo hãng, nạp lười ở lần tra cứu đầu tiên và tự làm mới theo mtime từng file.
+    Tra cứu: vendors(), templates(vendor), get(vendor, id hoặc tên mẫu).
+    """
+
+    def __init__(self, base_dir=TEMPLATE_DIR, cache_dir=TEMPLATE_CACHE_DIR):
+        self.base_dir = base_dir
+        self._lock = threading.Lock()
+        self._files = {}     # đường dẫn -> (chữ ký mtime/kích thước, ConfigTemplate hoặc None nếu lỗi)
+        self._sources = {}   # tên template jinja -> mã nguồn, để loader đọc lại
+        self.errors = {}     # đường dẫn -> thông báo lỗi của các mẫu bị loại
+        self.cache_dir = cache_dir
+        self._variables = None  # Cache phân tích biến, đọc từ đĩa ở lần nạp đầu tiên
+        self._variables_dirty = False
+        # cache_size=0: template đã biên dịch được giữ trong ConfigTemplate, không cần cache thứ hai của Environment
+        self.env = Environment(loader=FunctionLoader(self._sources.get),
+                               bytecode_cache=FileSystemBytecodeCache(cache_dir) if cache_dir else None,
+                               undefined=StrictUndefined, cache_size=0)
+
+    def _scan(self):
+        """{đường dẫn: (hãng, chữ ký)} của mọi file mẫu hiện có."""
+        found = {}
+        if not os.path.isdir(self.base_dir):
+            return found
+        for vendor_entry in os.scandir(self.base_dir):
+            if not vendor_entry.is_dir():
+                continue
+            for entry in os.scandir(vendor_entry.path):
+                if entry.name.endswith(TEMPLATE_EXTENSIONS) and entry.is_file():
+                    stat = entry.stat()
+                    found[entry.path] = (vendor_entry.name, (stat.st_mtime_ns, stat.st_size))
+        return found
+
+    def refresh(self):
+        """Nạp lại các file mẫu mới hoặc đã thay đổi, bỏ các file đã bị xóa. Trả về số file được nạp lại."""
+        with self._lock:
+            found = self._scan()
+            for path in set(self._files) - set(found):
+                self._forget(path)
+            changed = [(path, vendor, signature) for path, (vendor, signature) in found.items()
+                       if path not in self._files or self._files[path][0] != signature]
+            if changed and self.cache_dir:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            reloaded = 0
+            for path, vendor, signature in changed:
+                self._files[path] = (signature, self._load(vendor, path))
+                reloaded += 1
+            if self._variables_dirty:
+                self._save_variables()
+            return reloaded
+
+    def invalidate(self):
+        """Buộc lần refresh() tiếp theo phải đọc lại mọi file."""
+        with self._lock:
+            self._files.clear()
+
+    def _forget(self, path):
+        signature, template = self._files.pop(path)
+        self.errors.pop(path, None)
+        if template:
+            self._sources.pop(f"{template.vendor}/{os.path.basename(path)}", None)
+
+    def _variables_path(self):
+        return os.path.join(self.cache_dir, TEMPLATE_VARIABLES_FILE) if self.cache_dir else None
+
+    def _used_variables(self, source):
+        """Tên các biến mẫu dùng (meta.find_undeclared_variables), tra cache theo checksum trước."""
+        if self._variables is None:
+            self._variables = {}
+            path = self._variables_path()
+            if path and os.path.exists(path):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        self._variables = json.load(f)
+                except (OSError, ValueError):
+                    pass
+        key = hashlib.sha1(source.encode("utf-8")).hexdigest()
+        if key not in self._variables:
+            self._variables[key] = sorted(meta.find_undeclared_variables(self.env.parse(source)))
+            self._variables_dirty = True
+        return set(self._variables[key])
+
+    def _save_variables(self):
+        """Ghi cache phân tích biến (chỉ giữ mẫu hiện có), ghi file tạm rồi đổi tên."""
+        self._variables_dirty = False
+        path = self._variables_path()
+        if not path:
+            return
+        current = {hashlib.sha1(source.encode("utf-8")).hexdigest() for source in self._sources.values()}
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({key: names for key, names in self._variables.items() if key in current}, f)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            pass
+
+    def _load(self, vendor, path):
+        """Đọc, kiểm tra và biên dịch một file mẫu. Lỗi được ghi vào self.errors, trả về None."""
+        self.errors.pop(path, None)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = yaml.load(f, Loader=_YAML_LOADER)
+            commands = ((data or {}).get("commands") or {}).get(vendor) if isinstance(data, dict) else None
+            if not commands:
+                raise ValueError(f"Không có khối 'commands: {vendor}:'")
+            source = "\n".join(commands)
+            declared = {var["name"] for var in data.get("variables") or []}
+            used = self._used_variables(source)
+            undeclared = used - declared - set(DEVICE_FACTS)
+            if undeclared:
+                raise ValueError(f"Biến chưa khai báo trong 'variables': {', '.join(sorted(undeclared))}")
+            jinja_name = f"{vendor}/{os.path.basename(path)}"
+            self._sources[jinja_name] = source
+            compiled = self.env.get_template(jinja_name)
+        except (OSError, yaml.YAMLError, TemplateError, ValueError, TypeError, KeyError) as e:
+            self.errors[path] = str(e) or type(e).__name__
+            return None
+        template_id = os.path.splitext(os.path.basename(path))[0]
+        return ConfigTemplate(vendor, template_id, data, compiled, path, used)
+
+    # --- Tra cứu ---
+    def _valid(self):
+        self.refresh()
+        with self._lock:
+            return [template for _, template in self._files.values() if template]
+
+    def vendors(self):
+        """Các hãng có ít nhất một mẫu hợp lệ."""
+        return sorted({template.vendor for template in self._valid()})
+
+    def templates(self, vendor):
+        """Các mẫu hợp lệ của một hãng, theo tên file."""
+        return sorted((template for template in self._valid() if template.vendor == vendor), key=lambda template: template.path)
+
+    def get(self, vendor, key):
+        """Mẫu của hãng theo id (tên file không đuôi) hoặc tên hiển thị, None nếu không có."""
+        return next((t for t in self.templates(vendor) if key in (t.id, t.name)), None)
+
+# Kho mẫu dùng chung cho toàn bộ ứng dụng
+template_registry = TemplateRegistry()
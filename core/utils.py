@@ -2,7 +2,9 @@
 import os
 import platform
 import socket
+import time
 from dotenv import load_dotenv
+from core.status_cache import status_cache
 
 def clear_screen():
     """Xóa màn hình console, hoạt động trên cả Windows, macOS và Linux."""
@@ -12,23 +14,36 @@ def clear_screen():
     else:
         os.system('clear')
 
-def is_device_reachable(ip, port=22, timeout=3):
+def tcp_probe(ip, port=22, timeout=3):
     """
-    Kiểm tra kết nối TCP nhanh đến một IP và port.
-    Trả về True nếu kết nối được, False nếu thất bại.
+    Kiểm tra kết nối TCP nhanh đến một IP và port (không qua cache).
+    Trả về (status, rtt_ms) với status là "UP", "DOWN" hoặc "INVALID_IP".
     """
     try:
         # Tạo một socket mới
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             s.settimeout(timeout)
+            start = time.perf_counter()
             # Thử kết nối, connect_ex trả về 0 nếu thành công
             if s.connect_ex((ip, port)) == 0:
-                return True
-    except (socket.gaierror, socket.error):
-        # Bắt các lỗi liên quan đến DNS hoặc không thể tạo socket
-        return False
+                return "UP", (time.perf_counter() - start) * 1000
+    except socket.gaierror:
+        # Lỗi phân giải tên / địa chỉ không hợp lệ
+        return "INVALID_IP", None
+    except socket.error:
+        # Không thể tạo socket
+        return "DOWN", None
     # Nếu có bất kỳ lỗi nào khác hoặc không thành công
-    return False
+    return "DOWN", None
+
+def is_device_reachable(ip, port=22, timeout=3, force_refresh=False):
+    """
+    Kiểm tra kết nối TCP nhanh đến một IP và port, dùng chung kết quả với status cache.
+    force_refresh=True bỏ qua kết quả đã cache và kiểm tra lại ngay.
+    Trả về True nếu kết nối được, False nếu thất bại.
+    """
+    status, _ = status_cache.get_or_probe((ip, port), lambda: tcp_probe(ip, port, timeout), force=force_refresh)
+    return status == "UP"
 
 def load_credentials():
     """
@@ -46,6 +61,93 @@ def get_current_branch():
     # Mặc định là chuỗi rỗng nếu không được định nghĩa
     return os.getenv("BRANCH_ID", "").upper()
 
+def load_probe_config():
+    """
+    Tải cấu hình bộ quét kết nối từ file .env.
+    Trả về (concurrency, timeout): số kết nối đồng thời tối đa và timeout (giây) cho mỗi thiết bị.
+    """
+    load_dotenv()
+    concurrency = int(os.getenv("PROBE_CONCURRENCY", "500"))
+    timeout = float(os.getenv("PROBE_TIMEOUT", "3"))
+    return concurrency, timeout
+
+def load_inventory_config():
+    """
+    Tải cấu hình nơi lưu danh sách thiết bị từ file .env.
+    Trả về (backend, db_path): backend là 'csv' (mặc định, data/devices.txt) hoặc 'sqlite'.
+    """
+    load_dotenv()
+    backend = os.getenv("INVENTORY_BACKEND", "csv").lower()
+    db_path = os.getenv("INVENTORY_DB", "data/devices.db")
+    return backend, db_path
+
+def load_ssh_engine():
+    """
+    Đọc engine SSH từ file .env: 'netmiko' (mặc định, mỗi phiên một thread)
+    hoặc 'asyncssh' (mọi phiên chạy chung một event loop asyncio).
+    """
+    load_dotenv()
+    return os.getenv("SSH_ENGINE", "netmiko").lower()
+
+def load_backup_retention():
+    """
+    Tải chính sách giữ backup từ file .env.
+    Trả về (daily, weekly, monthly): số ngày gần nhất, số tuần và số tháng gần nhất được giữ lại.
+    """
+    load_dotenv()
+    daily = int(os.getenv("BACKUP_KEEP_DAILY", "7"))
+    weekly = int(os.getenv("BACKUP_KEEP_WEEKLY", "4"))
+    monthly = int(os.getenv("BACKUP_KEEP_MONTHLY", "12"))
+    return daily, weekly, monthly
+
+def load_push_policy():
+    """
+    Tải chính sách đẩy cấu hình hàng loạt theo đợt (wave) từ file .env.
+    Trả về dict {wave_size, canaries, max_failures, max_failure_rate, check_compliance, backup_max_age};
+    file job có thể ghi đè từng khóa. backup_max_age (giờ): backup cũ hơn thì lấy lại cấu hình trước khi kiểm tra tuân thủ.
+    """
+    load_dotenv()
+    return {
+        "wave_size": int(os.getenv("PUSH_WAVE_SIZE", "50")),
+        "canaries": int(os.getenv("PUSH_CANARIES", "1")),
+        "max_failures": int(os.getenv("PUSH_MAX_FAILURES", "0")),
+        "max_failure_rate": float(os.getenv("PUSH_MAX_FAILURE_RATE", "0.1")),
+        "check_compliance": os.getenv("PUSH_CHECK_COMPLIANCE", "true").lower() in ("1", "true", "yes"),
+        "backup_max_age": float(os.getenv("PUSH_BACKUP_MAX_AGE", "24")),
+    }
+
+def load_restore_mode():
+    """
+    Đọc cách đẩy cấu hình khi restore từ file .env: 'replace' (mặc định, chép file lên flash qua SCP
+    rồi 'configure replace', chỉ Cisco) hoặc 'lines' (gõ từng lệnh qua send_config_set).
+    """
+    load_dotenv()
+    return os.getenv("RESTORE_MODE", "replace").lower()
+
+def load_forti_backup_mode():
+    """
+    Đọc cách backup FortiGate từ file .env: 'sections' (mặc định, lấy 'show' - chỉ giá trị khác mặc định -
+    và lưu riêng từng section) hoặc 'full' ('show full-configuration', dùng cho lượt lưu trữ đầy đủ).
+    """
+    load_dotenv()
+    return os.getenv("FORTI_BACKUP_MODE", "sections").lower()
+
+def load_snmp_config():
+    """
+    Tải cấu hình SNMP từ file .env.
+    Trả về dict {community, max_repetitions, timeout, retries, workers}: community mặc định (thiết bị có thể có
+    community riêng), số hàng mỗi cột trong một gói GETBULK, timeout (giây), số lần thử lại mỗi yêu cầu và
+    số thiết bị được chẩn đoán SNMP đồng thời khi chẩn đoán toàn mạng.
+    """
+    load_dotenv()
+    return {
+        "community": os.getenv("SNMP_COMMUNITY", "public"),
+        "max_repetitions": int(os.getenv("SNMP_MAX_REPETITIONS", "25")),
+        "timeout": int(os.getenv("SNMP_TIMEOUT", "10")),
+        "retries": int(os.getenv("SNMP_RETRIES", "2")),
+        "workers": int(os.getenv("SNMP_DIAG_WORKERS", "32")),
+    }
+
 def load_telegram_config():
     """Tải Token và Chat ID của Telegram Bot từ file .env."""
     load_dotenv()
@@ -1,18 +1,123 @@
 # core/vendors/vendor_base.py
+class ConfigTransferError(RuntimeError):
+    """Không chép được file cấu hình lên thiết bị; cấu hình thiết bị chưa bị thay đổi."""
+
+class ConfigReplaceError(RuntimeError):
+    """Thiết bị báo lỗi khi thay cấu hình (đã thử rollback về cấu hình trước đó)."""
+
 class VendorBase:
+    # Lệnh của từng nhóm thông tin, lớp con khai báo theo cú pháp của hãng.
+    # Các nhóm được lấy bằng run_batch: mọi lệnh của một (hoặc nhiều) nhóm đi chung một lượt.
+    HEALTH_COMMANDS = ()
+    INTERFACE_COMMANDS = ()
+    CONFIG_COMMANDS = ()
+    # Lệnh rẻ cho biết cấu hình đã thay đổi hay chưa (không phải tải toàn bộ running-config)
+    CHANGE_MARKER_COMMANDS = ()
+
     def __init__(self, ssh):
         self.ssh = ssh
 
-    def get_interfaces(self):
+    def run_batch(self, commands):
+        """Gửi một danh sách lệnh trong một lượt trên phiên SSH hiện tại. Trả về {lệnh: output}."""
+        return self.ssh.run_batch(commands)
+
+    def _fetch(self, commands, parse):
+        if not commands:
+            raise NotImplementedError
+        return parse(self.run_batch(commands))
+
+    # --- Phân tích output (nhận {lệnh: output}) ---
+    def parse_interfaces(self, outputs):
+        return "\n".join(outputs.get(cmd, "") for cmd in self.INTERFACE_COMMANDS)
+
+    def parse_running_config(self, outputs):
+        return "\n".join(outputs.get(cmd, "") for cmd in self.CONFIG_COMMANDS)
+
+    def parse_system_health(self, outputs):
         raise NotImplementedError
 
+    def parse_change_marker(self, outputs):
+        return None
+
+    # --- Thu thập ---
+    def get_interfaces(self):
+        return self._fetch(self.INTERFACE_COMMANDS, self.parse_interfaces)
+
     def get_running_config(self):
+        return self._fetch(self.CONFIG_COMMANDS, self.parse_running_config)
+
+    def stream_running_config(self, sink):
+        """
+        Giống get_running_config nhưng chuyển output sang sink(text) theo từng đoạn ngay khi đọc được,
+        để backup cấu hình lớn không phải giữ cả chuỗi trong bộ nhớ. Trả về số ký tự đã chuyển.
+        """
+        if not self.CONFIG_COMMANDS:
+            raise NotImplementedError
+        size = 0
+        for i, command in enumerate(self.CONFIG_COMMANDS):
+            if i:
+                sink("\n"); size += 1  # Giống cách parse_running_config nối output các lệnh
+            size += self.ssh.stream_command(command, sink)
+        return size
+
+    def use_full_config(self, full=True):
+        """
+        Với hãng có hai dạng cấu hình (FortiOS: 'show full-configuration' / 'show'), chọn lấy dạng đầy đủ
+        hay rút gọn cho get_running_config. Hãng chỉ có một dạng bỏ qua.
+        """
+
+    def get_config_sections(self):
+        """Cấu hình đang chạy chia theo section [(tên, nội dung)]; None nếu hãng / chế độ backup không chia section."""
+        return None
+
+    def get_section(self, name):
+        """Cấu hình của một section (vd 'firewall policy')."""
         raise NotImplementedError
 
     def get_system_health(self):
         """Lấy thông tin tổng quan về CPU, RAM, Uptime."""
+        return self._fetch(self.HEALTH_COMMANDS, self.parse_system_health)
+
+    def get_change_marker(self):
+        """
+        Dấu hiệu thay đổi cấu hình (chuỗi): giống lần backup trước nghĩa là cấu hình chưa đổi.
+        Trả về None nếu hãng không hỗ trợ hoặc không đọc được - khi đó luôn tải cấu hình đầy đủ.
+        """
+        if not self.CHANGE_MARKER_COMMANDS:
+            return None
+        return self.parse_change_marker(self.run_batch(self.CHANGE_MARKER_COMMANDS))
+
+    def collect(self, health=True, interfaces=True, config=False):
+        """
+        Lấy nhiều nhóm thông tin chỉ với MỘT lượt gửi lệnh.
+        Trả về dict chỉ gồm các nhóm được chọn: {'health': ..., 'interfaces': ..., 'config': ...}.
+        """
+        groups = {}
+        if health: groups["health"] = (self.HEALTH_COMMANDS, self.parse_system_health)
+        if interfaces: groups["interfaces"] = (self.INTERFACE_COMMANDS, self.parse_interfaces)
+        if config: groups["config"] = (self.CONFIG_COMMANDS, self.parse_running_config)
+        if not all(commands for commands, _ in groups.values()):
+            raise NotImplementedError
+        commands = list(dict.fromkeys(cmd for group, _ in groups.values() for cmd in group))
+        outputs = self.run_batch(commands)
+        return {key: parse(outputs) for key, (_, parse) in groups.items()}
+
+    def restore_delta(self, running_config, target_config):
+        """Bộ lệnh tối thiểu đưa cấu hình đang chạy về target_config (xem core/config_delta.py)."""
+        raise NotImplementedError
+
+    @staticmethod
+    def missing_lines(running_config, commands):
+        """Các lệnh trong `commands` chưa có trong running_config (kèm ngữ cảnh), [] nếu đã có đủ."""
         raise NotImplementedError
 
     def restore_config(self, config_commands):
         """Phương thức để restore cấu hình từ một danh sách các lệnh."""
         raise NotImplementedError
+
+    def replace_config(self, config):
+        """
+        Thay toàn bộ cấu hình đang chạy bằng `config` trong một thao tác nguyên tử trên thiết bị.
+        Lỗi ConfigTransferError: thiết bị chưa bị đổi; ConfigReplaceError: đã rollback.
+        """
+        raise NotImplementedError
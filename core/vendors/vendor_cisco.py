@@ -1,19 +1,54 @@
 # core/vendors/vendor_cisco.py
 import re
-from core.vendors.vendor_base import VendorBase
+from core.vendors.vendor_base import VendorBase, ConfigTransferError, ConfigReplaceError
+from core.config_delta import cisco_delta, cisco_missing
+
+CISCO_CPU_COMMAND = "show processes cpu sorted"
+CISCO_MEMORY_COMMAND = "show memory summary"
+CISCO_VERSION_COMMAND = "show version"
+CISCO_CHANGE_MARKER_COMMAND = "show running-config | include Last configuration change"
+CISCO_REPLACE_FILE = "flash:restore.cfg"       # Cấu hình đích chép lên để configure replace
+CISCO_CHECKPOINT_FILE = "flash:rollback.cfg"   # Cấu hình đang chạy trước khi replace, dùng để rollback
+CISCO_REPLACE_TIMEOUT = 600                    # Giây - configure replace cấu hình lớn có thể chạy lâu
+CISCO_REPLACE_DONE = "Rollback Done"           # IOS in dòng này khi configure replace hoàn tất
+
+def _rollback_status(keep_checkpoint):
+    if keep_checkpoint:
+        return f"rollback thất bại, bản chụp cấu hình cũ vẫn ở {CISCO_CHECKPOINT_FILE}"
+    return "đã rollback về cấu hình trước đó"
+
+def _replace_file_content(config):
+    """
+    File cho configure replace phải là cấu hình thuần: bỏ phần đầu 'Building configuration...',
+    'Current configuration : N bytes' mà 'show running-config' in ra, đảm bảo kết thúc bằng 'end'.
+    """
+    lines = config.replace("\r\n", "\n").split("\n")
+    start = 0
+    while start < len(lines) and (not lines[start].strip()
+                                  or lines[start].startswith(("Building configuration", "Current configuration"))):
+        start += 1
+    text = "\n".join(lines[start:]).rstrip()
+    if not text.endswith("\nend") and text != "end":
+        text += "\nend"
+    return text + "\n"
 
 class CiscoDevice(VendorBase):
-    def get_interfaces(self):
-        return self.ssh.run("show ip interface brief")
+    HEALTH_COMMANDS = (CISCO_CPU_COMMAND, CISCO_MEMORY_COMMAND, CISCO_VERSION_COMMAND)
+    INTERFACE_COMMANDS = ("show ip interface brief",)
+    CONFIG_COMMANDS = ("show running-config",)
+    CHANGE_MARKER_COMMANDS = (CISCO_CHANGE_MARKER_COMMAND,)
 
-    def get_running_config(self):
-        return self.ssh.run("show running-config")
+    def parse_change_marker(self, outputs):
+        # "! Last configuration change at 10:15:02 UTC Mon Oct 13 2025 by admin" -> "10:15:02 UTC Mon Oct 13 2025"
+        match = re.search(r'Last configuration change at (.+?)(?: by \S+)?\s*$',
+                          outputs.get(CISCO_CHANGE_MARKER_COMMAND, ""), re.MULTILINE)
+        return match.group(1) if match else None
 
-    def get_system_health(self):
-        # Lấy toàn bộ output trước
-        cpu_full_output = self.ssh.run("show processes cpu sorted")
-        mem_full_output = self.ssh.run("show memory summary")
-        ver_full_output = self.ssh.run("show version")
+    def parse_system_health(self, outputs):
+        # 3 lệnh đã được lấy chung một lượt qua run_batch
+        cpu_full_output = outputs.get(CISCO_CPU_COMMAND, "")
+        mem_full_output = outputs.get(CISCO_MEMORY_COMMAND, "")
+        ver_full_output = outputs.get(CISCO_VERSION_COMMAND, "")
 
         # --- Xử lý CPU ---
         # Tìm chuỗi "five minutes: X%" và lấy giá trị X
@@ -46,6 +81,53 @@ class CiscoDevice(VendorBase):
                 f"{mem_line}\n"
                 f"{uptime_line}")
 
+    def restore_delta(self, running_config, target_config):
+        return cisco_delta(running_config, target_config)
+
+    @staticmethod
+    def missing_lines(running_config, commands):
+        return cisco_missing(running_config, commands)
+
     def restore_config(self, config_commands):
         """Đối với Cisco, send_config_set là đủ."""
         return self.ssh.conn.send_config_set(config_commands)
+
+    def _replace(self, path):
+        return self.ssh.run(f"configure replace {path} force", read_timeout=CISCO_REPLACE_TIMEOUT)
+
+    def _rollback(self):
+        """configure replace về bản chụp cấu hình trước đó. Trả về True nếu thiết bị báo thành công."""
+        try:
+            return CISCO_REPLACE_DONE in self._replace(CISCO_CHECKPOINT_FILE)
+        except Exception:
+            return False
+
+    def replace_config(self, config):
+        """
+        Chép cấu hình đích và bản chụp cấu hình hiện tại lên flash qua SCP, rồi 'configure replace'.
+        Thất bại giữa chừng thì configure replace lại bản chụp để về đúng trạng thái trước đó.
+        """
+        try:
+            self.ssh.upload(_replace_file_content(self.get_running_config()), CISCO_CHECKPOINT_FILE)
+            self.ssh.upload(_replace_file_content(config), CISCO_REPLACE_FILE)
+        except Exception as e:
+            raise ConfigTransferError(f"Không chép được cấu hình lên flash qua SCP: {e}") from e
+        keep_checkpoint = False
+        try:
+            try:
+                output = self._replace(CISCO_REPLACE_FILE)
+            except Exception as e:
+                # Phiên lỗi giữa chừng (ReadTimeout, mất kết nối...): không biết cấu hình đã áp tới đâu
+                keep_checkpoint = not self._rollback()
+                raise ConfigReplaceError(f"configure replace bị gián đoạn ({_rollback_status(keep_checkpoint)}): {e}") from e
+            if CISCO_REPLACE_DONE not in output:
+                keep_checkpoint = not self._rollback()
+                raise ConfigReplaceError(f"configure replace thất bại ({_rollback_status(keep_checkpoint)}):\n{output}")
+            return output
+        finally:
+            try:
+                self.ssh.run(f"delete /force {CISCO_REPLACE_FILE}")
+                if not keep_checkpoint:
+                    self.ssh.run(f"delete /force {CISCO_CHECKPOINT_FILE}")
+            except Exception:
+                pass  # Phiên đã hỏng: để file lại trên flash, không che lỗi của bước replace
@@ -1,20 +1,70 @@
 # core/vendors/vendor_fortinet.py
 import re
 from core.vendors.vendor_base import VendorBase
+from core.config_delta import fortinet_delta, fortinet_missing
+from core.utils import load_forti_backup_mode
+
+FORTI_PERFORMANCE_COMMAND = "get system performance status"
+FORTI_CHECKSUM_COMMAND = "diagnose sys ha checksum show"
+FORTI_FULL_CONFIG_COMMAND = "show full-configuration"  # Mọi giá trị kể cả mặc định: lớn và chậm nhất
+FORTI_CONFIG_COMMAND = "show"                          # Chỉ các giá trị khác mặc định
+FORTI_BACKUP_FULL = "full"
+FORTI_HEADER_SECTION = "_header"  # Các dòng '#config-version=...' trước khối config đầu tiên
+
+def split_config_sections(config):
+    """
+    Tách cấu hình FortiOS thành [(tên section, nội dung)] theo các khối 'config ...' cấp ngoài cùng,
+    vd 'config firewall policy' -> 'firewall policy'. Nối các nội dung lại cho ra đúng cấu hình ban đầu.
+    Khối trùng tên (cấu hình nhiều VDOM) được đánh số 'tên #2', 'tên #3'...
+    """
+    sections, name, chunk, seen = [], FORTI_HEADER_SECTION, [], {}
+    for line in config.splitlines(keepends=True):
+        if line.startswith("config "):
+            if chunk:
+                sections.append((name, "".join(chunk)))
+            base = line[len("config "):].strip()
+            seen[base] = seen.get(base, 0) + 1
+            name, chunk = (base if seen[base] == 1 else f"{base} #{seen[base]}"), []
+        chunk.append(line)
+    if chunk:
+        sections.append((name, "".join(chunk)))
+    return sections
 
 class FortinetDevice(VendorBase):
-    def get_interfaces(self):
-        return self.ssh.run("get system interface physical")
+    HEALTH_COMMANDS = (FORTI_PERFORMANCE_COMMAND,)
+    INTERFACE_COMMANDS = ("get system interface physical",)
+    CONFIG_COMMANDS = (FORTI_FULL_CONFIG_COMMAND,)
+    # 'get system status' không có checksum cấu hình; checksum HA có cả trên máy chạy đơn (standalone)
+    CHANGE_MARKER_COMMANDS = (FORTI_CHECKSUM_COMMAND,)
+
+    def __init__(self, ssh, backup_mode=None):
+        super().__init__(ssh)
+        self.backup_mode = backup_mode or load_forti_backup_mode()
+        self.use_full_config(self.backup_mode == FORTI_BACKUP_FULL)
+
+    def use_full_config(self, full=True):
+        self.CONFIG_COMMANDS = (FORTI_FULL_CONFIG_COMMAND,) if full else (FORTI_CONFIG_COMMAND,)
 
-    def get_running_config(self):
-        return self.ssh.run("show full-configuration")
+    def get_config_sections(self):
+        if self.CONFIG_COMMANDS != (FORTI_CONFIG_COMMAND,):
+            return None
+        return split_config_sections(self.get_running_config())
 
-    def get_system_health(self):
+    def get_section(self, name):
+        # 'firewall policy #2' (khối trùng tên) không lấy riêng được bằng 'show'
+        return self.ssh.run(f"{FORTI_CONFIG_COMMAND} {name}")
+
+    def parse_change_marker(self, outputs):
+        # Dòng "all: 2c 0a 9a ..." là checksum của toàn bộ cấu hình (lấy dòng cuối nếu có nhiều bảng)
+        matches = re.findall(r'^all:\s*([0-9a-f ]+?)\s*$', outputs.get(FORTI_CHECKSUM_COMMAND, ""), re.MULTILINE)
+        return matches[-1].replace(" ", "") if matches else None
+
+    def parse_system_health(self, outputs):
         """
-        Lấy và phân tích thông tin CPU, RAM, Uptime cho thiết bị Fortinet.
+        Phân tích thông tin CPU, RAM, Uptime cho thiết bị Fortinet.
         Phiên bản cuối cùng, hoạt động chính xác với output của bạn.
         """
-        output = self.ssh.run("get system performance status")
+        output = outputs.get(FORTI_PERFORMANCE_COMMAND, "")
         
         # --- Xử lý CPU ---
         cpu_match = re.search(r'CPU states:.*?\s+(\d+)%\s+idle', output)
@@ -39,3 +89,13 @@ class FortinetDevice(VendorBase):
                 f"{mem_line}\n"
                 f"{uptime_line}")
 
+    def restore_delta(self, running_config, target_config):
+        return fortinet_delta(running_config, target_config)
+
+    @staticmethod
+    def missing_lines(running_config, commands):
+        return fortinet_missing(running_config, commands)
+
+    def restore_config(self, config_commands):
+        """FortiOS không có chế độ cấu hình riêng: các khối config/edit/set/next/end được gửi tuần tự."""
+        return self.ssh.conn.send_config_set(config_commands)
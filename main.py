@@ -4,8 +4,8 @@ from core.ui import print_error, console
 from core.utils import clear_screen
 from modules.dashboard import run_live_dashboard
 from modules.connection_check import check_all_devices_concurrently
-from modules.diagnostics import run_diagnostics
-from modules.bulk_config import run_bulk_config_push
+from modules.diagnostics import run_diagnostics, run_fleet_diagnostics
+from modules.bulk_config import run_bulk_config_push, push_from_job_file
 from core.backup_restore import backup_all_devices
 from main_actions import (
     menu_device_manager, 
@@ -22,6 +22,8 @@ def menu_monitoring_diagnostics():
         print(" [1] Hiển thị lại Dashboard Live")
         print(" [2] In bảng trạng thái chi tiết")
         print(" [3] Chẩn đoán sự cố thiết bị")
+        print(" [4] Làm mới bảng trạng thái (bỏ qua cache)")
+        print(" [5] Chẩn đoán toàn mạng / theo chi nhánh")
         print("\n [0] Quay lại")
         choice = input("\nChọn chức năng: ").strip().lower()
 
@@ -33,6 +35,12 @@ def menu_monitoring_diagnostics():
         elif choice == '3':
             run_diagnostics()
             input("\nNhấn Enter để tiếp tục...")
+        elif choice == '4':
+            check_all_devices_concurrently(force_refresh=True)
+            input("\nNhấn Enter để tiếp tục...")
+        elif choice == '5':
+            run_fleet_diagnostics()
+            input("\nNhấn Enter để tiếp tục...")
         elif choice == '0':
             break
         else:
@@ -47,6 +55,8 @@ def menu_config_management():
         print(" [1] Backup toàn bộ hệ thống")
         print(" [2] Khôi phục cấu hình (Restore)")
         print(" [3] Đẩy cấu hình hàng loạt")
+        print(" [4] Backup toàn bộ hệ thống (bắt buộc tải lại mọi cấu hình)")
+        print(" [5] Đẩy cấu hình theo file job (YAML)")
         print("\n [0] Quay lại")
         choice = input("\nChọn chức năng: ").strip().lower()
 
@@ -58,6 +68,12 @@ def menu_config_management():
         elif choice == '3':
             run_bulk_config_push()
             input("\nNhấn Enter để tiếp tục...")
+        elif choice == '4':
+            backup_all_devices(force=True)
+            input("\nNhấn Enter để tiếp tục...")
+        elif choice == '5':
+            push_from_job_file()
+            input("\nNhấn Enter để tiếp tục...")
         elif choice == '0':
             break
         else:
@@ -2,12 +2,12 @@
 import os
 import getpass
 
-from core.devices import load_devices, list_devices, add_device, delete_device
+from core.devices import load_devices, get_inventory, list_devices, add_device, delete_device
 from core.utils import clear_screen, load_credentials, is_device_reachable
 from core.ui import console, print_info, print_error, print_warning, print_success, Panel
-from core.backup_restore import restore_single_device, restore_by_branch, restore_all, backup_device_config, BASE_BACKUP_DIR
+from core.backup_restore import restore_single_device, restore_by_branch, restore_all, restore_from_job_file, backup_device_config
 from core.vendors.vendor_factory import get_vendor_class
-from modules.system_health import show_system_health
+from modules.system_health import show_system_health, show_fleet_health
 from modules.interface_info import show_interface_info
 from modules import web_filter
 
@@ -35,11 +35,13 @@ def menu_restore():
         print(" [1] Restore một thiết bị")
         print(" [2] Restore theo chi nhánh")
         print(" [3] Restore toàn bộ hệ thống")
+        print(" [4] Restore hàng loạt theo file job (YAML)")
         print("\n [0] Quay lại")
         choice = input("\nChọn chức năng: ").strip()
         if choice == '1': restore_single_device(); input("\nNhấn Enter...")
         elif choice == '2': restore_by_branch(); input("\nNhấn Enter...")
         elif choice == '3': restore_all(); input("\nNhấn Enter...")
+        elif choice == '4': restore_from_job_file(); input("\nNhấn Enter...")
         elif choice == '0': break
         else: print_error("Lựa chọn không hợp lệ."); input("\nNhấn Enter...")
 
@@ -103,9 +105,7 @@ def _select_and_run_single_action(action_name):
         
         if action_name == 'show_interfaces': show_interface_info(device_info, username, password)
         elif action_name == 'show_health': show_system_health(device_info, username, password)
-        elif action_name == 'backup_single': 
-            os.makedirs(BASE_BACKUP_DIR, exist_ok=True)
-            backup_device_config(device_info, username, password, BASE_BACKUP_DIR)
+        elif action_name == 'backup_single': backup_device_config(device_info, username, password)
         else: print_error("Hành động không xác định.")
     except (ValueError, IndexError): print_error("Lựa chọn không hợp lệ.")
 
@@ -118,12 +118,16 @@ def menu_interaction():
         print(" [2] Xem thông tin Interfaces")
         print(" [3] Kiểm tra System Health")
         print(" [4] Backup một thiết bị")
+        print(" [5] Kiểm tra System Health hàng loạt")
         print("\n [0] Quay lại")
         choice = input("\nChọn chức năng: ").strip()
         if choice == '1': open_ssh_terminal();
         elif choice == '2': _select_and_run_single_action('show_interfaces'); input("\nNhấn Enter...")
         elif choice == '3': _select_and_run_single_action('show_health'); input("\nNhấn Enter...")
         elif choice == '4': _select_and_run_single_action('backup_single'); input("\nNhấn Enter...")
+        elif choice == '5':
+            branch = input("Nhập mã chi nhánh (để trống = toàn bộ): ").strip().upper()
+            show_fleet_health(branch or None); input("\nNhấn Enter...")
         elif choice == '0': break
         else: print_error("Lựa chọn không hợp lệ.");
 
@@ -132,8 +136,7 @@ def menu_web_filter():
     clear_screen()
     console.rule("[bold blue]🛡️ Quản lý Policy Lọc Web[/bold blue]")
     
-    devices = load_devices()
-    firewalls = {name: info for name, info in devices.items() if 'fortinet' in info['device_type']}
+    firewalls = {record.name: record.info() for record in get_inventory().by_vendor('fortinet')}
     if not firewalls: print_warning("Không tìm thấy thiết bị Fortinet nào."); return
 
     fw_list = list(firewalls.items())
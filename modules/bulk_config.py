@@ -1,43 +1,11 @@
 # modules/bulk_config.py
 import os
-import yaml
-import threading
-from jinja2 import Template
 
-from core.devices import load_devices
+from core.devices import get_inventory
 from core.utils import load_credentials, clear_screen
 from core.ui import console, print_info, print_success, print_error, print_warning
-
-TEMPLATE_DIR = "core/templates"
-
-def _load_templates_from_path(path):
-    """Tải tất cả các mẫu cấu hình từ một đường dẫn cụ thể."""
-    templates = []
-    if not os.path.exists(path): return templates
-    for filename in sorted(os.listdir(path)):
-        if filename.endswith((".yaml", ".yml")):
-            filepath = os.path.join(path, filename)
-            with open(filepath, 'r', encoding='utf-8') as f:
-                try:
-                    templates.append(yaml.safe_load(f))
-                except yaml.YAMLError as e:
-                    print_error(f"Lỗi đọc file {filename}: {e}")
-    return templates
-
-def _push_config_to_device(device, username, password, commands, results):
-    """Hàm chạy trong thread, đẩy config tới 1 thiết bị."""
-    device_name = device['name']
-    try:
-        from core.ssh_client import SSHClient # Import tại đây
-        ssh = SSHClient(device, username, password)
-        if not ssh.connect():
-            results[device_name] = (False, f"Không thể kết nối")
-            return
-        output = ssh.conn.send_config_set(commands)
-        results[device_name] = (True, output)
-        ssh.disconnect()
-    except Exception as e:
-        results[device_name] = (False, str(e))
+from core.template_registry import template_registry, TEMPLATE_DIR
+from core.config_push import run_push, run_push_job, render_plan, apply_compliance, print_push_summary, PUSH_COMPLIANT
 
 def run_bulk_config_push():
     """Hàm chính điều phối chức năng đẩy cấu hình hàng loạt theo hãng."""
@@ -46,7 +14,10 @@ def run_bulk_config_push():
         console.rule("[bold yellow]🚀 Đẩy Cấu hình Hàng loạt[/bold yellow]")
 
         # 1. Chọn Hãng (Vendor)
-        vendors = [d for d in sorted(os.listdir(TEMPLATE_DIR)) if os.path.isdir(os.path.join(TEMPLATE_DIR, d))]
+        # Mẫu được nạp và biên dịch một lần, chỉ đọc lại file đã sửa (core/template_registry.py)
+        vendors = template_registry.vendors()
+        for path, error in sorted(template_registry.errors.items()):
+            print_warning(f"⚠️ Bỏ qua mẫu {os.path.relpath(path, TEMPLATE_DIR)}: {error}")
         if not vendors:
             print_error("Không tìm thấy thư mục của hãng nào trong 'core/templates/'."); input("\nNhấn Enter..."); return
         
@@ -62,13 +33,12 @@ def run_bulk_config_push():
             print_error("Lựa chọn không hợp lệ."); input("\nNhấn Enter..."); continue
 
         # 2. Chọn Template
-        vendor_path = os.path.join(TEMPLATE_DIR, chosen_vendor)
-        templates = _load_templates_from_path(vendor_path)
+        templates = template_registry.templates(chosen_vendor)
         if not templates:
             print_error(f"Không tìm thấy mẫu nào cho hãng '{chosen_vendor}'."); input("\nNhấn Enter..."); continue
         
         clear_screen(); console.rule(f"[bold yellow]Mẫu cho: {chosen_vendor}[/bold yellow]")
-        for i, t in enumerate(templates, 1): print(f" [{i}] {t['name']}")
+        for i, t in enumerate(templates, 1): print(f" [{i}] {t.name}")
         print("\n [0] Quay lại")
         try:
             template_choice = int(input("\nChọn mẫu để đẩy (nhập 0 để hủy): ").strip())
@@ -77,16 +47,14 @@ def run_bulk_config_push():
         except (ValueError, IndexError):
             print_error("Lựa chọn không hợp lệ."); input("\nNhấn Enter..."); continue
 
-        # 3. Nhập biến
+        # 3. Nhập biến (để trống: lấy biến của từng thiết bị trong data/device_vars.yaml, rồi mới tới giá trị mặc định)
         variables = {}
-        if 'variables' in selected_template:
-            for var in selected_template['variables']:
-                val = input(f"> {var['prompt']} [mặc định: {var['default']}]: ").strip()
-                variables[var['name']] = val if val else var['default']
+        for var in selected_template.variables:
+            val = input(f"> {var.get('prompt', var['name'])} [mặc định: {var.get('default', 'theo thiết bị')}]: ").strip()
+            if val: variables[var['name']] = val
 
         # 4. Chọn thiết bị (đã lọc theo hãng)
-        all_devices = load_devices()
-        vendor_devices = {name: info for name, info in all_devices.items() if info['device_type'] == chosen_vendor}
+        vendor_devices = {record.name: record.info() for record in get_inventory().by_device_type(chosen_vendor)}
         if not vendor_devices:
             print_error(f"Không có thiết bị nào thuộc hãng '{chosen_vendor}' trong danh sách."); input("\nNhấn Enter..."); continue
 
@@ -108,25 +76,27 @@ def run_bulk_config_push():
             except (ValueError, IndexError):
                 print_error("Định dạng không hợp lệ."); input("\nNhấn Enter..."); continue
         
-        # 5. Xác nhận và Thực thi
-        print_warning(f"\nBạn sắp đẩy mẫu '{selected_template['name']}' lên {len(target_devices)} thiết bị.")
+        # 5. Render lệnh riêng cho từng thiết bị, xác nhận và thực thi
+        plan, errors = render_plan(selected_template, target_devices, variables)
+        for name, error in sorted(errors.items()): print_warning(f"⚠️ {name}: không render được mẫu - {error}")
+        username, password = load_credentials()
+        # Bỏ qua thiết bị đã có đủ cấu hình, thiết bị thiếu một phần chỉ nhận các dòng còn thiếu
+        plan, compliant = apply_compliance(plan, username, password)
+        if not plan: print_success("✅ Không có thiết bị nào cần đẩy."); input("\nNhấn Enter..."); continue
+        print_warning(f"\nBạn sắp đẩy mẫu '{selected_template.name}' lên {len(plan)} thiết bị.")
         if input("Bạn có chắc chắn muốn tiếp tục? (y/n): ").lower() != 'y': continue
 
-        username, password = load_credentials()
-        threads, results = [], {}
         print_info("\nBắt đầu đẩy cấu hình...")
-        
-        template = Template("\n".join(selected_template['commands'][chosen_vendor]))
-        rendered_commands = template.render(variables).splitlines()
 
-        for device in target_devices:
-            thread = threading.Thread(target=_push_config_to_device, args=(device, username, password, rendered_commands, results))
-            threads.append(thread); thread.start()
-        for thread in threads: thread.join()
-
-        # 6. Báo cáo
-        console.rule("[bold green]Kết quả[/bold green]")
-        for name, (success, output) in results.items():
-            if success: print_success(f"✅ {name}: Thành công")
-            else: print_error(f"❌ {name}: Thất bại - {output}")
+        # 6. Đẩy theo đợt (canary trước, dừng khi vượt ngưỡng lỗi - .env PUSH_*), báo cáo ngay khi từng thiết bị xong
+        outcome = run_push(plan, username, password)
+        outcome["results"].update(dict.fromkeys(compliant, PUSH_COMPLIANT))
+        print_push_summary(outcome)
         input("\nNhấn Enter để quay lại menu chính..."); break
+
+def push_from_job_file():
+    """Đẩy cấu hình theo file job YAML (xem core/config_push.py)."""
+    clear_screen()
+    path = input("Đường dẫn file job đẩy cấu hình (YAML): ").strip()
+    if not path: return
+    run_push_job(path, dry_run=input("Chỉ xem kế hoạch (dry-run)? (y/n): ").strip().lower() == 'y')
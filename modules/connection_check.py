@@ -1,19 +1,29 @@
 # modules/connection_check.py
 import socket
-import threading
+import asyncio
+import time
 from core.devices import load_devices
+from core.utils import load_probe_config
+from core.status_cache import status_cache
+from core.status_snapshot import save_snapshot
 from core.ui import console, create_table, print_warning, print_info
 
-def check_device_status(device_name, device_ip, results):
+PROBE_PORT = 22
+
+# RTT (ms) đo được ở lần quét gần nhất, theo tên thiết bị. None nếu không kết nối được.
+LAST_RTTS = {}
+
+def check_device_status(device_name, device_ip, results, port=PROBE_PORT):
     """
     Kiểm tra xem cổng 22 (SSH) của thiết bị có mở hay không.
     Đây là cách nhanh để xác định thiết bị có 'sống' trên mạng hay không.
+    (Phiên bản đa luồng cũ, giữ lại để so sánh trong benchmark.)
     """
     try:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             s.settimeout(3) # Timeout 3 giây cho mỗi lần kiểm tra
             # connect_ex trả về 0 nếu thành công
-            if s.connect_ex((device_ip, 22)) == 0:
+            if s.connect_ex((device_ip, port)) == 0:
                 results.append((device_name, device_ip, "UP"))
             else:
                 results.append((device_name, device_ip, "DOWN"))
@@ -22,41 +32,126 @@ def check_device_status(device_name, device_ip, results):
     except Exception:
         results.append((device_name, device_ip, "DOWN"))
 
-def get_all_device_statuses():
+async def _tcp_probe_async(device_ip, semaphore, timeout, port):
+    """
+    Mở kết nối TCP bất đồng bộ tới thiết bị, giới hạn bởi semaphore.
+    Trả về (status, rtt_ms); rtt_ms là None khi không kết nối được.
+    """
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(device_ip, port), timeout)
+        except socket.gaierror:
+            return ("INVALID_IP", None)
+        except Exception:
+            # Timeout, bị từ chối, không có route... đều coi là DOWN
+            return ("DOWN", None)
+        rtt_ms = (time.perf_counter() - start) * 1000
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+        return ("UP", rtt_ms)
+
+async def _probe_device_async(device_name, device_ip, semaphore, timeout, port, force_refresh):
+    """Lấy trạng thái thiết bị từ status cache, chỉ probe khi cache không có hoặc force_refresh."""
+    status, rtt_ms = await status_cache.get_or_probe_async(
+        (device_ip, port), lambda: _tcp_probe_async(device_ip, semaphore, timeout, port), force=force_refresh)
+    return (device_name, device_ip, status, rtt_ms)
+
+async def _spawn_probes(targets, concurrency, timeout, port, force_refresh):
+    """Tạo semaphore và các task probe bên trong event loop đang chạy."""
+    semaphore = asyncio.Semaphore(concurrency)
+    return {asyncio.ensure_future(_probe_device_async(name, ip, semaphore, timeout, port, force_refresh))
+            for name, ip in targets}
+
+def iter_probe_results(targets, concurrency=None, timeout=None, port=PROBE_PORT, force_refresh=False):
+    """
+    Generator: quét danh sách (name, ip) bằng asyncio và trả về từng kết quả
+    (name, ip, status, rtt_ms) ngay khi thiết bị đó có kết quả (không chờ cả lượt quét).
+    Thiết bị còn kết quả hợp lệ trong status cache được trả về ngay mà không probe lại,
+    trừ khi force_refresh=True.
+    """
+    default_concurrency, default_timeout = load_probe_config()
+    concurrency = concurrency or default_concurrency
+    timeout = timeout or default_timeout
+
+    loop = asyncio.new_event_loop()
+    pending = set()
+    try:
+        pending = loop.run_until_complete(_spawn_probes(targets, concurrency, timeout, port, force_refresh))
+        while pending:
+            done, pending = loop.run_until_complete(asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED))
+            for task in done:
+                yield task.result()
+    finally:
+        # Người dùng dừng giữa chừng: hủy các probe còn lại trước khi đóng loop
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.close()
+
+def probe_devices(targets, concurrency=None, timeout=None, port=PROBE_PORT, force_refresh=False):
     """
-    Hàm mới: Chạy kiểm tra đa luồng và TRẢ VỀ danh sách kết quả.
+    Quét danh sách (name, ip) bằng asyncio trên một luồng duy nhất.
+    Trả về danh sách (name, ip, status, rtt_ms) đã sắp xếp theo tên.
+    """
+    results = list(iter_probe_results(targets, concurrency=concurrency, timeout=timeout, port=port,
+                                      force_refresh=force_refresh))
+    results.sort(key=lambda r: (r[0], r[1]))
+    return results
+
+def iter_device_statuses(devices=None, concurrency=None, timeout=None, force_refresh=False):
+    """
+    Generator: trả về (name, ip, status) của từng thiết bị ngay khi có kết quả.
+    `devices` là dict {name: info} như load_devices(); mặc định quét toàn bộ danh sách.
+    RTT đo được được cập nhật vào LAST_RTTS.
+    """
+    if devices is None:
+        devices = load_devices()
+    targets = [(name, info['ip']) for name, info in devices.items()]
+    for name, ip, status, rtt_ms in iter_probe_results(targets, concurrency=concurrency, timeout=timeout,
+                                                       force_refresh=force_refresh):
+        LAST_RTTS[name] = rtt_ms
+        yield (name, ip, status)
+
+def get_all_device_statuses(concurrency=None, timeout=None, force_refresh=False):
+    """
+    Kiểm tra toàn bộ thiết bị bằng bộ quét asyncio và TRẢ VỀ danh sách (name, ip, status).
+    Dùng lại kết quả còn hạn trong status cache, trừ khi force_refresh=True.
+    RTT đo được được lưu vào LAST_RTTS.
     """
     devices = load_devices()
     if not devices:
         print_warning("❌ Chưa có thiết bị nào trong danh sách.")
         return []
 
-    threads = []
-    results = []
-    
-    for name, info in devices.items():
-        thread = threading.Thread(target=check_device_status, args=(name, info['ip'], results))
-        threads.append(thread)
-        thread.start()
-
-    for thread in threads:
-        thread.join()
-
+    LAST_RTTS.clear()
+    results = list(iter_device_statuses(devices, concurrency=concurrency, timeout=timeout,
+                                        force_refresh=force_refresh))
     results.sort()
+    try:
+        save_snapshot(results)
+    except OSError as e:
+        # Không ghi được snapshot (thư mục chỉ đọc, đầy đĩa...) không được làm mất kết quả lượt quét
+        print_warning(f"Không lưu được snapshot trạng thái: {e}")
     return results
 
-def check_all_devices_concurrently():
+def check_all_devices_concurrently(force_refresh=False):
     """
-    Sử dụng đa luồng để kiểm tra kết nối đến tất cả thiết bị cùng lúc.
+    Kiểm tra kết nối đến tất cả thiết bị cùng lúc và in bảng kết quả.
+    force_refresh=True bỏ qua status cache và kiểm tra lại toàn bộ.
     """
 
     print_info("\n🔄 Đang kiểm tra kết nối đến tất cả thiết bị...")
     
-    results = get_all_device_statuses()
+    results = get_all_device_statuses(force_refresh=force_refresh)
 
     table = create_table(
         "KẾT QUẢ KIỂM TRA KẾT NỐI",
-        {"Tên thiết bị": "cyan", "Địa chỉ IP": "green", "Trạng thái": "dim"}
+        {"Tên thiết bị": "cyan", "Địa chỉ IP": "green", "Trạng thái": "dim", "RTT": "default"}
     )
 
     for name, ip, status in results:
@@ -67,6 +162,8 @@ def check_all_devices_concurrently():
             status_style = "[bold red]❌ DOWN[/bold red]"
         else:
             status_style = "[bold yellow]⚠️ INVALID IP[/bold yellow]"
-        table.add_row(name, ip, status_style)
+        rtt_ms = LAST_RTTS.get(name)
+        rtt_str = f"{rtt_ms:.1f} ms" if rtt_ms is not None else "-"
+        table.add_row(name, ip, status_style, rtt_str)
 
     console.print(table)
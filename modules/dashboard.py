@@ -2,6 +2,8 @@
 import time
 import sys
 import select
+import queue
+import threading
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from rich.live import Live
@@ -10,17 +12,26 @@ from rich.layout import Layout
 from rich.text import Text
 from rich.columns import Columns
 
-from modules.connection_check import get_all_device_statuses
+from modules.connection_check import iter_device_statuses
+from core.devices import get_inventory
+from core.poll_scheduler import AdaptivePollScheduler
+from core.status_snapshot import load_snapshot, save_snapshot
 from core.utils import get_current_branch # <-- Import hàm mới
 
-REFRESH_INTERVAL = 60 # Giây
+REFRESH_INTERVAL = 60 # Giây - chu kỳ nạp lại danh sách thiết bị
+TICK_INTERVAL = 0.5 # Giây - chu kỳ vẽ lại màn hình
+_SWEEP_DONE = object() # Đánh dấu lượt quét đã kết thúc trong hàng đợi kết quả
 
 def user_pressed_enter():
     """Kiểm tra xem người dùng có nhấn Enter không mà không chặn chương trình."""
     return select.select([sys.stdin], [], [], 0) == ([sys.stdin], [], [])
 
-def generate_layout(dashboard_data, time_left, is_refreshing):
-    """Tạo và trả về đối tượng Layout cho dashboard."""
+def generate_layout(dashboard_data, time_left, is_refreshing, progress=None, stale_since=None):
+    """
+    Tạo và trả về đối tượng Layout cho dashboard.
+    `progress` là (số đã có kết quả, tổng số) của lượt quét đang chạy, nếu có.
+    `stale_since` là epoch của snapshot cũ khi dữ liệu chưa được quét lại lần nào.
+    """
     # --- Định nghĩa cấu trúc layout ---
     layout = Layout(name="root")
     layout.split(
@@ -42,16 +53,17 @@ def generate_layout(dashboard_data, time_left, is_refreshing):
     # --- Logic lọc mới ---
     current_branch = get_current_branch()
     down_devices_all = [res for res in dashboard_data if res[2] != "UP"]
+    local_names = get_inventory().names_in_branch(current_branch) if current_branch else frozenset()
     
     # Lọc ra các thiết bị down thuộc chi nhánh hiện tại
     down_devices_local = [
         (name, ip, status) for name, ip, status in down_devices_all
-        if current_branch and name.upper().startswith(current_branch)
+        if current_branch and name in local_names
     ]
     # Lọc ra các thiết bị down thuộc chi nhánh còn lại
     down_devices_remote = [
         (name, ip, status) for name, ip, status in down_devices_all
-        if current_branch and not name.upper().startswith(current_branch)
+        if current_branch and name not in local_names
     ]
 
     # --- Phần Thân (Tóm tắt & Menu) ---
@@ -59,7 +71,12 @@ def generate_layout(dashboard_data, time_left, is_refreshing):
     up_count = total_devices - len(down_devices_all)
     down_count_local = len(down_devices_local)
     
-    countdown_str = f"🔄 Đang làm mới..." if is_refreshing else f"Cập nhật sau {int(time_left)}s"
+    if is_refreshing and progress:
+        countdown_str = f"🔄 Đang làm mới ({progress[0]}/{progress[1]})..."
+    elif is_refreshing:
+        countdown_str = f"🔄 Đang làm mới..."
+    else:
+        countdown_str = f"Cập nhật sau {int(time_left)}s"
     summary_text = Text()
     summary_text.append("  - Tổng số thiết bị: ", style="default")
     summary_text.append(f"{total_devices}\n", style="bold")
@@ -67,6 +84,9 @@ def generate_layout(dashboard_data, time_left, is_refreshing):
     summary_text.append(f"{up_count}\n", style="bold green")
     summary_text.append(f"  - Sự cố (local):    ", style="default")
     summary_text.append(f"{down_count_local}", style="bold red")
+    if stale_since:
+        stale_time = datetime.fromtimestamp(stale_since, tz=hcm_tz).strftime("%Y-%m-%d %H:%M:%S")
+        summary_text.append(f"\n\n  ⏳ Dữ liệu cũ từ {stale_time}, đang quét lại...", style="dim yellow")
     summary_panel = Panel(summary_text, title=f"📊 TỔNG QUAN - {countdown_str}", border_style="cyan")
 
     menu_text = "[1] Giám sát & Chẩn đoán\n[2] Quản lý Cấu hình\n[3] Tương tác Trực tiếp\n[4] Quản lý Danh sách Thiết bị\n[5] Quản lý Policy Lọc Web\n[0] Thoát\n\n[bold]Nhấn [ENTER] để vào Menu[/bold]"
@@ -97,28 +117,78 @@ def generate_layout(dashboard_data, time_left, is_refreshing):
 
     return layout
 
+def _sweep_worker(devices, results_queue):
+    """
+    Chạy trong thread nền: đẩy từng kết quả vào hàng đợi ngay khi có.
+    Thiết bị đã được AdaptivePollScheduler chọn là đến hạn nên luôn probe lại (bỏ qua status cache):
+    TTL của cache (STATUS_TTL_UP) dài hơn chu kỳ kiểm tra lại thiết bị vừa flap (POLL_MIN_INTERVAL).
+    """
+    try:
+        for result in iter_device_statuses(devices, force_refresh=True):
+            results_queue.put(result)
+    finally:
+        results_queue.put(_SWEEP_DONE)
+
 def run_live_dashboard():
-    """Chạy dashboard live-updating cho đến khi người dùng nhấn Enter."""
-    last_update_time = 0
-    dashboard_data = []
+    """
+    Chạy dashboard live-updating cho đến khi người dùng nhấn Enter.
+    Kết quả được cập nhật lên màn hình ngay khi từng thiết bị trả lời; mỗi thiết bị
+    có chu kỳ kiểm tra riêng do AdaptivePollScheduler quyết định.
+    """
+    scheduler = AdaptivePollScheduler()
+    results_queue = queue.Queue()
+    last_inventory_sync = 0
     is_refreshing = False
+    progress = None
+
+    # Hiển thị ngay trạng thái của lần chạy trước (đánh dấu là dữ liệu cũ) trong khi chờ lượt quét đầu tiên
+    snapshot, stale_since = load_snapshot()
+    status_by_name = {name: (name, ip, status) for name, ip, status in snapshot}
+    initial_layout = generate_layout(sorted(status_by_name.values()), REFRESH_INTERVAL, True, stale_since=stale_since)
 
-    with Live(generate_layout([], REFRESH_INTERVAL, True), screen=True, redirect_stderr=False, auto_refresh=False) as live:
+    with Live(initial_layout, screen=True, redirect_stderr=False, auto_refresh=False) as live:
         while True:
             if user_pressed_enter():
                 sys.stdin.readline()
                 break
 
-            current_time = time.time()
-            time_since_last_update = current_time - last_update_time
-            
-            if time_since_last_update >= REFRESH_INTERVAL and not is_refreshing:
-                is_refreshing = True
-                live.update(generate_layout(dashboard_data, 0, is_refreshing), refresh=True)
-                dashboard_data = get_all_device_statuses()
-                last_update_time = time.time()
-                is_refreshing = False
-
-            time_left = REFRESH_INTERVAL - (time.time() - last_update_time)
-            live.update(generate_layout(dashboard_data, time_left, is_refreshing), refresh=True)
-            time.sleep(1)
+            # --- Nhận các kết quả mới nhất từ lượt quét đang chạy ---
+            while True:
+                try:
+                    result = results_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if result is _SWEEP_DONE:
+                    is_refreshing = False
+                    progress = None
+                    stale_since = None
+                    try:
+                        save_snapshot(sorted(status_by_name.values()))
+                    except OSError:
+                        pass # Không ghi được snapshot không được phép làm dừng dashboard
+                    continue
+                name, ip, status = result
+                status_by_name[name] = result
+                scheduler.record(name, status)
+                progress = (progress[0] + 1, progress[1])
+
+            # --- Bắt đầu lượt quét mới cho các thiết bị đã đến hạn ---
+            if not is_refreshing:
+                if time.time() - last_inventory_sync >= REFRESH_INTERVAL:
+                    inventory = get_inventory()
+                    scheduler.sync((record.name, record.ip) for record in inventory.all())
+                    for name in list(status_by_name):
+                        if inventory.get(name) is None:
+                            del status_by_name[name]
+                    last_inventory_sync = time.time()
+                due = scheduler.due()
+                if due:
+                    is_refreshing = True
+                    progress = (0, len(due))
+                    due_devices = {name: {'ip': ip} for name, ip in due}
+                    threading.Thread(target=_sweep_worker, args=(due_devices, results_queue), daemon=True).start()
+
+            dashboard_data = sorted(status_by_name.values())
+            live.update(generate_layout(dashboard_data, scheduler.seconds_until_next(), is_refreshing, progress,
+                                        stale_since), refresh=True)
+            time.sleep(TICK_INTERVAL)
@@ -1,20 +1,70 @@
 # modules/diagnostics.py
+import argparse
+import json
 import os
+import sys
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from core.devices import load_devices
-from core.utils import clear_screen, is_device_reachable
-from core.ui import console, print_info, print_error, print_warning, print_success, Panel
-from core.snmp_client import snmp_walk
+from core.devices import load_devices, get_inventory
+from core.job_scheduler import JobScheduler, as_completed, DONE
+from core.utils import clear_screen, is_device_reachable, load_snmp_config
+from core.ui import console, create_table, print_info, print_error, print_warning, print_success, Panel
+from core.snmp_client import snmp_table, IF_DESCR_OID, IF_OPER_STATUS_OID, IF_IN_ERRORS_OID, IF_OUT_ERRORS_OID
+from modules.connection_check import iter_device_statuses
+
+IF_DIAG_COLUMNS = {'name': IF_DESCR_OID, 'status': IF_OPER_STATUS_OID,
+                   'in_errors': IF_IN_ERRORS_OID, 'out_errors': IF_OUT_ERRORS_OID}
+INTERNET_TEST_IP = "8.8.8.8"
+DIAG_REPORT_DIR = "data/diagnostics"
+DIAG_TZ = ZoneInfo('Asia/Ho_Chi_Minh')
+
+# Mức độ nghiêm trọng trong báo cáo toàn mạng, xếp từ nặng nhất
+SEVERITY_UNREACHABLE = "UNREACHABLE"   # Thiết bị không truy cập được
+SEVERITY_IF_DOWN = "IF_DOWN"           # Có interface down
+SEVERITY_IF_ERRORS = "IF_ERRORS"       # Có interface đếm được gói lỗi
+SEVERITY_SNMP_FAILED = "SNMP_FAILED"   # Thiết bị UP nhưng không lấy được dữ liệu SNMP
+SEVERITY_OK = "OK"
+SEVERITY_ORDER = (SEVERITY_UNREACHABLE, SEVERITY_IF_DOWN, SEVERITY_IF_ERRORS, SEVERITY_SNMP_FAILED, SEVERITY_OK)
+SEVERITY_STYLES = {SEVERITY_UNREACHABLE: "bold red", SEVERITY_IF_DOWN: "red", SEVERITY_IF_ERRORS: "yellow",
+                   SEVERITY_SNMP_FAILED: "magenta", SEVERITY_OK: "green"}
 
 def _ping_test(ip):
     return os.system(f"ping -c 1 -W 2 {ip} > /dev/null 2>&1") == 0
 
+def _branch_gateway(device_name):
+    return "10.10.0.1" if device_name.upper().startswith("HN") else "10.20.0.1"
+
+def _network_conclusion(device_name, gateway_ok, internet_ok):
+    """(kết luận, gợi ý) cho thiết bị không truy cập được, theo kết quả ping Gateway và Internet."""
+    if not gateway_ok: return "Sự cố hạ tầng mạng Core.", "Kiểm tra kết nối và trạng thái của Gateway."
+    if not internet_ok: return "Sự cố mất kết nối Internet toàn chi nhánh.", "Kiểm tra trạng thái WAN trên Router."
+    return f"Sự cố cục bộ tại thiết bị đích ({device_name}).", "Kiểm tra nguồn, cáp mạng của thiết bị."
+
+def _counter(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+def _interface_problems(interfaces):
+    """
+    Các interface có vấn đề trong kết quả snmp_table(IF_DIAG_COLUMNS), theo thứ tự ifIndex:
+    danh sách {name, down, in_errors, out_errors}.
+    """
+    problems = []
+    for index, row in interfaces.items():
+        status_str = str(row.get('status'))
+        down = status_str == '2' or 'down' in status_str.lower()
+        in_errors, out_errors = _counter(row.get('in_errors', 0)), _counter(row.get('out_errors', 0))
+        if down or in_errors > 0 or out_errors > 0:
+            problems.append({'name': row.get('name', index), 'down': down, 'in_errors': in_errors, 'out_errors': out_errors})
+    return problems
+
 def _format_report(device, steps, conclusion, suggestion):
     report_string = ""
     report_string += f"  Thiết bị:         {device['name']} ({device['ip']})\n"
-    report_string += f"  Thời gian:        {datetime.now(tz=ZoneInfo('Asia/Ho_Chi_Minh')).strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+    report_string += f"  Thời gian:        {datetime.now(tz=DIAG_TZ).strftime('%Y-%m-%d %H:%M:%S')}\n\n"
     report_string += "  " + "-"*30 + " CÁC BƯỚC KIỂM TRA " + "-"*30 + "\n\n"
     
     for step in steps:
@@ -26,41 +76,29 @@ def _format_report(device, steps, conclusion, suggestion):
     console.print(Panel(report_string, title="🩺 BÁO CÁO CHẨN ĐOÁN SỰ CỐ", border_style="bold blue"))
 
 def _snmp_deep_dive(device):
-    snmp_community = os.getenv("SNMP_COMMUNITY", "public")
+    snmp_community = device.get('snmp_community') or load_snmp_config()["community"]
     steps = [f"[bold green][PASS][/bold green] Kết nối Ping thành công."]
     problems_found = []
 
     print_info("Thiết bị đang UP. Bắt đầu kiểm tra chuyên sâu bằng SNMP...")
-    
-    IF_NAME_OID = '1.3.6.1.2.1.2.2.1.2'
-#    IF_NAME_OID = '1.3.6.1.2.1.31.1.1.1.1'
-    IF_OPER_STATUS_OID = '1.3.6.1.2.1.2.2.1.8'
-    IF_IN_ERRORS_OID = '1.3.6.1.2.1.2.2.1.14'
-    IF_OUT_ERRORS_OID = '1.3.6.1.2.1.2.2.1.20'
-
-    if_names = snmp_walk(snmp_community, device['ip'], IF_NAME_OID)
-    if 'error' in if_names:
-        steps.append(f"[bold red][FAIL][/bold red] Kết nối SNMP thất bại. Lý do: {if_names['error']}")
+
+    # Lấy cả 4 cột ifTable trong cùng các gói GETBULK, gióng hàng theo ifIndex
+    interfaces = snmp_table(snmp_community, device['ip'], IF_DIAG_COLUMNS)
+    if 'error' in interfaces:
+        steps.append(f"[bold red][FAIL][/bold red] Kết nối SNMP thất bại. Lý do: {interfaces['error']}")
         _format_report(device, steps, "Không thể thực hiện chẩn đoán SNMP.", "Kiểm tra lại cấu hình SNMP trên thiết bị và community string trong file .env.")
         return
 
     steps.append(f"[bold green][PASS][/bold green] Kết nối SNMP và lấy danh sách interface thành công.")
-    
-    if_statuses = snmp_walk(snmp_community, device['ip'], IF_OPER_STATUS_OID)
-    if_in_errors = snmp_walk(snmp_community, device['ip'], IF_IN_ERRORS_OID)
-    if_out_errors = snmp_walk(snmp_community, device['ip'], IF_OUT_ERRORS_OID)
-
-    for index, name in if_names.items():
-        if index == 'error': continue
-        status = if_statuses.get(index)
-        status_str = str(status)
-        if status_str == '2' or (status_str and 'down' in status_str.lower()):
+
+    for item in _interface_problems(interfaces):
+        name = item['name']
+        if item['down']:
             problem = f"Interface [bold magenta]{name}[/bold magenta] đang ở trạng thái [bold red]DOWN[/bold red]."
             problems_found.append(problem)
             steps.append(f"[bold red][FAIL][/bold red] Trạng thái cổng {name}: down")
-        
-        in_errors = int(if_in_errors.get(index, 0))
-        out_errors = int(if_out_errors.get(index, 0))
+
+        in_errors, out_errors = item['in_errors'], item['out_errors']
         if in_errors > 0 or out_errors > 0:
             problem = f"Interface [bold magenta]{name}[/bold magenta] có [bold yellow]{in_errors} lỗi đầu vào[/bold yellow] và [bold yellow]{out_errors} lỗi đầu ra[/bold yellow]."
             problems_found.append(problem)
@@ -96,15 +134,156 @@ def run_diagnostics():
     is_up = is_device_reachable(target_device['ip'])
     if not is_up:
         print_info("Thiết bị không thể truy cập. Bắt đầu chẩn đoán kết nối mạng...")
-        gateway_ip = "10.10.0.1" if target_device['name'].upper().startswith("HN") else "10.20.0.1"
+        gateway_ip = _branch_gateway(target_device['name'])
         steps = []; steps.append(f"[bold red][FAIL][/bold red] Ping đến {target_device['name']} ({target_device['ip']})")
         ping_gateway_ok = _ping_test(gateway_ip)
         steps.append(f"[bold green][PASS][/bold green] Ping đến Gateway Branch({gateway_ip})" if ping_gateway_ok else f"[bold red][FAIL][/bold red] Ping đến Gateway ({gateway_ip})")
-        ping_internet_ok = _ping_test("8.8.8.8")
-        steps.append(f"[bold green][PASS][/bold green] Ping đến Internet (8.8.8.8)" if ping_internet_ok else f"[bold red][FAIL][/bold red] Ping đến Internet (8.8.8.8)")
-        if not ping_gateway_ok: conclusion = "Sự cố hạ tầng mạng Core."; suggestion = "Kiểm tra kết nối và trạng thái của Gateway."
-        elif not ping_internet_ok: conclusion = "Sự cố mất kết nối Internet toàn chi nhánh."; suggestion = "Kiểm tra trạng thái WAN trên Router."
-        else: conclusion = f"Sự cố cục bộ tại thiết bị đích ({target_device['name']})."; suggestion = "Kiểm tra nguồn, cáp mạng của thiết bị."
+        ping_internet_ok = _ping_test(INTERNET_TEST_IP)
+        steps.append(f"[bold green][PASS][/bold green] Ping đến Internet ({INTERNET_TEST_IP})" if ping_internet_ok else f"[bold red][FAIL][/bold red] Ping đến Internet ({INTERNET_TEST_IP})")
+        conclusion, suggestion = _network_conclusion(target_device['name'], ping_gateway_ok, ping_internet_ok)
         _format_report(target_device, steps, conclusion, suggestion)
     else:
         _snmp_deep_dive(target_device)
+
+# --- CHẨN ĐOÁN TOÀN MẠNG ---
+# Kiểm tra kết nối toàn bộ thiết bị bằng bộ quét asyncio (connection_check); thiết bị nào UP được đưa ngay
+# vào hàng đợi SNMP riêng (không dùng chung giới hạn SSH của scheduler chính, không qua bước kiểm tra TCP).
+_diag_scheduler = None
+
+def _get_diag_scheduler(workers):
+    global _diag_scheduler
+    if _diag_scheduler is None or _diag_scheduler.max_workers != workers:
+        _diag_scheduler = JobScheduler(max_workers=workers, max_per_branch=workers, max_per_vendor=workers)
+    return _diag_scheduler
+
+def _diagnose_snmp(device):
+    """Chạy trong worker: lấy ifTable qua SNMP và phân loại thiết bị. Trả về các trường cập nhật vào báo cáo."""
+    community = device.get('snmp_community') or load_snmp_config()["community"]
+    interfaces = snmp_table(community, device['ip'], IF_DIAG_COLUMNS)
+    if 'error' in interfaces:
+        return {'severity': SEVERITY_SNMP_FAILED, 'snmp_error': interfaces['error']}
+    problems = _interface_problems(interfaces)
+    down = [p['name'] for p in problems if p['down']]
+    errors = [{'interface': p['name'], 'in_errors': p['in_errors'], 'out_errors': p['out_errors']}
+              for p in problems if p['in_errors'] or p['out_errors']]
+    errors.sort(key=lambda e: e['in_errors'] + e['out_errors'], reverse=True)
+    severity = SEVERITY_IF_DOWN if down else SEVERITY_IF_ERRORS if errors else SEVERITY_OK
+    return {'severity': severity, 'interfaces': len(interfaces), 'down': down, 'errors': errors}
+
+def _severity_key(entry):
+    return (SEVERITY_ORDER.index(entry['severity']), -len(entry['down']),
+            -sum(e['in_errors'] + e['out_errors'] for e in entry['errors']), entry['device'])
+
+def diagnose_fleet(devices, workers=None, force_refresh=True):
+    """
+    Chẩn đoán đồng thời nhiều thiết bị (`devices` là dict {name: info} như load_devices()): kiểm tra kết nối,
+    rồi đọc ifTable qua SNMP với tối đa `workers` thiết bị cùng lúc (mặc định SNMP_DIAG_WORKERS trong .env).
+    Thiết bị không truy cập được được kết luận nguyên nhân bằng ping Gateway (một lần cho mỗi Gateway) và Internet.
+    Trả về danh sách kết quả, mỗi thiết bị một dict, xếp theo mức độ nghiêm trọng giảm dần.
+    """
+    scheduler = _get_diag_scheduler(workers or load_snmp_config()["workers"])
+    report, jobs, unreachable = {}, [], []
+    for name, ip, status in iter_device_statuses(devices, force_refresh=force_refresh):
+        device = {'name': name, **devices[name]}
+        report[name] = {'device': name, 'ip': ip, 'reachability': status, 'severity': SEVERITY_OK,
+                        'interfaces': None, 'down': [], 'errors': [], 'snmp_error': None, 'conclusion': None}
+        if status == "UP":
+            jobs.append(scheduler.submit(_diagnose_snmp, device, device=device))
+        else:
+            report[name]['severity'] = SEVERITY_UNREACHABLE
+            unreachable.append(name)
+
+    pings = {}
+    if unreachable:
+        for ip in {_branch_gateway(name) for name in unreachable} | {INTERNET_TEST_IP}:
+            pings[ip] = scheduler.submit(_ping_test, ip)
+    for job in as_completed(jobs):
+        entry = report[job.device['name']]
+        if job.state == DONE:
+            entry.update(job.result)
+        else:
+            entry.update(severity=SEVERITY_SNMP_FAILED, snmp_error=str(job.error))
+    for name in unreachable:
+        conclusion, suggestion = _network_conclusion(name, pings[_branch_gateway(name)].wait(), pings[INTERNET_TEST_IP].wait())
+        report[name]['conclusion'] = f"{conclusion} {suggestion}"
+    return sorted(report.values(), key=_severity_key)
+
+def _fleet_summary(results):
+    counts = {severity: 0 for severity in SEVERITY_ORDER}
+    for entry in results:
+        counts[entry['severity']] += 1
+    return counts
+
+def print_fleet_report(results):
+    """In báo cáo toàn mạng: mỗi thiết bị một dòng, thiết bị nghiêm trọng nhất ở đầu."""
+    table = create_table("🩺 BÁO CÁO CHẨN ĐOÁN TOÀN MẠNG", {"Mức độ": "bold", "Thiết bị": "cyan", "IP": "white",
+                                                          "Interface": "white", "Down": "red", "Lỗi vào/ra": "yellow",
+                                                          "Chi tiết": "white"})
+    for entry in results:
+        in_errors = sum(e['in_errors'] for e in entry['errors'])
+        out_errors = sum(e['out_errors'] for e in entry['errors'])
+        if entry['conclusion'] or entry['snmp_error']:
+            detail = entry['conclusion'] or f"SNMP: {entry['snmp_error']}"
+        else:
+            names = entry['down'] or [e['interface'] for e in entry['errors']]
+            detail = ", ".join(names[:5]) + (f" (+{len(names) - 5})" if len(names) > 5 else "")
+        style = SEVERITY_STYLES[entry['severity']]
+        table.add_row(f"[{style}]{entry['severity']}[/{style}]", entry['device'], entry['ip'],
+                      str(entry['interfaces']) if entry['interfaces'] is not None else "-",
+                      str(len(entry['down'])), f"{in_errors}/{out_errors}" if entry['errors'] else "0/0", detail)
+    console.print(table)
+    counts = _fleet_summary(results)
+    print_info(f"{len(results)} thiết bị: " + ", ".join(f"{counts[s]} {s}" for s in SEVERITY_ORDER))
+
+def export_fleet_report(results, path=None, scope=None):
+    """Ghi báo cáo toàn mạng ra file JSON (mặc định data/diagnostics/fleet_<thời gian>.json). Trả về đường dẫn."""
+    now = datetime.now(tz=DIAG_TZ)
+    if not path:
+        path = os.path.join(DIAG_REPORT_DIR, f"fleet_{now.strftime('%Y%m%d_%H%M%S')}.json")
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = {"generated_at": now.isoformat(timespec="seconds"), "scope": scope or "all",
+               "summary": _fleet_summary(results), "devices": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return path
+
+def _select_devices(branch=None):
+    devices = load_devices()
+    if not branch:
+        return devices
+    return {record.name: devices[record.name] for record in get_inventory().by_branch(branch) if record.name in devices}
+
+def run_fleet_diagnostics():
+    clear_screen()
+    console.rule("[bold yellow]🩺 Chẩn đoán Toàn mạng[/bold yellow]")
+    branch = input("Nhập chi nhánh cần chẩn đoán (ví dụ: HN, HCM; Enter = toàn bộ): ").strip().upper()
+    devices = _select_devices(branch)
+    if not devices: print_warning(f"Không tìm thấy thiết bị nào{' cho chi nhánh ' + branch if branch else ''}."); return
+
+    print_info(f"Bắt đầu chẩn đoán {len(devices)} thiết bị (tối đa {load_snmp_config()['workers']} thiết bị SNMP đồng thời)...")
+    results = diagnose_fleet(devices)
+    print_fleet_report(results)
+    if input("\nXuất báo cáo ra file JSON? (y/N): ").strip().lower() == 'y':
+        print_success(f"Đã xuất báo cáo: {export_fleet_report(results, scope=branch or None)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Chẩn đoán đồng thời toàn bộ thiết bị hoặc một chi nhánh (kết nối + SNMP).")
+    parser.add_argument("--branch", help="Chỉ chẩn đoán thiết bị của chi nhánh này (vd HN)")
+    parser.add_argument("--workers", type=int, help="Số thiết bị kiểm tra SNMP đồng thời (mặc định SNMP_DIAG_WORKERS)")
+    parser.add_argument("--json", nargs="?", const="", metavar="PATH", help="Xuất báo cáo ra file JSON (mặc định trong data/diagnostics/)")
+    args = parser.parse_args()
+    branch = args.branch.upper() if args.branch else None
+    devices = _select_devices(branch)
+    if not devices:
+        print_warning("Không tìm thấy thiết bị nào."); sys.exit(1)
+    results = diagnose_fleet(devices, workers=args.workers)
+    print_fleet_report(results)
+    if args.json is not None:
+        print_success(f"Đã xuất báo cáo: {export_fleet_report(results, path=args.json or None, scope=branch)}")
+    # Mã thoát khác 0 khi có thiết bị không ở trạng thái OK, để cron / giám sát phát hiện
+    if any(entry['severity'] != SEVERITY_OK for entry in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 # modules/system_health.py
 from core.ssh_client import SSHClient
 from core.vendors.vendor_factory import get_vendor_class
+from core.devices import get_inventory
+from core.utils import load_credentials
+from core.ui import console, print_info, print_error, print_warning
+from core.job_scheduler import scheduler, as_completed, PRIORITY_NORMAL, DONE, SKIPPED
 
 def show_system_health(device, username, password):
     ssh = SSHClient(device, username, password)
@@ -17,3 +21,41 @@ def show_system_health(device, username, password):
     health_info = vendor.get_system_health()
     print(health_info)
     ssh.disconnect()
+
+def _collect_system_health(device, username, password):
+    """Lấy system health của một thiết bị (chạy trong worker của scheduler). Trả về chuỗi kết quả."""
+    VendorClass = get_vendor_class(device["device_type"])
+    if not VendorClass:
+        return f"❌ Chưa hỗ trợ thiết bị loại: {device['device_type']}"
+    ssh = SSHClient(device, username, password)
+    if not ssh.connect():
+        return "❌ Không thể kết nối"
+    try:
+        return VendorClass(ssh).get_system_health()
+    finally:
+        ssh.disconnect()
+
+def show_fleet_health(branch=None):
+    """Kiểm tra System Health của toàn bộ thiết bị (hoặc một chi nhánh), in kết quả ngay khi từng thiết bị xong."""
+    inventory = get_inventory()
+    records = inventory.by_branch(branch) if branch else inventory.all()
+    if not records:
+        print_warning("Không có thiết bị nào."); return
+    username, password = load_credentials()
+    if not (username and password):
+        print_error("Không tìm thấy credentials."); return
+
+    print_info(f"Đang kiểm tra System Health của {len(records)} thiết bị...")
+    devices = [record.as_dict() for record in records]
+    jobs = scheduler.map_devices(_collect_system_health, devices, username, password, priority=PRIORITY_NORMAL)
+    skipped = []
+    for job in as_completed(jobs):
+        if job.state == SKIPPED:
+            skipped.append(job); continue
+        output = job.result if job.state == DONE else f"❌ Lỗi: {job.error}"
+        console.rule(f"[bold cyan]{job.name}[/bold cyan]")
+        print(output)
+    if skipped:
+        console.rule("[bold yellow]Bỏ qua[/bold yellow]")
+        for job in skipped:
+            print_warning(f"⏭️ {job.name}: {job.error}")
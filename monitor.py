@@ -9,7 +9,7 @@ from telegram.constants import ParseMode
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
-from core.devices import load_devices
+from core.devices import get_inventory
 from core.utils import is_device_reachable
 
 # --- Tải cấu hình từ file .env ---
@@ -80,7 +80,7 @@ def run_diagnostics(other_branch_id):
     # --- BƯỚC 2: KIỂM TRA REMOTE (Logic mới) ---
     # Nếu đến được đây, nghĩa là Local & Internet đã OK.
     try:
-        devices = load_devices()
+        inventory = get_inventory()
         
         # Xác định các thiết bị lõi của chi nhánh kia
         remote_router_name = f"{other_branch_id}-Router"
@@ -88,9 +88,12 @@ def run_diagnostics(other_branch_id):
         remote_core_name = f"{other_branch_id}-Core"
 
         # Lấy IP của các thiết bị remote từ file devices.txt
-        remote_router_ip = devices.get(remote_router_name, {}).get('ip')
-        remote_fw_ip = devices.get(remote_fw_name, {}).get('ip')
-        remote_core_ip = devices.get(remote_core_name, {}).get('ip')
+        remote_router = inventory.get(remote_router_name)
+        remote_fw = inventory.get(remote_fw_name)
+        remote_core = inventory.get(remote_core_name)
+        remote_router_ip = remote_router.ip if remote_router else None
+        remote_fw_ip = remote_fw.ip if remote_fw else None
+        remote_core_ip = remote_core.ip if remote_core else None
 
         # Kiểm tra lần lượt theo topo mạng (dùng hàm check port 22)
         if remote_router_ip and not is_device_reachable(remote_router_ip):
@@ -0,0 +1,83 @@
+# tests/test_async_ssh.py
+import asyncio
+import socket
+
+import asyncssh
+import pytest
+
+from core.async_ssh import AsyncSSHSession
+from tools.mock_ssh_server import FORTI_PAGE_LINES, MockDevice, start_mock_server
+
+def _free_port_pair():
+    """Cổng p còn trống sao cho p + 1 cũng trống (mock dùng p cho Cisco, p + 1 cho FortiOS)."""
+    while True:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        try:
+            with socket.socket() as s:
+                s.bind(("127.0.0.1", port + 1))
+            return port
+        except OSError:
+            continue
+
+async def _fortinet_session(commands, config_lines=200):
+    port = _free_port_pair()
+    servers = await start_mock_server("127.0.0.1", port, config_lines=config_lines)
+    session = AsyncSSHSession("fortinet", "127.0.0.1", "admin", "admin", port=port + 1, command_timeout=10)
+    try:
+        await session.open()
+        return [await session.send_command(command) for command in commands], session
+    finally:
+        await session.close()
+        for server in servers:
+            server.close()
+
+def test_fortinet_paging_is_disabled_for_long_output():
+    expected = MockDevice("fortinet", "DEV-127-0-0-1", 200).handle("show full-configuration")
+    assert len(expected.splitlines()) > FORTI_PAGE_LINES * 3
+
+    (full_config, console), session = asyncio.run(
+        _fortinet_session(["show full-configuration", "get system console"]))
+    assert "--More--" not in full_config
+    assert full_config.replace("\r", "").strip() == expected.strip()
+    assert "standard" in console
+    assert not session.is_alive()
+
+def test_mock_fortinet_pages_by_default():
+    device = MockDevice("fortinet", "FGT", 200)
+    assert device.console_output == "more"
+    device.handle("config system console")
+    device.handle("set output standard")
+    device.handle("end")
+    assert device.console_output == "standard"
+
+class _HangingConnection:
+    """Kết nối asyncssh giả: đăng nhập được nhưng không mở được shell."""
+
+    def __init__(self):
+        self.closed = False
+
+    async def create_process(self, **kwargs):
+        raise asyncio.TimeoutError()
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+def test_failed_open_closes_the_connection(monkeypatch):
+    conn = _HangingConnection()
+
+    async def fake_connect(*args, **kwargs):
+        return conn
+
+    monkeypatch.setattr(asyncssh, "connect", fake_connect)
+    session = AsyncSSHSession("cisco_ios", "127.0.0.1", "admin", "admin")
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(session.open())
+    assert conn.closed and not session.is_alive()
@@ -0,0 +1,67 @@
+# tests/test_circuit_breaker.py
+import threading
+import time
+
+from core.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from core.job_scheduler import JobScheduler, DONE
+
+KEY = ("10.0.0.1", 22)
+
+def _open_breaker(base_backoff=0.05):
+    breaker = CircuitBreaker(failure_threshold=2, base_backoff=base_backoff)
+    breaker.record_failure(KEY)
+    breaker.record_failure(KEY)
+    assert breaker.state(KEY) == OPEN
+    return breaker
+
+def _allowed_in_other_thread(breaker):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(allowed=breaker.allow(KEY)[0]))
+    thread.start()
+    thread.join()
+    return result["allowed"]
+
+def test_open_breaker_rejects_until_backoff():
+    breaker = _open_breaker(base_backoff=60)
+    allowed, reason = breaker.allow(KEY)
+    assert not allowed and reason
+
+def test_trial_holder_can_check_again_other_threads_cannot():
+    breaker = _open_breaker()
+    time.sleep(0.06)
+    assert breaker.allow(KEY) == (True, None)
+    assert breaker.state(KEY) == HALF_OPEN
+    assert breaker.allow(KEY) == (True, None)  # Cùng thread (vd SSHClient.connect sau gate của scheduler)
+    assert not _allowed_in_other_thread(breaker)
+    breaker.record_success(KEY)
+    assert breaker.state(KEY) == CLOSED
+
+def test_scheduler_gate_and_job_share_the_trial():
+    breaker = _open_breaker()
+    time.sleep(0.06)
+
+    def gate(device):
+        return breaker.allow(KEY)[1]
+
+    def job(device):
+        # Job kiểm tra lại breaker trước khi kết nối (như SSHClient.connect) rồi báo kết quả
+        allowed, reason = breaker.allow(KEY)
+        if not allowed:
+            return reason
+        breaker.record_success(KEY)
+        return "connected"
+
+    scheduler = JobScheduler(max_workers=2, gate=gate)
+    device = {"name": "HN-R1", "ip": KEY[0], "device_type": "cisco_ios"}
+    submitted = scheduler.submit(job, device, device=device)
+    assert submitted.wait(5) == "connected"
+    assert submitted.state == DONE
+    assert breaker.state(KEY) == CLOSED
+
+def test_failed_trial_reopens_with_longer_backoff():
+    breaker = _open_breaker()
+    time.sleep(0.06)
+    assert breaker.allow(KEY)[0]
+    breaker.record_failure(KEY)
+    assert breaker.state(KEY) == OPEN
+    assert not breaker.allow(KEY)[0]
@@ -0,0 +1,57 @@
+# tests/test_cisco_replace.py
+import pytest
+
+from core.vendors.vendor_base import ConfigReplaceError
+from core.vendors.vendor_cisco import CiscoDevice, CISCO_CHECKPOINT_FILE, CISCO_REPLACE_FILE
+
+RUNNING = "hostname HN-Router\n!\nend\n"
+
+class FakeSSH:
+    """Phiên SSH giả: ghi lại file đã chép / lệnh đã chạy, 'configure replace' trả lời theo `replies`."""
+
+    def __init__(self, replies):
+        self.replies = replies  # {file: output hoặc Exception}
+        self.flash = {}
+        self.commands = []
+
+    def run_batch(self, commands):
+        return {command: RUNNING for command in commands}
+
+    def upload(self, content, remote_path):
+        self.flash[remote_path] = content
+        return len(content)
+
+    def run(self, command, read_timeout=None):
+        self.commands.append(command)
+        if command.startswith("configure replace "):
+            reply = self.replies[command.split()[2]]
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+        if command.startswith("delete /force "):
+            self.flash.pop(command.split()[-1], None)
+        return ""
+
+def test_successful_replace_cleans_up_both_files():
+    ssh = FakeSSH({CISCO_REPLACE_FILE: "Total number of passes: 1\nRollback Done"})
+    assert "Rollback Done" in CiscoDevice(ssh).replace_config(RUNNING)
+    assert ssh.flash == {}
+
+def test_interrupted_replace_rolls_back_to_checkpoint():
+    ssh = FakeSSH({CISCO_REPLACE_FILE: TimeoutError("ReadTimeout"), CISCO_CHECKPOINT_FILE: "Rollback Done"})
+    with pytest.raises(ConfigReplaceError, match="đã rollback"):
+        CiscoDevice(ssh).replace_config(RUNNING)
+    assert f"configure replace {CISCO_CHECKPOINT_FILE} force" in ssh.commands
+    assert ssh.flash == {}
+
+def test_interrupted_replace_keeps_checkpoint_when_rollback_fails():
+    ssh = FakeSSH({CISCO_REPLACE_FILE: TimeoutError("ReadTimeout"), CISCO_CHECKPOINT_FILE: OSError("Socket is closed")})
+    with pytest.raises(ConfigReplaceError, match=CISCO_CHECKPOINT_FILE):
+        CiscoDevice(ssh).replace_config(RUNNING)
+    assert CISCO_CHECKPOINT_FILE in ssh.flash
+
+def test_failed_replace_reports_device_output():
+    ssh = FakeSSH({CISCO_REPLACE_FILE: "% Invalid input\nRollback Failed", CISCO_CHECKPOINT_FILE: "Rollback Done"})
+    with pytest.raises(ConfigReplaceError, match="Invalid input"):
+        CiscoDevice(ssh).replace_config(RUNNING)
+    assert ssh.flash == {}
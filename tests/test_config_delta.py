@@ -0,0 +1,237 @@
+# tests/test_config_delta.py
+from core.config_delta import cisco_delta, fortinet_delta, cisco_missing, fortinet_missing
+from core.template_registry import TemplateRegistry
+
+CISCO_RUNNING = """Building configuration...
+!
+hostname HN-Router
+!
+interface GigabitEthernet0/0
+ description WAN
+ ip address 10.0.0.1 255.255.255.0
+ ip address 10.0.1.1 255.255.255.0 secondary
+ ip address 10.0.2.1 255.255.255.0 secondary
+!
+ip route 0.0.0.0 0.0.0.0 10.0.0.254
+end
+"""
+
+CISCO_BACKUP = """hostname HN-Router
+!
+interface GigabitEthernet0/0
+ description WAN
+ ip address 10.0.0.1 255.255.255.0
+ ip address 10.0.1.1 255.255.255.0 secondary
+!
+ip route 0.0.0.0 0.0.0.0 10.0.0.254
+end
+"""
+
+def test_cisco_identical_configs_have_no_delta():
+    assert cisco_delta(CISCO_RUNNING, CISCO_RUNNING) == []
+
+def test_cisco_extra_secondary_address_is_removed():
+    assert cisco_delta(CISCO_RUNNING, CISCO_BACKUP) == [
+        "interface GigabitEthernet0/0",
+        " no ip address 10.0.2.1 255.255.255.0 secondary",
+    ]
+
+def test_cisco_missing_secondary_address_is_added():
+    assert cisco_delta(CISCO_BACKUP, CISCO_RUNNING) == [
+        "interface GigabitEthernet0/0",
+        " ip address 10.0.2.1 255.255.255.0 secondary",
+    ]
+
+def test_cisco_single_value_commands_are_overwritten_not_negated():
+    target = CISCO_BACKUP.replace("hostname HN-Router", "hostname HN-Edge").replace(
+        "ip address 10.0.0.1 255.255.255.0", "ip address 10.0.0.2 255.255.255.0", 1)
+    assert cisco_delta(CISCO_BACKUP, target) == [
+        "hostname HN-Edge",
+        "interface GigabitEthernet0/0",
+        " ip address 10.0.0.2 255.255.255.0",
+    ]
+
+def test_cisco_primary_address_removed_when_only_secondaries_remain():
+    target = CISCO_BACKUP.replace(" ip address 10.0.0.1 255.255.255.0\n", "")
+    assert cisco_delta(CISCO_BACKUP, target) == [
+        "interface GigabitEthernet0/0",
+        " no ip address 10.0.0.1 255.255.255.0",
+    ]
+
+def test_cisco_extra_and_missing_lines():
+    running = CISCO_BACKUP.replace("!\nip route", "ip http server\n!\nip route")
+    target = CISCO_BACKUP.replace("ip route 0.0.0.0 0.0.0.0 10.0.0.254", "ip route 0.0.0.0 0.0.0.0 10.0.0.253")
+    assert cisco_delta(running, target) == [
+        "no ip http server",
+        "no ip route 0.0.0.0 0.0.0.0 10.0.0.254",
+        "ip route 0.0.0.0 0.0.0.0 10.0.0.253",
+    ]
+
+FORTI_RUNNING = """config firewall address
+    edit "a1"
+        set subnet 10.0.1.0 255.255.255.0
+    next
+    edit "a2"
+        set subnet 10.0.2.0 255.255.255.0
+    next
+end
+config firewall addrgrp
+    edit "g1"
+        set member "a1" "a2"
+    next
+end
+config system global
+    set hostname "FGT-HN"
+    set admintimeout 30
+end
+"""
+
+FORTI_BACKUP = """config firewall address
+    edit "a1"
+        set subnet 10.0.1.0 255.255.255.0
+    next
+end
+config firewall addrgrp
+    edit "g1"
+        set member "a1"
+    next
+end
+config system global
+    set hostname "FGT-HN"
+end
+"""
+
+def test_fortinet_identical_configs_have_no_delta():
+    assert fortinet_delta(FORTI_RUNNING, FORTI_RUNNING) == []
+
+def test_fortinet_deletes_run_after_sets_that_drop_references():
+    commands = fortinet_delta(FORTI_RUNNING, FORTI_BACKUP)
+    assert commands == [
+        "config firewall addrgrp", 'edit "g1"', 'set member "a1"', "next", "end",
+        "config system global", "unset admintimeout", "end",
+        "config firewall address", 'delete "a2"', "end",
+    ]
+    assert commands.index('set member "a1"') < commands.index('delete "a2"')
+
+def test_fortinet_deletes_referencing_objects_first():
+    target = FORTI_BACKUP.replace('config firewall addrgrp\n    edit "g1"\n        set member "a1"\n    next\nend\n',
+                                  "config firewall addrgrp\nend\n")
+    commands = fortinet_delta(FORTI_RUNNING, target)
+    assert commands.index('delete "g1"') < commands.index('delete "a2"')
+
+def test_fortinet_missing_entries_are_added():
+    commands = fortinet_delta(FORTI_BACKUP, FORTI_RUNNING)
+    assert commands == [
+        "config firewall address", 'edit "a2"', "set subnet 10.0.2.0 255.255.255.0", "next", "end",
+        "config firewall addrgrp", 'edit "g1"', 'set member "a1" "a2"', "next", "end",
+        "config system global", "set admintimeout 30", "end",
+    ]
+
+# --- cisco_missing / fortinet_missing với các mẫu đi kèm (core/templates) ---
+TEMPLATES = TemplateRegistry(cache_dir=None)
+
+def _render(vendor, template_id, **variables):
+    return TEMPLATES.get(vendor, template_id).render(variables)
+
+FORTI_SNMP_RUNNING = """config system snmp community
+    edit 1
+        set name "public"
+        set events cpu-usage mem-usage
+        config hosts
+            edit 1
+                set ip 10.10.4.10 255.255.255.255
+            next
+        end
+    next
+end
+"""
+
+def test_cisco_template_compliant_and_missing():
+    commands = _render("cisco_ios", "snmp_readonly", community_string="noc-ro")
+    assert cisco_missing("hostname R1\nsnmp-server community noc-ro RO\nend\n", commands) == []
+    assert cisco_missing("hostname R1\nend\n", commands) == ["snmp-server community noc-ro RO"]
+
+def test_fortinet_auto_id_templates_match_existing_entry_by_name():
+    for template_id in ("snmp_readonly", "snmp_community_host"):
+        commands = _render("fortinet", template_id, community_string="public", host_ip="10.10.4.10")
+        assert fortinet_missing(FORTI_SNMP_RUNNING, commands) == [], template_id
+
+def test_fortinet_auto_id_template_patches_existing_entry_in_place():
+    commands = _render("fortinet", "snmp_community_host", community_string="public", host_ip="10.10.9.9")
+    assert fortinet_missing(FORTI_SNMP_RUNNING, commands) == [
+        "config system snmp community", "edit 1", "config hosts", "edit 1",
+        "set ip 10.10.9.9 255.255.255.255", "next", "end", "next", "end"]
+
+def test_fortinet_auto_id_template_creates_new_entry_for_new_name():
+    commands = _render("fortinet", "snmp_readonly", community_string="noc-ro")
+    assert fortinet_missing(FORTI_SNMP_RUNNING, commands) == [
+        "config system snmp community", "edit 0", 'set name "noc-ro"', "set events cpu-usage mem-usage", "next", "end"]
+
+def test_fortinet_named_templates_compliant_and_missing():
+    running = """config system interface
+    edit "port2"
+        set allowaccess ping https ssh snmp
+    next
+end
+config system snmp sysinfo
+    set status enable
+    set description ""
+    set contact "admin@example.com"
+    set location ""
+    set engine-id-type auto
+end
+"""
+    assert fortinet_missing(running, _render("fortinet", "interface_allowaccess")) == []
+    assert fortinet_missing(running, _render("fortinet", "snmp_sysinfo")) == []
+    assert fortinet_missing(running, _render("fortinet", "interface_allowaccess", access_list="ping")) == [
+        "config system interface", 'edit "port2"', "set allowaccess ping", "next", "end"]
+
+CISCO_ACL = """hostname HN-Router
+!
+access-list 10 permit 10.0.1.0 0.0.0.255
+access-list 10 deny   10.0.0.0 0.255.255.255
+access-list 10 permit any
+!
+ip access-list extended WEB
+ deny   tcp any host 10.0.0.5 eq 80
+ permit tcp any any eq 80
+!
+end
+"""
+
+def test_cisco_reordered_numbered_acl_is_rewritten():
+    running = CISCO_ACL.replace("access-list 10 permit 10.0.1.0 0.0.0.255\naccess-list 10 deny   10.0.0.0 0.255.255.255",
+                                "access-list 10 deny   10.0.0.0 0.255.255.255\naccess-list 10 permit 10.0.1.0 0.0.0.255")
+    assert cisco_delta(running, CISCO_ACL) == [
+        "no access-list 10",
+        "access-list 10 permit 10.0.1.0 0.0.0.255",
+        "access-list 10 deny   10.0.0.0 0.255.255.255",
+        "access-list 10 permit any",
+    ]
+
+def test_cisco_reordered_named_acl_is_rewritten():
+    running = CISCO_ACL.replace(" deny   tcp any host 10.0.0.5 eq 80\n permit tcp any any eq 80",
+                                " permit tcp any any eq 80\n deny   tcp any host 10.0.0.5 eq 80")
+    assert cisco_delta(running, CISCO_ACL) == [
+        "no ip access-list extended WEB",
+        "ip access-list extended WEB",
+        " deny   tcp any host 10.0.0.5 eq 80",
+        " permit tcp any any eq 80",
+    ]
+
+def test_cisco_acl_lines_appended_at_end_are_not_rewritten():
+    running = CISCO_ACL.replace("access-list 10 permit any\n", "")
+    assert cisco_delta(running, CISCO_ACL) == ["access-list 10 permit any"]
+
+def test_cisco_no_ip_address_is_replaced_not_negated():
+    running = CISCO_BACKUP.replace(" ip address 10.0.0.1 255.255.255.0\n ip address 10.0.1.1 255.255.255.0 secondary\n",
+                                   " no ip address\n")
+    target = CISCO_BACKUP.replace(" ip address 10.0.1.1 255.255.255.0 secondary\n", "")
+    assert cisco_delta(running, target) == [
+        "interface GigabitEthernet0/0",
+        " ip address 10.0.0.1 255.255.255.0",
+    ]
+    assert cisco_delta(target, running) == [
+        "interface GigabitEthernet0/0",
+        " no ip address",
+    ]
@@ -0,0 +1,26 @@
+# tests/test_config_diff.py
+from datetime import datetime, timedelta
+
+from core.backup_store import BackupStore, BACKUP_TZ
+from core.config_diff import diff_device
+
+SECTIONS = [("system global", 'config system global\n    set hostname "FGT-HN"\nend\n')]
+FULL = 'config system global\n    set hostname "FGT-HN"\n    set admintimeout 5\n    set timezone 57\nend\n'
+T0 = datetime(2026, 10, 1, 8, 0, tzinfo=BACKUP_TZ)
+
+def test_sections_and_full_backups_are_not_diffed_against_each_other(tmp_path):
+    store = BackupStore(str(tmp_path))
+    store.put_sections("FGT-HN", SECTIONS, vendor="fortinet", timestamp=T0)
+    store.put("FGT-HN", FULL, vendor="fortinet", timestamp=T0 + timedelta(hours=1))
+    assert diff_device("FGT-HN", store)["status"] == "new"  # Bản full đầu tiên
+    store.put_sections("FGT-HN", SECTIONS, vendor="fortinet", timestamp=T0 + timedelta(hours=2))
+    assert diff_device("FGT-HN", store)["status"] == "unchanged"
+
+def test_change_between_backups_of_the_same_kind_is_written(tmp_path):
+    store = BackupStore(str(tmp_path))
+    store.put("R1", "hostname R1\n", vendor="cisco_ios", timestamp=T0)
+    store.put("R1", "hostname R1-NEW\n", vendor="cisco_ios", timestamp=T0 + timedelta(hours=1))
+    result = diff_device("R1", store)
+    assert result["status"] == "changed" and (result["added"], result["removed"]) == (1, 1)
+    with open(result["path"], encoding="utf-8") as f:
+        assert "+hostname R1-NEW" in f.read()
@@ -0,0 +1,122 @@
+# tests/test_config_push.py
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from core import config_push
+from core.config_push import PUSH_OK, PUSH_SKIPPED, PUSH_FAILED
+from core.job_scheduler import JobScheduler
+from core.backup_store import BackupStore, BACKUP_TZ
+
+POLICY = {"wave_size": 2, "canaries": 1, "max_failures": 0, "max_failure_rate": 0.5}
+
+def _plan(count):
+    return [({"name": f"HN-SW-{i:02}", "ip": f"10.0.0.{i}", "device_type": "cisco_ios"}, ["hostname X"])
+            for i in range(1, count + 1)]
+
+def _run(monkeypatch, plan, skipped=(), failed=()):
+    """Chạy run_push với scheduler riêng: thiết bị trong `skipped` bị gate chặn, trong `failed` đẩy lỗi."""
+    pushed, rules = [], []
+
+    def fake_push(device, username, password, commands):
+        pushed.append(device["name"])
+        return (False, "lỗi") if device["name"] in failed else (True, "")
+
+    gate = lambda device: "breaker mở" if device["name"] in skipped else None
+    monkeypatch.setattr(config_push, "scheduler", JobScheduler(max_workers=4, gate=gate))
+    monkeypatch.setattr(config_push, "push_commands", fake_push)
+    monkeypatch.setattr(config_push.console, "rule", rules.append)
+    outcome = config_push.run_push(plan, "u", "p", POLICY, on_result=lambda *args: None)
+    outcome["waves"] = rules
+    return outcome, pushed
+
+def test_skipped_canary_promotes_next_device(monkeypatch):
+    outcome, pushed = _run(monkeypatch, _plan(4), skipped={"HN-SW-01"})
+    assert outcome["stopped"] is None
+    assert outcome["results"]["HN-SW-01"] == PUSH_SKIPPED
+    # HN-SW-02 chạy một mình làm canary, thành công rồi mới tới đợt thường
+    assert ["(canary)" in rule for rule in outcome["waves"]] == [True, True, False]
+    assert pushed[0] == "HN-SW-02"
+    assert set(pushed) == {"HN-SW-02", "HN-SW-03", "HN-SW-04"}
+    assert all(outcome["results"][name] == PUSH_OK for name in pushed)
+
+def test_failed_promoted_canary_stops_the_push(monkeypatch):
+    outcome, pushed = _run(monkeypatch, _plan(4), skipped={"HN-SW-01"}, failed={"HN-SW-02"})
+    assert outcome["stopped"]
+    assert pushed == ["HN-SW-02"]
+    assert outcome["results"]["HN-SW-02"] == PUSH_FAILED
+    assert outcome["results"]["HN-SW-03"] == config_push.PUSH_CANCELLED
+
+class FakeSSHClient:
+    sessions = []
+
+    def __init__(self, device, username, password):
+        self.conn = self
+        self.discarded = False
+        FakeSSHClient.sessions.append(self)
+
+    def connect(self):
+        return True
+
+    def send_config_set(self, commands):
+        raise TimeoutError("Pattern not detected")
+
+    def disconnect(self, discard=False):
+        if self.conn:
+            self.discarded = discard
+            self.conn = None
+
+def test_push_error_discards_pooled_session(monkeypatch):
+    FakeSSHClient.sessions.clear()
+    monkeypatch.setattr(config_push, "SSHClient", FakeSSHClient)
+    success, detail = config_push.push_commands(_plan(1)[0][0], "u", "p", ["hostname X"])
+    assert not success and "Pattern not detected" in detail
+    assert FakeSSHClient.sessions[0].discarded
+
+def test_main_exits_non_zero_when_job_cannot_run(monkeypatch, tmp_path):
+    monkeypatch.setattr(config_push, "load_credentials", lambda: ("u", "p"))
+    monkeypatch.setattr(sys, "argv", ["config_push", str(tmp_path / "missing.yaml")])
+    with pytest.raises(SystemExit) as exit_info:
+        config_push.main()
+    assert exit_info.value.code == 1
+
+def test_main_exits_zero_when_every_device_is_compliant(monkeypatch, tmp_path):
+    monkeypatch.setattr(config_push, "run_push_job", lambda *args, **kwargs:
+                        {"results": {"HN-SW-01": config_push.PUSH_COMPLIANT}, "stopped": None})
+    monkeypatch.setattr(sys, "argv", ["config_push", str(tmp_path / "job.yaml")])
+    config_push.main()
+
+# --- Kiểm tra tuân thủ ---
+SYSINFO = ["config system snmp sysinfo", "set status enable", 'set contact "noc@example.com"', "end"]
+FULL_CONFIG = 'config system snmp sysinfo\n    set status enable\n    set contact "noc@example.com"\nend\n'
+SHOW_CONFIG = 'config system snmp sysinfo\n    set contact "noc@example.com"\nend\n'  # 'show' bỏ giá trị mặc định
+
+def _forti(name="FGT-HN"):
+    return {"name": name, "ip": "10.0.0.1", "device_type": "fortinet"}
+
+def test_compliance_ignores_sections_backup_without_defaults(monkeypatch, tmp_path):
+    store = BackupStore(str(tmp_path))
+    now = datetime.now(tz=BACKUP_TZ)
+    store.put("FGT-HN", FULL_CONFIG, vendor="fortinet", timestamp=now - timedelta(hours=2))
+    store.put_sections("FGT-HN", [("system snmp sysinfo", SHOW_CONFIG)], vendor="fortinet", timestamp=now - timedelta(hours=1))
+    monkeypatch.setattr(config_push, "backup_store", store)
+    report = config_push.check_compliance([(_forti(), SYSINFO)], "u", "p")
+    assert report[0]["status"] == config_push.PLAN_SKIP
+
+def test_compliance_fetches_full_config_when_only_sections_backup(monkeypatch, tmp_path):
+    store = BackupStore(str(tmp_path))
+    store.put_sections("FGT-HN", [("system snmp sysinfo", SHOW_CONFIG)], vendor="fortinet")
+    calls = []
+
+    def fake_backup(device, username, password, full=False):
+        calls.append(full)
+        store.put(device["name"], FULL_CONFIG, vendor="fortinet")
+        return "FETCHED"
+
+    monkeypatch.setattr(config_push, "backup_store", store)
+    monkeypatch.setattr(config_push, "backup_device_config", fake_backup)
+    monkeypatch.setattr(config_push, "scheduler", JobScheduler(max_workers=2))
+    report = config_push.check_compliance([(_forti(), SYSINFO)], "u", "p")
+    assert calls == [True]
+    assert report[0]["status"] == config_push.PLAN_SKIP
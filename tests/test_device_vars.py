@@ -0,0 +1,22 @@
+# tests/test_device_vars.py
+from core.device_vars import DeviceVars
+
+DEVICE = {"name": "HN-SW-01", "ip": "10.0.0.1", "device_type": "cisco_ios"}
+
+def test_valid_file_is_merged(tmp_path):
+    path = tmp_path / "device_vars.yaml"
+    path.write_text("all: {ntp_server: 10.0.0.1}\ndevices:\n  HN-SW-01: {loopback_ip: 10.255.0.1}\n", encoding="utf-8")
+    variables = DeviceVars(str(path)).for_device(DEVICE)
+    assert variables["ntp_server"] == "10.0.0.1" and variables["loopback_ip"] == "10.255.0.1"
+
+def test_malformed_file_is_skipped_with_warning(tmp_path, capsys):
+    path = tmp_path / "device_vars.yaml"
+    path.write_text("all: {ntp_server: [10.0.0.1\n", encoding="utf-8")
+    variables = DeviceVars(str(path)).for_device(DEVICE)
+    assert variables["device_name"] == "HN-SW-01" and "ntp_server" not in variables
+    assert "device_vars.yaml" in capsys.readouterr().out
+
+def test_non_mapping_file_is_skipped(tmp_path):
+    path = tmp_path / "device_vars.yaml"
+    path.write_text("- ntp_server\n", encoding="utf-8")
+    assert DeviceVars(str(path)).for_device(DEVICE)["branch"] == "HN"
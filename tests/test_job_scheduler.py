@@ -0,0 +1,36 @@
+# tests/test_job_scheduler.py
+import threading
+import time
+
+from core.job_scheduler import JobScheduler, as_completed, DONE
+
+def _tracked_sleep(state, lock, seconds):
+    with lock:
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+    time.sleep(seconds)
+    with lock:
+        state["running"] -= 1
+
+def _run_burst(scheduler, count, seconds):
+    state, lock = {"running": 0, "peak": 0}, threading.Lock()
+    jobs = [scheduler.submit(_tracked_sleep, state, lock, seconds) for _ in range(count)]
+    start = time.perf_counter()
+    for job in as_completed(jobs):
+        assert job.state == DONE
+    return state["peak"], time.perf_counter() - start
+
+def test_burst_runs_concurrently_on_warmed_up_scheduler():
+    scheduler = JobScheduler(max_workers=20)
+    scheduler.submit(time.sleep, 0).wait(5)
+    time.sleep(0.05)  # Worker của job đầu tiên đã chuyển sang trạng thái rảnh
+
+    peak, elapsed = _run_burst(scheduler, 20, 0.2)
+    assert peak >= 15
+    assert elapsed < 1.0
+
+def test_workers_never_exceed_max_workers():
+    scheduler = JobScheduler(max_workers=4)
+    peak, _ = _run_burst(scheduler, 12, 0.05)
+    assert peak <= 4
+    assert scheduler._workers <= 4
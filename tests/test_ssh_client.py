@@ -0,0 +1,43 @@
+# tests/test_ssh_client.py
+import asyncssh
+import pytest
+from netmiko import NetmikoAuthenticationException, NetmikoTimeoutException
+
+from core import ssh_client, async_ssh
+from core.circuit_breaker import CircuitBreaker, CLOSED, OPEN
+from core.ssh_pool import PoolWaitTimeout
+
+DEVICE = {"name": "HN-R1", "ip": "10.0.0.1", "device_type": "cisco_ios"}
+KEY = ("10.0.0.1", 22)
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, base_backoff=60)
+    monkeypatch.setattr(ssh_client, "breaker", breaker)
+    monkeypatch.setattr(ssh_client, "precheck", lambda host, port: None)
+    return breaker
+
+def _connect(monkeypatch, error, engine="netmiko"):
+    def fail(*args, **kwargs):
+        raise error
+    monkeypatch.setattr(ssh_client.ssh_pool, "acquire", fail)
+    monkeypatch.setattr(async_ssh, "open_connection", fail)
+    return ssh_client.SSHClient(DEVICE, "u", "p", engine=engine).connect()
+
+@pytest.mark.parametrize("error, engine", [
+    (PoolWaitTimeout("Hết thời gian chờ phiên SSH rảnh tới 10.0.0.1"), "netmiko"),
+    (NetmikoAuthenticationException("auth"), "netmiko"),
+    (asyncssh.PermissionDenied("Permission denied"), "asyncssh"),
+])
+def test_local_and_auth_errors_do_not_open_breaker(monkeypatch, breaker, error, engine):
+    assert _connect(monkeypatch, error, engine) is None
+    assert breaker.state(KEY) == CLOSED
+
+@pytest.mark.parametrize("error, engine", [
+    (NetmikoTimeoutException("timeout"), "netmiko"),
+    (ConnectionRefusedError("refused"), "netmiko"),
+    (asyncssh.ConnectionLost("lost"), "asyncssh"),
+])
+def test_connection_errors_open_breaker(monkeypatch, breaker, error, engine):
+    assert _connect(monkeypatch, error, engine) is None
+    assert breaker.state(KEY) == OPEN
@@ -0,0 +1,79 @@
+# tests/test_status_cache.py
+import asyncio
+import threading
+import time
+
+from core.status_cache import StatusCache
+
+KEY = ("10.0.0.1", 22)
+UP = ("UP", 1.0)
+
+def _wait_for_flight(cache):
+    deadline = time.monotonic() + 5
+    while KEY not in cache._inflight:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+def test_sync_waiter_reprobes_when_async_leader_is_cancelled():
+    cache = StatusCache()
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    async def hanging_probe():
+        await asyncio.sleep(60)
+
+    leader = asyncio.run_coroutine_threadsafe(cache.get_or_probe_async(KEY, hanging_probe), loop)
+    _wait_for_flight(cache)
+    result = {}
+    waiter = threading.Thread(target=lambda: result.update(value=cache.get_or_probe(KEY, lambda: UP)))
+    waiter.start()
+    time.sleep(0.05)  # Waiter đã chờ flight của leader
+    leader.cancel()
+    waiter.join(5)
+    loop.call_soon_threadsafe(loop.stop)
+    assert result == {"value": UP}
+    assert cache.get(KEY) == UP
+
+def test_async_waiter_on_same_loop_reprobes_when_leader_is_cancelled():
+    cache = StatusCache()
+
+    async def hanging_probe():
+        await asyncio.sleep(60)
+
+    async def quick_probe():
+        return UP
+
+    async def scenario():
+        leader = asyncio.ensure_future(cache.get_or_probe_async(KEY, hanging_probe))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get_or_probe_async(KEY, quick_probe))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await waiter
+
+    assert asyncio.run(scenario()) == UP
+
+def test_probe_errors_are_still_shared_with_waiters():
+    cache = StatusCache()
+    release = threading.Event()
+    errors = []
+
+    def failing_probe():
+        release.wait(5)
+        raise OSError("probe lỗi")
+
+    def call(probe):
+        try:
+            cache.get_or_probe(KEY, probe)
+        except OSError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call, args=(failing_probe,))
+    leader.start()
+    _wait_for_flight(cache)
+    waiter = threading.Thread(target=call, args=(lambda: UP,))
+    waiter.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(5); waiter.join(5)
+    assert errors == ["probe lỗi", "probe lỗi"]
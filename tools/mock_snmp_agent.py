@@ -0,0 +1,210 @@
+# tools/mock_snmp_agent.py
+"""
+Agent SNMP v1/v2c giả lập (kiểu snmpsim) để thử nghiệm / benchmark mà không cần thiết bị thật.
+
+- Trả lời GET, GETNEXT và GETBULK trên bảng IF-MIB ifTable (ifIndex, ifDescr, ifOperStatus,
+  ifInErrors, ifOutErrors) cùng sysDescr / sysName; mỗi "thiết bị" có `--interfaces` interface.
+- Chấp nhận mọi community. Community dạng '<tên>@<số interface>' (vd 'public@5000') cho một thiết bị
+  có số interface khác, tương tự cách snmpsim chọn file dữ liệu theo community.
+- Cứ 10 interface có 1 interface down, cứ 7 interface có 1 interface có lỗi vào/ra.
+- `latency` (giây) giả lập độ trễ đường truyền: mỗi gói trả lời được gửi sau `latency` giây.
+
+Chạy độc lập từ thư mục gốc dự án:
+    python -m tools.mock_snmp_agent --port 1161 --interfaces 2000 --latency 0.02
+"""
+import argparse
+import asyncio
+import bisect
+
+IF_TABLE_PREFIX = (1, 3, 6, 1, 2, 1, 2, 2, 1)
+SYS_DESCR = (1, 3, 6, 1, 2, 1, 1, 1, 0)
+SYS_NAME = (1, 3, 6, 1, 2, 1, 1, 5, 0)
+
+# Kiểu dữ liệu ASN.1 / SNMP
+TAG_INTEGER, TAG_OCTET_STRING, TAG_NULL, TAG_OID, TAG_SEQUENCE = 0x02, 0x04, 0x05, 0x06, 0x30
+TAG_COUNTER32 = 0x41
+TAG_NO_SUCH_OBJECT, TAG_END_OF_MIB_VIEW = 0x80, 0x82
+PDU_GET, PDU_GETNEXT, PDU_RESPONSE, PDU_GETBULK = 0xA0, 0xA1, 0xA2, 0xA5
+MAX_RESPONSE_BYTES = 65000  # Giới hạn một gói UDP; GETBULK bị cắt bớt hàng như agent thật
+
+# --- BER ---
+def _encode_length(length):
+    if length < 0x80:
+        return bytes([length])
+    raw = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes([0x80 | len(raw)]) + raw
+
+def _tlv(tag, payload):
+    return bytes([tag]) + _encode_length(len(payload)) + payload
+
+def _encode_int(tag, value):
+    return _tlv(tag, value.to_bytes(max(1, (value.bit_length() + 8) // 8), "big", signed=True))
+
+def _encode_unsigned(tag, value):
+    raw = value.to_bytes(max(1, (value.bit_length() + 7) // 8), "big")
+    return _tlv(tag, (b"\x00" + raw) if raw[0] & 0x80 else raw)
+
+def _encode_oid(oid):
+    out = bytearray([oid[0] * 40 + oid[1]])
+    for arc in oid[2:]:
+        chunk = [arc & 0x7F]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        out.extend(reversed(chunk))
+    return _tlv(TAG_OID, bytes(out))
+
+def _encode_value(tag, value):
+    if tag == TAG_INTEGER:
+        return _encode_int(tag, value)
+    if tag == TAG_COUNTER32:
+        return _encode_unsigned(tag, value)
+    if tag == TAG_OCTET_STRING:
+        return _tlv(tag, value.encode("utf-8"))
+    return _tlv(tag, b"")  # NULL và các giá trị ngoại lệ (noSuchObject, endOfMibView)
+
+def _decode(data, pos):
+    """Đọc một TLV tại pos. Trả về (tag, payload, vị trí kế tiếp)."""
+    tag, length = data[pos], data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[pos:pos + size], "big")
+        pos += size
+    return tag, data[pos:pos + length], pos + length
+
+def _decode_items(payload):
+    items, pos = [], 0
+    while pos < len(payload):
+        tag, value, pos = _decode(payload, pos)
+        items.append((tag, value))
+    return items
+
+def _decode_oid(raw):
+    oid = [raw[0] // 40, raw[0] % 40]
+    arc = 0
+    for byte in raw[1:]:
+        arc = (arc << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            oid.append(arc)
+            arc = 0
+    return tuple(oid)
+
+# --- DỮ LIỆU ---
+class MockMib:
+    """Các OID của một thiết bị giả lập, sắp xếp theo thứ tự từ điển để trả lời GETNEXT/GETBULK."""
+
+    def __init__(self, interfaces, name="MOCK-SNMP"):
+        values = {SYS_DESCR: (TAG_OCTET_STRING, "Mock SNMP agent"), SYS_NAME: (TAG_OCTET_STRING, name)}
+        for index in range(1, interfaces + 1):
+            errors = index if index % 7 == 0 else 0
+            values[IF_TABLE_PREFIX + (1, index)] = (TAG_INTEGER, index)
+            values[IF_TABLE_PREFIX + (2, index)] = (TAG_OCTET_STRING, f"GigabitEthernet0/{index}")
+            values[IF_TABLE_PREFIX + (8, index)] = (TAG_INTEGER, 2 if index % 10 == 0 else 1)
+            values[IF_TABLE_PREFIX + (14, index)] = (TAG_COUNTER32, errors)
+            values[IF_TABLE_PREFIX + (20, index)] = (TAG_COUNTER32, errors * 2)
+        self.oids = sorted(values)
+        self.values = values
+
+    def get(self, oid):
+        return self.values.get(oid, (TAG_NO_SUCH_OBJECT, None))
+
+    def next(self, oid):
+        """(OID kế tiếp, giá trị) sau `oid`; (oid, endOfMibView) nếu đã hết."""
+        i = bisect.bisect_right(self.oids, oid)
+        if i >= len(self.oids):
+            return oid, (TAG_END_OF_MIB_VIEW, None)
+        return self.oids[i], self.values[self.oids[i]]
+
+class MockSnmpAgent(asyncio.DatagramProtocol):
+    def __init__(self, interfaces, latency=0.0):
+        self.interfaces = interfaces
+        self.latency = latency
+        self.mibs = {}
+        self.requests = 0
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def _mib(self, community):
+        count = self.interfaces
+        name, _, suffix = community.partition("@")
+        if suffix.isdigit():
+            count = int(suffix)
+        if count not in self.mibs:
+            self.mibs[count] = MockMib(count, name or "MOCK-SNMP")
+        return self.mibs[count]
+
+    def datagram_received(self, data, addr):
+        try:
+            response = self.handle(data)
+        except (IndexError, ValueError):
+            return  # Gói không hợp lệ: bỏ qua như agent thật
+        if response is None:
+            return
+        if self.latency:
+            asyncio.get_running_loop().call_later(self.latency, self.transport.sendto, response, addr)
+        else:
+            self.transport.sendto(response, addr)
+
+    def handle(self, data):
+        self.requests += 1
+        _, message, _ = _decode(data, 0)
+        (_, version), (_, community), (pdu_type, pdu) = _decode_items(message)
+        (_, request_id), (_, field1), (_, field2), (_, varbind_list) = _decode_items(pdu)
+        oids = [_decode_oid(_decode_items(vb)[0][1]) for _, vb in _decode_items(varbind_list)]
+        mib = self._mib(community.decode("utf-8", "replace"))
+        if pdu_type == PDU_GET:
+            varbinds = [(oid, mib.get(oid)) for oid in oids]
+        elif pdu_type == PDU_GETNEXT:
+            varbinds = [mib.next(oid) for oid in oids]
+        elif pdu_type == PDU_GETBULK:
+            non_repeaters = int.from_bytes(field1, "big")
+            max_repetitions = int.from_bytes(field2, "big")
+            varbinds = [mib.next(oid) for oid in oids[:non_repeaters]]
+            cursors = list(oids[non_repeaters:])
+            size = 0
+            for _ in range(max_repetitions):
+                row = [mib.next(oid) for oid in cursors]
+                size += sum(len(oid) * 2 + 24 for oid, _ in row)
+                if size > MAX_RESPONSE_BYTES:
+                    break
+                varbinds.extend(row)
+                cursors = [oid for oid, _ in row]
+                if all(value[0] == TAG_END_OF_MIB_VIEW for _, value in row):
+                    break
+        else:
+            return None
+        encoded = b"".join(_tlv(TAG_SEQUENCE, _encode_oid(oid) + _encode_value(*value)) for oid, value in varbinds)
+        body = (_tlv(TAG_INTEGER, request_id) + _encode_int(TAG_INTEGER, 0) + _encode_int(TAG_INTEGER, 0)
+                + _tlv(TAG_SEQUENCE, encoded))
+        return _tlv(TAG_SEQUENCE, _tlv(TAG_INTEGER, version) + _tlv(TAG_OCTET_STRING, community)
+                    + _tlv(PDU_RESPONSE, body))
+
+async def start_mock_agent(host="127.0.0.1", port=1161, interfaces=2000, latency=0.0):
+    """Khởi động agent UDP. Trả về (transport, agent)."""
+    loop = asyncio.get_running_loop()
+    return await loop.create_datagram_endpoint(lambda: MockSnmpAgent(interfaces, latency), local_addr=(host, port))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1161)
+    parser.add_argument("--interfaces", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Độ trễ đường truyền tới thiết bị (giây)")
+    args = parser.parse_args()
+
+    async def _serve():
+        await start_mock_agent(args.host, args.port, args.interfaces, args.latency)
+        print(f"Mock SNMP agent tại {args.host}:{args.port} ({args.interfaces} interface)", flush=True)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
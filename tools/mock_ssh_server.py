@@ -0,0 +1,379 @@
+# tools/mock_ssh_server.py
+"""
+Máy chủ SSH giả lập thiết bị Cisco IOS và FortiOS để thử nghiệm / benchmark
+mà không cần thiết bị thật.
+
+- Cổng `port` giả lập Cisco IOS, cổng `port + 1` giả lập FortiOS.
+- Tên thiết bị (prompt) lấy theo IP cục bộ mà client kết nối tới, vd: 127.0.0.5 -> 'DEV-127-0-0-5',
+  nên có thể giả lập nhiều thiết bị bằng các địa chỉ 127.x.y.z khác nhau.
+- Cisco IOS có flash giả lập (thư mục `--flash-dir`, mỗi thiết bị một thư mục con): chép file lên qua SCP
+  (vd `flash:restore.cfg`), `configure replace flash:<file> force` thay running-config bằng file đó,
+  `delete /force flash:<file>`. File chứa dòng 'mock-replace-fail' giả lập configure replace thất bại giữa chừng.
+- FortiOS mặc định ở chế độ 'set output more' như thiết bị thật: output dài hơn FORTI_PAGE_LINES dòng dừng ở
+  '--More--' chờ một phím (phím bất kỳ: trang tiếp, 'q': bỏ phần còn lại). 'config system console' /
+  'set output standard' / 'end' tắt phân trang cho phiên đó.
+- Chấp nhận mọi username/password. `latency` (giây) giả lập độ trễ đường WAN: mỗi dòng lệnh chỉ
+  được xử lý sau khi tới thiết bị `latency` giây; các lệnh gửi liền nhau trong một lượt chịu độ trễ một lần.
+
+Chạy độc lập từ thư mục gốc dự án:
+    python -m tools.mock_ssh_server --port 22022 --latency 0.05
+"""
+import os
+import argparse
+import asyncio
+import tempfile
+
+import asyncssh
+
+CISCO_CPU = """CPU utilization for five seconds: 3%/0%; one minute: 4%; five minutes: 5%
+ PID Runtime(ms)     Invoked      uSecs   5Sec   1Min   5Min TTY Process
+   1           4         120         33  0.00%  0.00%  0.00%   0 Chunk Manager"""
+
+CISCO_MEMORY = """                Head    Total(b)     Used(b)     Free(b)   Lowest(b)  Largest(b)
+Processor   6A3C8D40   402653184   134217728   268435456   260000000   250000000
+      I/O    E800000    25165824    12582912    12582912    12000000    12000000"""
+
+CISCO_VERSION = """Cisco IOS Software, C2900 Software (C2900-UNIVERSALK9-M), Version 15.7(3)M4
+{hostname} uptime is 12 weeks, 3 days, 4 hours, 7 minutes
+System image file is "flash:c2900-universalk9-mz.SPA.157-3.M4.bin\""""
+
+CISCO_INTERFACES = """Interface              IP-Address      OK? Method Status                Protocol
+GigabitEthernet0/0     10.10.0.1       YES NVRAM  up                    up
+GigabitEthernet0/1     unassigned      YES NVRAM  administratively down down"""
+
+FORTI_PERFORMANCE = """CPU states: 2% user 1% system 0% nice 97% idle 0% iowait 0% irq 0% softirq
+Memory: 2055032k total, 676108k used (32.9%), 1378924k free (67.1%)
+Uptime: 41 days,  3 hours,  12 minutes"""
+
+FORTI_STATUS = """Version: FortiGate-60F v7.2.5,build1517,230606 (GA.F)
+Serial-Number: FGT60FTK00000000
+Hostname: {hostname}
+Operation Mode: NAT
+System time: Mon Oct 13 10:15:02 2025"""
+
+FORTI_CHECKSUM = """is_manage_master()=1, is_root_master()=1
+debugzone
+global: 7a 11 6c 9e 0b 52 d8 41 33 be 2f 90 4d 1c 6a e5
+root: 2c 0a 9a 44 71 e3 05 8b c6 12 de 7f 30 a9 58 b1
+all: 5d 3f 82 c0 19 6e a4 27 f1 0c 93 5b e8 46 2d 7a
+
+checksum
+global: 7a 11 6c 9e 0b 52 d8 41 33 be 2f 90 4d 1c 6a e5
+root: 2c 0a 9a 44 71 e3 05 8b c6 12 de 7f 30 a9 58 b1
+all: 5d 3f 82 c0 19 6e a4 27 f1 0c 93 5b e8 46 2d 7a"""
+
+FORTI_PAGE_LINES = 22
+FORTI_MORE = "--More-- "
+
+FORTI_INTERFACES = """== [onboard]
+        ==[port1]
+                name: port1   status: up   speed: 1000Mbps (Duplex: full)
+        ==[port2]
+                name: port2   status: down   speed: n/a"""
+
+def cisco_running_config(hostname, lines):
+    body = [f"hostname {hostname}", "!", "! Last configuration change at 10:15:02 UTC Mon Oct 13 2025 by admin", "!"]
+    for i in range(max(lines - len(body) - 2, 0)):
+        if i % 5 == 0:
+            body.append(f"interface GigabitEthernet0/{i // 5}")
+        else:
+            body.append(f" description link-{i}")
+    body += ["!", "end"]
+    return "Building configuration...\n\nCurrent configuration : 4096 bytes\n" + "\n".join(body)
+
+def forti_full_config(hostname, lines):
+    body = ["#config-version=FGT60F-7.2.5-FW-build1517-230606:opmode=0:vdom=0:user=admin",
+            "config system global", f'    set hostname "{hostname}"', "end", "config firewall address"]
+    for i in range(max(lines - 7, 0)):
+        body.append(f'    edit "addr-{i}"' if i % 3 == 0 else f"        set subnet 10.{i % 250}.0.0 255.255.0.0" if i % 3 == 1 else "    next")
+    body.append("end")
+    return "\n".join(body)
+
+FORTI_SHOW_EXTRA = """config system interface
+    edit "port1"
+        set ip 10.10.0.1 255.255.255.0
+        set allowaccess ping https ssh
+    next
+end
+config firewall policy
+    edit 1
+        set name "lan-wan"
+        set srcintf "port2"
+        set dstintf "port1"
+        set action accept
+        set nat enable
+    next
+end"""
+
+def forti_show_config(hostname, lines):
+    """Output 'show': chỉ giá trị khác mặc định, gồm nhiều section 'config ...' cấp ngoài cùng."""
+    return forti_full_config(hostname, lines) + "\n" + FORTI_SHOW_EXTRA
+
+def forti_show_section(config, section):
+    """Output 'show <section>': khối 'config <section>' ... 'end' cấp ngoài cùng."""
+    lines, block = config.split("\n"), []
+    for line in lines:
+        if block or line == f"config {section}":
+            block.append(line)
+            if line == "end":
+                break
+    return "\n".join(block)
+
+MOCK_REPLACE_FAIL_LINE = "mock-replace-fail"
+
+def _hostname(local_ip):
+    return "DEV-" + local_ip.replace(".", "-")
+
+def _flash_file(flash_dir, url):
+    """'flash:restore.cfg' / 'flash:/restore.cfg' -> đường dẫn trong thư mục flash của thiết bị."""
+    name = url.split(":", 1)[-1].lstrip("/")
+    return os.path.join(flash_dir, os.path.basename(name)) if name else None
+
+class MockDevice:
+    """Trạng thái và phản hồi của một phiên CLI giả lập."""
+
+    def __init__(self, vendor, hostname, config_lines, flash_dir=None, running_configs=None):
+        self.vendor = vendor
+        self.hostname = hostname
+        self.config_lines = config_lines
+        self.config_stack = []
+        self.flash_dir = flash_dir
+        self.console_output = "more"  # FortiOS: 'more' = phân trang output dài
+        self.paging = False  # Đang dừng ở '--More--', byte tiếp theo client gửi là phím bấm
+        # running-config đã bị 'configure replace' thay thế, dùng chung giữa các phiên (theo hostname)
+        self.running_configs = running_configs if running_configs is not None else {}
+
+    def prompt(self):
+        if self.vendor == "cisco_ios":
+            return f"{self.hostname}(config)#" if self.config_stack else f"{self.hostname}#"
+        if self.config_stack:
+            return f"{self.hostname} ({self.config_stack[-1]}) # "
+        return f"{self.hostname} # "
+
+    def handle(self, command):
+        """Trả về output của một lệnh (không bao gồm prompt)."""
+        command = command.strip()
+        if not command:
+            return ""
+        command, _, pattern = command.partition(" | grep ")
+        if self.vendor == "cisco_ios":
+            output = self._handle_cisco(command)
+        else:
+            output = self._handle_fortinet(command)
+        if pattern:
+            output = "\n".join(line for line in output.splitlines() if pattern.strip() in line)
+        return output
+
+    def _handle_cisco(self, command):
+        if command in ("configure terminal", "conf t"):
+            self.config_stack = ["config"]
+            return "Enter configuration commands, one per line.  End with CNTL/Z."
+        if command == "end":
+            self.config_stack = []
+            return ""
+        if self.config_stack:
+            return ""
+        responses = {
+            "terminal length 0": "",
+            "show processes cpu sorted": CISCO_CPU,
+            "show memory summary": CISCO_MEMORY,
+            "show version": CISCO_VERSION.format(hostname=self.hostname),
+            "show ip interface brief": CISCO_INTERFACES,
+            "show running-config": self._cisco_running_config(),
+        }
+        if command in responses:
+            return responses[command]
+        if command.startswith("configure replace "):
+            return self._configure_replace(command.split()[2])
+        if command.startswith("delete "):
+            path = _flash_file(self.flash_dir, command.split()[-1]) if self.flash_dir else None
+            if not path or not os.path.exists(path):
+                return f"%Error deleting {command.split()[-1]} (No such file or directory)"
+            os.remove(path)
+            return ""
+        if command.startswith("show running-config | include"):
+            return "! Last configuration change at 10:15:02 UTC Mon Oct 13 2025 by admin"
+        return "% Invalid input detected at '^' marker."
+
+    def _cisco_running_config(self):
+        config = self.running_configs.get(self.hostname)
+        if config is None:
+            return cisco_running_config(self.hostname, self.config_lines)
+        return f"Building configuration...\n\nCurrent configuration : {len(config)} bytes\n{config}"
+
+    def _configure_replace(self, url):
+        path = _flash_file(self.flash_dir, url) if self.flash_dir else None
+        if not path or not os.path.exists(path):
+            return f"%Error opening {url} (No such file or directory)\nRollback aborted"
+        with open(path, "r", encoding="utf-8") as f:
+            config = f.read().replace("\r\n", "\n").rstrip("\n")
+        lines = config.split("\n")
+        # Như IOS: áp từng dòng; gặp lỗi thì dừng, running-config ở trạng thái áp dở
+        self.running_configs[self.hostname] = config
+        if MOCK_REPLACE_FAIL_LINE in lines:
+            return (f"Line {lines.index(MOCK_REPLACE_FAIL_LINE) + 1}: {MOCK_REPLACE_FAIL_LINE}\n"
+                    "% Invalid input detected at '^' marker.\nTotal number of passes: 1\nRollback Failed")
+        return "Total number of passes: 1\nRollback Done"
+
+    def _handle_fortinet(self, command):
+        if command.startswith("config "):
+            self.config_stack.append(command.split(" ", 1)[1].split()[-1])
+            return ""
+        if command == "end":
+            if self.config_stack:
+                self.config_stack.pop()
+            return ""
+        if self.config_stack:
+            if self.config_stack[-1] == "console" and command.startswith("set output "):
+                self.console_output = command.split()[-1]
+            return ""
+        responses = {
+            "get system status": FORTI_STATUS.format(hostname=self.hostname),
+            "get system console": f"output              : {self.console_output}",
+            "get system performance status": FORTI_PERFORMANCE,
+            "get system interface physical": FORTI_INTERFACES,
+            "diagnose sys ha checksum show": FORTI_CHECKSUM,
+            "show full-configuration": forti_full_config(self.hostname, self.config_lines),
+            "show": forti_show_config(self.hostname, self.config_lines // 4),
+        }
+        if command in responses:
+            return responses[command]
+        if command.startswith("show "):
+            return forti_show_section(forti_show_config(self.hostname, self.config_lines // 4), command[len("show "):])
+        return "Command fail. Return code -61"
+
+class _MockServer(asyncssh.SSHServer):
+    def begin_auth(self, username):
+        return True
+
+    def password_auth_supported(self):
+        return True
+
+    def validate_password(self, username, password):
+        return True
+
+def _pages(text):
+    """Chia output FortiOS thành các trang FORTI_PAGE_LINES dòng (chế độ 'set output more')."""
+    lines = text.split("\n")
+    return ["\n".join(lines[i:i + FORTI_PAGE_LINES]) for i in range(0, len(lines), FORTI_PAGE_LINES)]
+
+async def _read_lines(process, lines, latency, device=None, keys=None):
+    """
+    Đọc input thô (không dùng line editor) và đưa từng dòng vào hàng đợi kèm thời điểm
+    dòng đó "tới" thiết bị (= lúc nhận + latency). Nhiều lệnh gửi liền nhau chỉ chịu độ trễ một lần.
+    Khi thiết bị đang dừng ở '--More--', ký tự đầu tiên nhận được là phím bấm, được đưa vào `keys`.
+    """
+    loop = asyncio.get_running_loop()
+    pending, last_cr = "", False
+    try:
+        while True:
+            data = await process.stdin.read(65536)
+            if not data:
+                break
+            if last_cr and data.startswith("\n"):
+                data = data[1:]  # '\r\n' bị tách giữa hai lần đọc
+            if device is not None and device.paging and not pending and data:
+                device.paging = False
+                await keys.put(data[0])
+                data = data[1:]
+            last_cr = data.endswith("\r")
+            pending += data.replace("\r\n", "\n").replace("\r", "\n")
+            *complete, pending = pending.split("\n")
+            arrival = loop.time() + latency
+            for line in complete:
+                # Bỏ ký tự điều khiển (netmiko gửi vd '\x00' trước lệnh), như line editor của CLI thật
+                await lines.put((arrival, "".join(ch for ch in line if ch >= " " or ch == "\t")))
+    except (asyncssh.BreakReceived, asyncssh.TerminalSizeChanged, ConnectionError):
+        pass
+    await lines.put((None, None))
+    if keys is not None:
+        await keys.put(None)  # Client ngắt kết nối khi thiết bị đang chờ phím ở '--More--'
+
+class _MockFlash(asyncssh.SFTPServer):
+    """Flash của thiết bị Cisco giả lập cho SCP: bỏ tiền tố 'flash:', mỗi thiết bị một thư mục."""
+
+    def __init__(self, chan, flash_root):
+        root = os.path.join(flash_root, _hostname(chan.get_extra_info("sockname")[0]))
+        os.makedirs(root, exist_ok=True)
+        super().__init__(chan, chroot=root)
+
+    def map_path(self, path):
+        return super().map_path(path.split(b":", 1)[-1])
+
+def _make_process_handler(vendor, latency, config_lines, flash_root=None, running_configs=None):
+    async def handle_process(process):
+        hostname = _hostname(process.get_extra_info("sockname")[0])
+        flash_dir = os.path.join(flash_root, hostname) if flash_root else None
+        device = MockDevice(vendor, hostname, config_lines, flash_dir, running_configs)
+        loop = asyncio.get_running_loop()
+        lines, keys = asyncio.Queue(), asyncio.Queue()
+        reader = asyncio.ensure_future(_read_lines(process, lines, latency, device, keys))
+        process.stdout.write(device.prompt())
+        try:
+            while True:
+                arrival, line = await lines.get()
+                if line is None:
+                    break
+                delay = arrival - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # Thiết bị chỉ echo lệnh khi đọc tới nó (sau prompt), giống CLI thật khi gõ trước nhiều lệnh
+                output = device.handle(line)
+                pages = _pages(output) if output and vendor == "fortinet" and device.console_output == "more" else [output]
+                process.stdout.write(line + "\r\n" + (pages[0].replace("\n", "\r\n") + "\r\n" if pages[0] else ""))
+                for page in pages[1:]:
+                    device.paging = True
+                    process.stdout.write(FORTI_MORE)
+                    key = await keys.get()
+                    process.stdout.write("\r" + " " * len(FORTI_MORE) + "\r")  # Xóa dòng '--More--' như CLI thật
+                    if key == "q":
+                        break
+                    process.stdout.write(page.replace("\n", "\r\n") + "\r\n")
+                process.stdout.write(device.prompt())
+                if line.strip() == "exit" and not device.config_stack:
+                    break
+        except ConnectionError:
+            pass
+        reader.cancel()
+        process.exit(0)
+    return handle_process
+
+async def start_mock_server(host="0.0.0.0", port=22022, latency=0.0, config_lines=2000, flash_dir=None):
+    """Khởi động 2 listener (Cisco ở `port`, FortiOS ở `port + 1`). Trả về danh sách server."""
+    host_key = asyncssh.generate_private_key("ssh-ed25519")
+    flash_root = flash_dir or tempfile.mkdtemp(prefix="mock-flash-")
+    running_configs = {}
+    servers = []
+    for offset, vendor in enumerate(("cisco_ios", "fortinet")):
+        cisco = vendor == "cisco_ios"
+        server = await asyncssh.create_server(
+            _MockServer, host, port + offset, server_host_keys=[host_key],
+            process_factory=_make_process_handler(vendor, latency, config_lines, flash_root if cisco else None,
+                                                  running_configs),
+            sftp_factory=(lambda chan: _MockFlash(chan, flash_root)) if cisco else None, allow_scp=cisco,
+            line_editor=False, backlog=4096,
+        )
+        servers.append(server)
+    return servers
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=22022)
+    parser.add_argument("--latency", type=float, default=0.0, help="Độ trễ đường truyền tới thiết bị (giây)")
+    parser.add_argument("--config-lines", type=int, default=2000)
+    parser.add_argument("--flash-dir", help="Thư mục chứa flash giả lập (mặc định: thư mục tạm)")
+    args = parser.parse_args()
+
+    async def _serve():
+        await start_mock_server(args.host, args.port, args.latency, args.config_lines, args.flash_dir)
+        print(f"Mock SSH: Cisco IOS tại {args.host}:{args.port}, FortiOS tại {args.host}:{args.port + 1}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()